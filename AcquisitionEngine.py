@@ -0,0 +1,236 @@
+from PhidgetDataLogger.PerformanceMetrics import PerformanceMetrics
+from PhidgetDataLogger.AlarmEngine import AlarmEngine
+from PhidgetDataLogger.AlarmDispatcher import AlarmDispatcher
+from PhidgetDataLogger.LiveDecimator import LiveDecimator
+import numpy as np
+import threading
+import time
+
+class AcquisitionEngine():
+    '''
+    Moves data from the sensors to the recorder and checks alarms on background
+    threads so recording carries on whatever the user interface is doing. Each
+    worker thread drains its share of the sensors at a fixed period, passes the
+    samples to the recorder and checks every one against the alarm rules. The
+    user interface only reads the latest plot snapshot of each sensor, which is
+    a min/max decimated copy sized to the plot's width and so can be drawn
+    quickly without any further locking.
+    '''
+
+    def __init__(self,sensors,period=0.02,threads=1,plotting=True,metrics=None,alarmLogPath=None,
+            plotPixels=1000):
+        '''
+        Constructor for the acquisition engine. The worker threads are not
+        started until start is called.
+
+        Arguments
+        ---------
+        sensors: List of sensors to acquire data from.
+
+        period: Time in seconds between each drain of a sensor.
+
+        threads: Number of worker threads. The sensors are shared between them.
+
+        plotting: If False the plot data is left out of the snapshots, saving
+        a copy of every sensor's plot buffer each period when nothing is drawn.
+
+        metrics: PerformanceMetrics the sample rate, data queue backlog and
+        dropped samples of each sensor and the time of each drain are recorded
+        in. A new one is made if None.
+
+        alarmLogPath: CSV file every alarm event is appended to, or None.
+
+        plotPixels: Width in pixels each sensor's plot data is decimated to
+        until setPlotWidth is called.
+        '''
+        self.sensors = sensors
+        self.period = period
+        self.plotting = plotting
+        #Protects the snapshots and the settings pushed from the user interface
+        self.lock = threading.Lock()
+        #Held while a sensor is drained so it can be paused safely
+        self.sensorLocks = [threading.Lock() for sensor in sensors]
+        self.paused = [False]*len(sensors)
+        self.recorder = None
+        self.recordedChannels = [False]*len(sensors)
+        #Alarm rules of each sensor and the events raised by them
+        self.alarms = AlarmEngine([sensor.sensorName for sensor in sensors],alarmLogPath)
+        self.metrics = metrics if metrics != None else PerformanceMetrics()
+        #Runs the custom alarm function off the worker threads, limited per sensor
+        self.alarmDispatcher = AlarmDispatcher(metrics=self.metrics)
+        #Latest plot data of each sensor. The sequence number goes up each time
+        #new data arrives and alarmed stays set until the snapshot is taken.
+        self.snapshots = [{"sequence":0,"plotX":np.empty(0),"plotY":np.empty(0),
+                "alarmed":False} for sensor in sensors]
+        #Decimated view of each sensor's plot buffer, updated with only the new
+        #samples each period, and the calibration the view was made with
+        self.decimators = [LiveDecimator(sensor.refreshPeriod/1000.0,plotPixels) for sensor in sensors]
+        self.plotCalibrations = [None]*len(sensors)
+        self.acquiredSamples = [0]*len(sensors)
+        self.error = None
+        self.stopEvent = threading.Event()
+        threads = max(1,min(threads,len(sensors)))
+        self.workers = [threading.Thread(target=self.run,args=(range(i,len(sensors),threads),),
+                name="Acquisition {}".format(i),daemon=True) for i in range(threads)]
+
+    def start(self):
+        '''
+        Starts the worker threads.
+        '''
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        '''
+        Stops the worker threads and waits for them to finish.
+        '''
+        self.stopEvent.set()
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.join()
+        self.alarmDispatcher.close()
+
+    def run(self,channels):
+        '''
+        Worker thread loop. Drains each of its sensors once per period.
+        '''
+        while not self.stopEvent.is_set():
+            start = time.monotonic()
+            for i in channels:
+                try:
+                    self.acquire(i)
+                except Exception as error:
+                    #Keep the other sensors going and leave the error to be shown
+                    self.error = error
+            self.metrics.addTiming("acquisition.tick",time.monotonic() - start)
+            self.stopEvent.wait(max(0.0,self.period - (time.monotonic() - start)))
+
+    def acquire(self,i):
+        '''
+        Drains a single sensor, records its new samples, checks every one of them
+        against its alarm rule and updates its plot snapshot.
+        '''
+        sensor = self.sensors[i]
+        with self.sensorLocks[i]:
+            if self.paused[i]:
+                return
+            self.metrics.setGauge("backlog." + sensor.sensorName,sensor.dataQ.qsize())
+            #Sensors which can lose samples before they reach the data queue count them
+            dropped = getattr(sensor,"droppedSamples",None)
+            if callable(dropped):
+                self.metrics.setGauge("dropped." + sensor.sensorName,dropped())
+            start = time.perf_counter()
+            x, y, plotX, plotY = sensor.getData()
+            #Calibrated values are recorded unless the sensor asks for raw ones
+            recorded = y if sensor.recordCalibrated else sensor.rawValues
+            self.metrics.increment("samples." + sensor.sensorName,len(x))
+            if len(x) == 0:
+                return
+            #The plot arrays are views of the sensor's buffer so are decimated
+            #into new arrays while it can not change
+            if self.plotting:
+                plotX, plotY = self.decimatePlot(i,plotX,plotY)
+            self.metrics.addTiming("acquisition.drain",time.perf_counter() - start)
+        with self.lock:
+            recorder = self.recorder if self.recordedChannels[i] else None
+        if recorder != None:
+            recorder.submit(sensor.sensorName,x,recorded)
+        alarmed = self.alarms.evaluate(i,x,y)
+        with self.lock:
+            snapshot = self.snapshots[i]
+            snapshot["sequence"] += 1
+            if self.plotting:
+                snapshot["plotX"] = plotX
+                snapshot["plotY"] = plotY
+            snapshot["alarmed"] = snapshot["alarmed"] or alarmed
+            self.acquiredSamples[i] += len(x)
+        if alarmed:
+            self.alarmDispatcher.trigger(sensor.sensorName)
+
+    def decimatePlot(self,i,plotX,plotY):
+        '''
+        Returns the plot data of a sensor decimated to its plot's width. Must be
+        called with the sensor's lock held.
+        '''
+        sensor = self.sensors[i]
+        decimator = self.decimators[i]
+        calibration = sensor.calibration if sensor.useCallibration else None
+        if calibration != self.plotCalibrations[i]:
+            #Every plotted value has changed so the whole buffer is decimated again
+            decimator.clear()
+            self.plotCalibrations[i] = calibration
+        decimator.update(plotX,plotY)
+        return decimator.view()
+
+    def setPlotWidth(self,i,pixels):
+        '''
+        Sets the width in pixels of a sensor's plot, which its plot data is
+        decimated to.
+        '''
+        with self.sensorLocks[i]:
+            if int(pixels) != self.decimators[i].pixels:
+                self.decimators[i].resize(pixels)
+
+    def setDisplayMode(self,i,mode):
+        '''
+        Sets whether a sensor's plot data sweeps or scrolls, see
+        Sensor.setDisplayMode.
+        '''
+        with self.sensorLocks[i]:
+            self.sensors[i].setDisplayMode(mode)
+
+    def takeSnapshot(self,i):
+        '''
+        Returns the sequence number, plot times, plot values and whether the
+        alarm has been triggered since the last call for a sensor.
+        '''
+        with self.lock:
+            snapshot = self.snapshots[i]
+            alarmed = snapshot["alarmed"]
+            snapshot["alarmed"] = False
+            return snapshot["sequence"], snapshot["plotX"], snapshot["plotY"], alarmed
+
+    def setRecorder(self,recorder):
+        '''
+        Sets the recorder new samples are passed to, or None to stop recording.
+        '''
+        with self.lock:
+            self.recorder = recorder
+
+    def setRecordedChannels(self,recorded):
+        '''
+        Sets which sensors are recorded from a list of True or False for each.
+        '''
+        with self.lock:
+            self.recordedChannels = list(recorded)
+
+    def setAlarm(self,i,active,low,high):
+        '''
+        Sets the alarm limits of a sensor. The alarm is triggered by any sample
+        at or below low or at or above high.
+        '''
+        self.alarms.setRule(i,active,low,high)
+
+    def setAlarmRule(self,i,active,low,high,hysteresis=0.0,rateLimit=None,holdTime=0.0):
+        '''
+        Sets the alarm rule of a sensor, see AlarmEngine.setRule. The alarm
+        is triggered whenever the rule is met by any sample.
+        '''
+        self.alarms.setRule(i,active,low,high,hysteresis,rateLimit,holdTime)
+
+    def setAlarmFunction(self,func,*args):
+        '''
+        Sets a function called with args when an alarm is triggered. It is
+        called on one of the alarm dispatcher's threads, so can be slow but must
+        not use the user interface directly. See AlarmDispatcher for how often
+        it is called while an alarm carries on.
+        '''
+        self.alarmDispatcher.setAction(func,*args)
+
+    def setPaused(self,i,paused):
+        '''
+        Stops or restarts acquisition from a sensor. While paused its getData
+        can be called from elsewhere, such as a callibration window.
+        '''
+        with self.sensorLocks[i]:
+            self.paused[i] = paused
@@ -0,0 +1,216 @@
+import threading
+import queue
+import time
+
+class AlarmDispatcher():
+    '''
+    Runs the custom alarm action on a small pool of worker threads so a slow
+    action, such as sending a message or switching a DigitalOutputChannel,
+    never holds up acquisition, recording or plotting. Triggers are made once
+    per block of samples while an alarm holds so each alarm, identified by a
+    key such as the sensor name, is limited separately:
+
+    - Debouncing: triggers less than debounce seconds apart belong to the same
+      alarm and only the first of them runs the action at once.
+    - Rate limiting: while the alarm carries on the action is repeated at most
+      every minInterval seconds, or never if minInterval is None.
+    - Coalescing: while the alarm's action is queued or running any further
+      triggers are counted against it rather than queued again.
+
+    An action running for longer than timeout seconds is abandoned. Python can
+    not stop a thread so it is left to finish in the background and a new
+    worker takes its place, keeping the pool at full size. The time taken by
+    every action and the number of triggers dispatched, coalesced and
+    suppressed are recorded in the metrics.
+    '''
+
+    def __init__(self,workers=2,debounce=1.0,minInterval=5.0,timeout=10.0,metrics=None):
+        '''
+        Constructor for the dispatcher. The worker threads are started at once.
+
+        Arguments
+        ---------
+        workers: Number of worker threads running actions.
+
+        debounce: Default time in seconds without triggers after which an alarm
+        is treated as new.
+
+        minInterval: Default shortest time in seconds between actions of an
+        alarm which carries on, or None to run the action once per alarm.
+
+        timeout: Time in seconds after which a running action is abandoned.
+
+        metrics: PerformanceMetrics the dispatcher's counters and the
+        alarm.action timing are recorded in, or None.
+        '''
+        self.debounce = debounce
+        self.minInterval = minInterval
+        self.timeout = timeout
+        self.metrics = metrics
+        #Protects the action, the state of each alarm and the running actions
+        self.lock = threading.Lock()
+        self.action = None
+        self.actionArgs = ()
+        #Times and limits of each alarm, keyed by the alarm's key
+        self.states = {}
+        #Key and start time of the action each worker is running, keyed by thread
+        self.running = {}
+        self.queue = queue.Queue()
+        self.stopEvent = threading.Event()
+        self.dispatchedActions = 0
+        self.coalescedTriggers = 0
+        self.suppressedTriggers = 0
+        self.timedOutActions = 0
+        self.failedActions = 0
+        self.error = None
+        self.workers = [self.startWorker() for i in range(max(1,workers))]
+        self.watchdog = threading.Thread(target=self.watch,name="Alarm watchdog",daemon=True)
+        self.watchdog.start()
+
+    def startWorker(self):
+        '''
+        Starts and returns a new worker thread.
+        '''
+        worker = threading.Thread(target=self.work,name="Alarm action",daemon=True)
+        worker.start()
+        return worker
+
+    def setAction(self,func,*args):
+        '''
+        Sets the function run when an alarm is triggered. It is called with
+        args as a tuple, or None to run nothing.
+        '''
+        with self.lock:
+            self.action = func
+            self.actionArgs = args
+
+    #Stands for an argument of setLimits which was not given, as None is a
+    #valid minInterval
+    unchanged = object()
+
+    def setLimits(self,key,debounce=unchanged,minInterval=unchanged):
+        '''
+        Sets the debounce time and shortest interval between actions of one
+        alarm in seconds, replacing the defaults given to the constructor.
+        Only the limits given are changed, so minInterval can be set to None
+        without changing the debounce time and the other way round.
+        '''
+        with self.lock:
+            state = self.getState(key)
+            if debounce is not self.unchanged:
+                state["debounce"] = debounce
+            if minInterval is not self.unchanged:
+                state["minInterval"] = minInterval
+
+    def getState(self,key):
+        '''
+        Returns the state of an alarm, creating it if needed. Must be called
+        with the lock held.
+        '''
+        state = self.states.get(key)
+        if state == None:
+            #lastTrigger: time of the latest trigger. lastDispatch: time the
+            #action was last queued. busy: whether it is queued or running.
+            state = {"debounce":self.debounce,"minInterval":self.minInterval,
+                    "lastTrigger":None,"lastDispatch":None,"busy":False}
+            self.states[key] = state
+        return state
+
+    def trigger(self,key):
+        '''
+        Records that an alarm has been triggered and queues its action if the
+        limits allow it. Never waits for the action. Returns whether the
+        action was queued.
+        '''
+        now = time.monotonic()
+        with self.lock:
+            if self.action == None or self.stopEvent.is_set():
+                return False
+            state = self.getState(key)
+            newAlarm = state["lastTrigger"] == None or now - state["lastTrigger"] > state["debounce"]
+            state["lastTrigger"] = now
+            if state["busy"]:
+                self.coalescedTriggers += 1
+                counter = "alarm.coalesced"
+            elif newAlarm or (state["minInterval"] != None and
+                    now - state["lastDispatch"] >= state["minInterval"]):
+                state["busy"] = True
+                state["lastDispatch"] = now
+                self.dispatchedActions += 1
+                self.queue.put((key,self.action,self.actionArgs))
+                counter = "alarm.dispatched"
+            else:
+                self.suppressedTriggers += 1
+                counter = "alarm.suppressed"
+        if self.metrics != None:
+            self.metrics.increment(counter)
+            self.metrics.setGauge("alarm.queue",self.queue.qsize())
+        return counter == "alarm.dispatched"
+
+    def work(self):
+        '''
+        Worker thread loop. Runs queued actions until the dispatcher is closed
+        or the worker is abandoned.
+        '''
+        worker = threading.current_thread()
+        while True:
+            item = self.queue.get()
+            if item == None:
+                return
+            key, func, args = item
+            start = time.monotonic()
+            with self.lock:
+                self.running[worker] = (key,start)
+            try:
+                func(args)
+            except Exception as error:
+                #Keep the worker going and leave the error to be shown
+                self.error = error
+                self.failedActions += 1
+                if self.metrics != None:
+                    self.metrics.increment("alarm.errors")
+            duration = time.monotonic() - start
+            if self.metrics != None:
+                self.metrics.addTiming("alarm.action",duration)
+            with self.lock:
+                abandoned = worker not in self.running
+                if not abandoned:
+                    del self.running[worker]
+                    self.states[key]["busy"] = False
+            if abandoned:
+                #A replacement worker has already been started
+                return
+
+    def watch(self):
+        '''
+        Watchdog thread loop. Abandons actions which have run for longer than
+        the timeout and replaces their workers.
+        '''
+        while not self.stopEvent.wait(min(1.0,self.timeout/4.0)):
+            now = time.monotonic()
+            with self.lock:
+                for worker,(key,start) in list(self.running.items()):
+                    if now - start < self.timeout:
+                        continue
+                    del self.running[worker]
+                    self.states[key]["busy"] = False
+                    self.timedOutActions += 1
+                    self.workers.remove(worker)
+                    self.workers.append(self.startWorker())
+                    if self.metrics != None:
+                        self.metrics.increment("alarm.timeouts")
+
+    def close(self,wait=1.0):
+        '''
+        Stops the workers once any queued actions have run, waiting at most
+        wait seconds for them.
+        '''
+        self.stopEvent.set()
+        self.watchdog.join()
+        with self.lock:
+            workers = list(self.workers)
+        for worker in workers:
+            self.queue.put(None)
+        end = time.monotonic() + wait
+        for worker in workers:
+            worker.join(max(0.0,end - time.monotonic()))
@@ -0,0 +1,218 @@
+import numpy as np
+import threading
+import collections
+import datetime
+import time
+
+class AlarmEngine():
+    '''
+    Checks every sample of each block of sensor data against the alarm rules
+    of its channel using whole array operations, so a spike between plot
+    updates is never missed and the cost does not depend on the user
+    interface. A channel's rule can combine high and low thresholds with
+    hysteresis, a limit on the rate of change and a time the condition must
+    last before the alarm is raised. Each time an alarm is raised or cleared
+    a time stamped event is kept and optionally written to a log file.
+    '''
+
+    def __init__(self,channelNames,logPath=None,maxEvents=1000):
+        '''
+        Constructor for the alarm engine. Every channel starts with no rule.
+
+        Arguments
+        ---------
+        channelNames: Name of each channel, used in the events.
+
+        logPath: CSV file every event is appended to, or None.
+
+        maxEvents: Number of the most recent events kept in memory.
+        '''
+        self.channelNames = list(channelNames)
+        self.logPath = logPath
+        #Protects the rules and the events. The state of a channel is only
+        #used by the thread evaluating it.
+        self.lock = threading.Lock()
+        self.rules = [None]*len(self.channelNames)
+        self.states = [self.initialState() for name in self.channelNames]
+        self.events = collections.deque(maxlen=maxEvents)
+        #Events not yet taken by takeEvents
+        self.newEvents = []
+
+    def initialState(self):
+        '''
+        Returns the state of a channel before any samples are evaluated.
+        '''
+        #outside: whether the thresholds are breached, allowing for hysteresis.
+        #conditionStart: time the alarm condition began or None if it is not met.
+        #active: whether the alarm is raised. lastTime, lastValue: newest
+        #sample, used for the rate of change across blocks.
+        return {"outside":False,"conditionStart":None,"active":False,
+                "lastTime":None,"lastValue":None}
+
+    def setRule(self,channel,active,low=None,high=None,hysteresis=0.0,rateLimit=None,holdTime=0.0):
+        '''
+        Sets the alarm rule of a channel. If the rule has changed the channel's
+        state is reset, clearing any raised alarm.
+
+        Arguments
+        ---------
+        channel: Index of the channel.
+
+        active: False to turn the channel's alarm off.
+
+        low, high: The alarm condition is met at or below low or at or above
+        high. Either can be None.
+
+        hysteresis: Once breached the condition stays met until the value is
+        more than this far back inside the thresholds.
+
+        rateLimit: The condition is also met while the rate of change, in
+        units per second, is at or above this in size. None to not check.
+
+        holdTime: Time in seconds the condition must be met continuously before
+        the alarm is raised.
+        '''
+        rule = None
+        if active:
+            rule = {"low":-np.inf if low == None else float(low),
+                    "high":np.inf if high == None else float(high),
+                    "hysteresis":max(float(hysteresis),0.0),
+                    "rateLimit":None if rateLimit == None or rateLimit <= 0 else float(rateLimit),
+                    "holdTime":max(float(holdTime),0.0)}
+        with self.lock:
+            if rule == self.rules[channel]:
+                return
+            self.rules[channel] = rule
+            wasActive = self.states[channel]["active"]
+            self.states[channel] = self.initialState()
+        if wasActive:
+            self.addEvent(channel,time.time(),"cleared","rule changed",float("nan"))
+
+    def evaluate(self,channel,times,values):
+        '''
+        Checks a block of samples from a channel against its rule. Returns
+        whether the alarm was raised at any sample in the block. Must only be
+        called by one thread for each channel.
+        '''
+        with self.lock:
+            rule = self.rules[channel]
+        n = len(times)
+        if rule == None or n == 0:
+            return False
+        state = self.states[channel]
+        times = np.asarray(times,dtype=np.float64)
+        values = np.asarray(values,dtype=np.float64)
+        low,high,hysteresis = rule["low"],rule["high"],rule["hysteresis"]
+
+        #Threshold with hysteresis. Breaching a threshold sets the state and
+        #returning inside both by the hysteresis clears it, otherwise the state
+        #carries on from the previous sample. The previous sample with a set or
+        #clear is found by carrying indices forward with a running maximum.
+        breached = (values >= high) | (values <= low)
+        cleared = (values < high - hysteresis) & (values > low + hysteresis)
+        decided = np.where(breached | cleared,np.arange(n),-1)
+        np.maximum.accumulate(decided,out=decided)
+        outside = np.where(decided >= 0,breached[np.maximum(decided,0)],state["outside"])
+        condition = outside
+
+        #Rate of change from each sample to the one before, including the last
+        #sample of the previous block
+        if rule["rateLimit"] != None:
+            previousTimes = np.empty(n)
+            previousValues = np.empty(n)
+            previousTimes[1:] = times[:-1]
+            previousValues[1:] = values[:-1]
+            previousTimes[0] = times[0] if state["lastTime"] == None else state["lastTime"]
+            previousValues[0] = values[0] if state["lastValue"] == None else state["lastValue"]
+            step = times - previousTimes
+            rate = np.divide(np.abs(values - previousValues),step,out=np.zeros(n),where=step > 0)
+            condition = outside | (rate >= rule["rateLimit"])
+
+        if rule["holdTime"] == 0:
+            return self.update(channel,state,times,values,outside,condition,high,hysteresis)
+
+        #Time each run of the condition began, carried forward from the first
+        #sample of the run or from the previous block
+        starts = condition.copy()
+        starts[1:] &= ~condition[:-1]
+        if state["conditionStart"] == None or not condition[0]:
+            starts[0] = condition[0]
+        else:
+            starts[0] = False
+        runStart = np.where(starts,np.arange(n),-1)
+        np.maximum.accumulate(runStart,out=runStart)
+        carriedStart = state["conditionStart"] if state["conditionStart"] != None else times[0]
+        startTimes = np.where(runStart >= 0,times[np.maximum(runStart,0)],carriedStart)
+        active = condition & (times - startTimes >= rule["holdTime"])
+        state["conditionStart"] = float(startTimes[-1]) if condition[-1] else None
+        return self.update(channel,state,times,values,outside,active,high,hysteresis)
+
+    def update(self,channel,state,times,values,outside,active,high,hysteresis):
+        '''
+        Adds an event for each sample where a channel's alarm is raised or
+        cleared and keeps the state of the newest sample. Returns whether the
+        alarm was raised at any sample.
+        '''
+        n = len(times)
+        #Events where the alarm is raised or cleared
+        previous = np.empty(n,dtype=bool)
+        previous[0] = state["active"]
+        previous[1:] = active[:-1]
+        for i in np.flatnonzero(active != previous):
+            if active[i]:
+                if not outside[i]:
+                    reason = "rate"
+                elif values[i] >= high - hysteresis:
+                    reason = "high"
+                else:
+                    reason = "low"
+                self.addEvent(channel,times[i],"raised",reason,values[i])
+            else:
+                self.addEvent(channel,times[i],"cleared","",values[i])
+
+        state["outside"] = bool(outside[-1])
+        state["active"] = bool(active[-1])
+        state["lastTime"] = float(times[-1])
+        state["lastValue"] = float(values[-1])
+        return bool(active.any())
+
+    def isActive(self,channel):
+        '''
+        Returns whether a channel's alarm is currently raised.
+        '''
+        return self.states[channel]["active"]
+
+    def addEvent(self,channel,eventTime,kind,reason,value):
+        '''
+        Keeps an event and writes it to the log file if there is one.
+        '''
+        event = {"time":float(eventTime),"channel":self.channelNames[channel],
+                "event":kind,"reason":reason,"value":float(value)}
+        with self.lock:
+            self.events.append(event)
+            self.newEvents.append(event)
+            if self.logPath != None:
+                try:
+                    with open(self.logPath,"a") as logFile:
+                        logFile.write(formatEvent(event) + "\n")
+                except OSError:
+                    #Logging must never stop the alarms being checked
+                    pass
+
+    def takeEvents(self):
+        '''
+        Returns the events since the last call, oldest first.
+        '''
+        with self.lock:
+            events = self.newEvents
+            self.newEvents = []
+        return events
+
+def formatEvent(event):
+    '''
+    Returns an event as a line of text: its time, channel, whether the alarm
+    was raised or cleared, why and the sample value.
+    '''
+    timeStamp = datetime.datetime.fromtimestamp(event["time"]).strftime('%d/%m/%Y %H:%M:%S.%f')[:-3]
+    return "{} , {} , {} , {} , {}".format(timeStamp,event["channel"],event["event"],
+            event["reason"],event["value"])
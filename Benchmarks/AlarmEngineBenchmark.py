@@ -0,0 +1,69 @@
+# Micro-benchmark comparing AlarmEngine.evaluate with checking the same alarm
+# rule, limits with hysteresis, a rate of change limit and a hold time, one
+# sample at a time in a Python loop. Reports the time taken per 20ms acquisition
+# period for increasing data rates and checks both give the same events.
+# Requires no phidgets.
+
+def loopAlarm(blocks,low,high,hysteresis,rateLimit,holdTime):
+    '''
+    Checks every sample against the rule in a Python loop. Returns the times
+    the alarm was raised or cleared.
+    '''
+    outside = False
+    start = None
+    active = False
+    lastTime = None
+    lastValue = None
+    events = []
+    for x,y in blocks:
+        for t,v in zip(x,y):
+            if v >= high or v <= low:
+                outside = True
+            elif v < high - hysteresis and v > low + hysteresis:
+                outside = False
+            fast = lastTime != None and t > lastTime and abs(v - lastValue)/(t - lastTime) >= rateLimit
+            condition = outside or fast
+            if condition and start == None:
+                start = t
+            elif not condition:
+                start = None
+            now = condition and t - start >= holdTime
+            if now != active:
+                events.append(t)
+            active = now
+            lastTime, lastValue = t, v
+    return events
+
+def engineAlarm(blocks,low,high,hysteresis,rateLimit,holdTime):
+    '''
+    Checks every sample with AlarmEngine. Returns the times the alarm was
+    raised or cleared.
+    '''
+    engine = PDL.AlarmEngine(["Channel"])
+    engine.setRule(0,True,low,high,hysteresis,rateLimit,holdTime)
+    for x,y in blocks:
+        engine.evaluate(0,x,y)
+    return [event["time"] for event in engine.takeEvents()]
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import PhidgetDataLogger as PDL
+    import numpy as np
+    import timeit
+
+    rule = (-2.0,2.0,0.2,200.0,0.01)
+    updates = 500
+    print("{:>14} {:>18} {:>18} {:>10}".format("Rate (Hz)","Loop (ms/update)","Engine (ms/update)","Speed up"))
+    for rate in [125,1000,8000]:
+        blockSize = max(1,int(rate*0.02))
+        blocks = []
+        values = np.cumsum(np.random.normal(0,0.05,updates*blockSize))
+        for n in range(updates):
+            x = (n*blockSize + np.arange(blockSize))/float(rate)
+            blocks.append((x,values[n*blockSize:(n + 1)*blockSize]))
+        assert np.allclose(loopAlarm(blocks,*rule),engineAlarm(blocks,*rule))
+        loop = min(timeit.repeat(lambda: loopAlarm(blocks,*rule),number=1,repeat=3))*1000.0/updates
+        engine = min(timeit.repeat(lambda: engineAlarm(blocks,*rule),number=1,repeat=3))*1000.0/updates
+        print("{:>14} {:>18.4f} {:>18.4f} {:>10.1f}".format(rate,loop,engine,loop/engine))
@@ -0,0 +1,268 @@
+# End to end benchmark suite which runs headless, with any plots drawn offscreen.
+# Measures the sensor drain throughput, the recording rate of each file format,
+# the frame time of the live plots with a number of channels, the cost of
+# decimating the live plot data for long refresh periods, the load time of
+# recordings of increasing size and the peak memory of the run so far after each
+# stage. Results are saved as JSON so runs from different versions can be
+# compared, eg.
+#
+#     python BenchmarkSuite.py --output before.json
+#     python BenchmarkSuite.py --output after.json
+#     python BenchmarkSuite.py --compare before.json after.json
+#
+# The comparison exits with status 1 if any result is worse by more than the
+# threshold, so it can be used to catch regressions automatically. Stages which
+# need PyQt5 and pyqtgraph are recorded as skipped if they are not installed.
+# Requires no phidgets.
+
+def result(results,name,value,unit,higherIsBetter):
+    '''
+    Stores a result and prints it.
+    '''
+    results[name] = {"value":value,"unit":unit,"higherIsBetter":higherIsBetter}
+    print("{:<45} {:>14.4g} {}".format(name,value,unit),flush=True)
+
+def skip(results,name,reason):
+    '''
+    Stores a stage which could not be run and prints why.
+    '''
+    results[name] = {"skipped":reason}
+    print("{:<45} {:>14} {}".format(name,"skipped",reason),flush=True)
+
+def benchmarkDrain(results,scale,directory):
+    '''
+    Measures how many samples per second Sensor.getData drains in blocks of
+    the sizes seen at 8 ms and 1 ms data intervals. The best of several rounds
+    is kept to reduce noise.
+    '''
+    sensor = PDL.DummySensor(1,15,"Drain")
+    for blockSize in (6,45):
+        values = np.random.rand(blockSize)
+        calls = int(4000*scale)
+        rates = []
+        for round in range(5):
+            elapsed = 0.0
+            for i in range(calls):
+                sensor.dataQ.putBlock(values,values,values)
+                start = time.perf_counter()
+                PDL.Sensor.getData(sensor)
+                elapsed += time.perf_counter() - start
+            rates.append(calls*blockSize/elapsed)
+        result(results,"drain.block{}".format(blockSize),max(rates),"samples/s",True)
+
+def benchmarkRecording(results,scale,directory):
+    '''
+    Measures the rate each record writer writes 8 channels of 1000 sample
+    blocks to disk, including closing the file, and through the Recorder. The
+    best of 3 runs of the writer is kept.
+    '''
+    sensors = [PDL.DummySensor(1,15,"Channel {}".format(i)) for i in range(8)]
+    times = np.cumsum(np.random.rand(1000))
+    values = np.random.rand(1000)
+    blocks = int(250*scale)
+    for extension in PDL.recordWriters:
+        path = os.path.join(directory,"record" + extension)
+        durations = []
+        for run in range(3):
+            writer = PDL.openRecordWriter(path,sensors)
+            start = time.perf_counter()
+            for i in range(blocks):
+                for sensor in sensors:
+                    writer.write(sensor.sensorName,times,values)
+            writer.close()
+            durations.append(time.perf_counter() - start)
+        elapsed = min(durations)
+        name = "record" + extension.replace(".","_")
+        result(results,name + ".bytes",os.path.getsize(path)/elapsed,"bytes/s",True)
+        result(results,name + ".samples",blocks*len(sensors)*len(times)/elapsed,"samples/s",True)
+        recorder = PDL.Recorder(PDL.openRecordWriter(path,sensors),maxQueuedBlocks=len(sensors)*blocks)
+        recorder.start()
+        start = time.perf_counter()
+        for i in range(blocks):
+            for sensor in sensors:
+                recorder.submit(sensor.sensorName,times,values)
+        recorder.close()
+        elapsed = time.perf_counter() - start
+        result(results,name + ".recorder",recorder.writtenSamples/elapsed,"samples/s",True)
+
+def benchmarkPlotting(results,scale,directory):
+    '''
+    Measures the time PhidgetDisplayApp.updatePlots takes to draw a frame with
+    new data on every channel, including painting offscreen.
+    '''
+    try:
+        import pyqtgraph
+    except ImportError as error:
+        skip(results,"plot","needs pyqtgraph and PyQt5 ({})".format(error))
+        return
+    sensors = [PDL.DummySensor(1,15,"Channel {}".format(i)) for i in range(16)]
+    app = PDL.PhidgetDisplayApp(sensors)
+    app.replotTimer.stop()
+    app.engine.stop()
+    #A full plot buffer of 15 seconds at 8 ms
+    plotX = np.linspace(0,15,1875)
+    plotY = np.random.rand(1875)
+    frames = int(50*scale) + 5
+    for channels in (1,4,16):
+        durations = []
+        for frame in range(frames):
+            with app.engine.lock:
+                for i in range(channels):
+                    snapshot = app.engine.snapshots[i]
+                    snapshot["sequence"] += 1
+                    snapshot["plotX"] = plotX
+                    snapshot["plotY"] = plotY
+            start = time.perf_counter()
+            app.updatePlots()
+            for plot in app.plots[0:channels]:
+                plot.repaint()
+            app.app.processEvents()
+            durations.append(time.perf_counter() - start)
+        durations = np.array(durations[5:])*1000.0
+        result(results,"plot.channels{}.median".format(channels),np.median(durations),"ms",False)
+        result(results,"plot.channels{}.p95".format(channels),np.percentile(durations,95),"ms",False)
+    app.close()
+
+def benchmarkDecimation(results,scale,directory):
+    '''
+    Measures the time AcquisitionEngine.acquire takes to drain a 20 ms block
+    of 1 ms samples and decimate the sensor's plot data, and the number of
+    points in the plot snapshot, for refresh periods from 15 seconds to 10
+    minutes in both display modes. Both should stay flat as the refresh period
+    grows. Sweeping plots start half full and scrolling plots full, so every
+    block scrolls them.
+    '''
+    calls = int(200*scale) + 10
+    for mode in PDL.Sensor.displayModes:
+        for refreshPeriod in (15,60,600):
+            sensor = PDL.DummySensor(1,refreshPeriod,"Decimate")
+            sensor.plotBuffer = PDL.RingBuffer(2*refreshPeriod*1000,3)
+            #Only the blocks put below are added, with times in order
+            sensor.generateSample = lambda: None
+            engine = PDL.AcquisitionEngine([sensor])
+            engine.setPlotWidth(0,1000)
+            engine.setDisplayMode(0,mode)
+            x = np.arange(refreshPeriod*1000 + 20*calls)/1000.0
+            y = np.random.rand(len(x))
+            filled = refreshPeriod*1000 if mode == "scroll" else refreshPeriod*500
+            sensor.plotBuffer.extend(x[0:filled],y[0:filled],y[0:filled])
+            sensor.startTime = time.time()
+            engine.acquire(0)
+            durations = []
+            for i in range(calls):
+                block = slice(filled + 20*i,filled + 20*(i + 1))
+                sensor.dataQ.putBlock(y[block],x[block],x[block])
+                start = time.perf_counter()
+                engine.acquire(0)
+                durations.append(time.perf_counter() - start)
+            engine.stop()
+            name = "decimate.{}.refresh{}s".format(mode,refreshPeriod)
+            result(results,name + ".median",np.median(durations)*1000.0,"ms",False)
+            result(results,name + ".points",len(engine.snapshots[0]["plotX"]),"points",False)
+
+def benchmarkLoading(results,scale,directory):
+    '''
+    Measures the time taken to load recordings of increasing size with
+    openRecording, as the stored data plotter does, both the first time and
+    again once their cache has been saved.
+    '''
+    sensors = [PDL.DummySensor(1,15,"Channel {}".format(i)) for i in range(4)]
+    for samples in (int(1e5*scale),int(1e6*scale)):
+        for extension in PDL.recordWriters:
+            path = os.path.join(directory,"load{}{}".format(samples,extension))
+            writer = PDL.openRecordWriter(path,sensors)
+            perChannel = samples//len(sensors)
+            for sensor in sensors:
+                times = np.cumsum(np.random.rand(perChannel))
+                for i in range(0,perChannel,10000):
+                    writer.write(sensor.sensorName,times[i:i+10000],np.random.rand(len(times[i:i+10000])))
+            writer.close()
+            name = "load{}.{}".format(extension.replace(".","_"),samples)
+            megabytes = os.path.getsize(path)/1e6
+            durations = []
+            for run in ("cold","cached"):
+                start = time.perf_counter()
+                PDL.openRecording(path)
+                durations.append(time.perf_counter() - start)
+                result(results,"{}.{}".format(name,run),durations[-1]*1000.0,"ms",False)
+            result(results,name + ".rate",megabytes/durations[0],"MB/s",True)
+
+def compareResults(basePath,newPath,threshold):
+    '''
+    Prints the change in every result between two runs. Returns True if any
+    result is worse by more than threshold, a fraction.
+    '''
+    with open(basePath) as fileHandle:
+        base = json.load(fileHandle)
+    with open(newPath) as fileHandle:
+        new = json.load(fileHandle)
+    print("{:<45} {:>14} {:>14} {:>9}".format("Result",basePath[-14:],newPath[-14:],"Change"))
+    regressed = False
+    for name,newResult in new["results"].items():
+        baseResult = base["results"].get(name)
+        if baseResult == None or "value" not in baseResult or "value" not in newResult:
+            continue
+        change = newResult["value"]/baseResult["value"] - 1.0 if baseResult["value"] != 0 else 0.0
+        worse = -change if newResult["higherIsBetter"] else change
+        flag = ""
+        if worse > threshold:
+            flag = "REGRESSION"
+            regressed = True
+        elif -worse > threshold:
+            flag = "improved"
+        print("{:<45} {:>14.4g} {:>14.4g} {:>+8.1f}% {}".format(name,baseResult["value"],
+                newResult["value"],100.0*change,flag))
+    return regressed
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import os
+    #Draw plots without a display
+    os.environ.setdefault("QT_QPA_PLATFORM","offscreen")
+    import PhidgetDataLogger as PDL
+    import numpy as np
+    import subprocess
+    import argparse
+    import platform
+    import tempfile
+    import datetime
+    import json
+    import time
+
+    stages = {"drain":benchmarkDrain,"record":benchmarkRecording,
+            "plot":benchmarkPlotting,"decimate":benchmarkDecimation,"load":benchmarkLoading}
+    parser = argparse.ArgumentParser(description="Headless end to end benchmarks.")
+    parser.add_argument("--output",default="benchmarkResults.json",help="JSON file for the results.")
+    parser.add_argument("--stages",default=",".join(stages),help="Comma separated stages to run.")
+    parser.add_argument("--scale",type=float,default=1.0,help="Multiplies the size of every stage.")
+    parser.add_argument("--compare",nargs=2,metavar=("BASE","NEW"),help="Compare two result files.")
+    parser.add_argument("--threshold",type=float,default=0.1,
+            help="Fractional change counted as a regression when comparing.")
+    args = parser.parse_args()
+
+    if args.compare != None:
+        sys.exit(1 if compareResults(args.compare[0],args.compare[1],args.threshold) else 0)
+
+    try:
+        commit = subprocess.run(["git","describe","--always","--dirty"],stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,universal_newlines=True,
+                cwd=os.path.dirname(os.path.abspath(PDL.__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    info = {"timestamp":datetime.datetime.now().isoformat(),"commit":commit,
+            "python":platform.python_version(),"numpy":np.__version__,
+            "platform":platform.platform(),"processor":platform.processor(),
+            "scale":args.scale}
+    results = {}
+    directory = tempfile.mkdtemp()
+    for stage in args.stages.split(","):
+        stages[stage](results,args.scale,directory)
+        #The peak of the whole run so far, not of this stage alone
+        memory = PDL.peakMemory()
+        if memory != None:
+            result(results,"memory.peakSoFar_" + stage,memory,"MB",False)
+    with open(args.output,"w") as fileHandle:
+        json.dump({"info":info,"results":results},fileHandle,indent=2)
+    print("\nResults saved to {}".format(args.output))
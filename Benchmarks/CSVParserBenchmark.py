@@ -0,0 +1,86 @@
+# Benchmark of the text recording parser used by the StoredDataPlotter. Times
+# the block parser of CSVRecordReader against the old line by line parser and
+# the conversion of each file to the binary columnar format.
+# Row counts can be given as arguments, eg. "python CSVParserBenchmark.py 1000000".
+# The default of 1M, 10M and 100M rows needs around 5GB of free disk space.
+
+def legacyParser(filePath):
+    '''
+    Reproduces the old StoredDataPlotter.getDataFromFile parser.
+    '''
+    nameArray = []
+    timeArray = []
+    dataArray = []
+    dataFile = open(filePath)
+    for line in dataFile:
+        if not line.startswith("#"):
+            strippedLine = line.rstrip().split("\t,\t")
+            nameArray.append((strippedLine[0]))
+            timeArray.append(float(strippedLine[1]))
+            dataArray.append(float(strippedLine[2]))
+    sensorNames = list(set(nameArray))
+    xs = []
+    ys = []
+    for i in range(len(sensorNames)):
+        xs.append([])
+        ys.append([])
+        for j in range(len(timeArray)):
+            if sensorNames[i] == nameArray[j]:
+                xs[i].append(timeArray[j])
+                ys[i].append(dataArray[j])
+    return sensorNames,xs,ys
+
+def makeRecording(filePath,nRows,channels=16,blockSize=6):
+    '''
+    Writes a text recording of nRows rows with channels interleaved in blocks as
+    the application writes them.
+    '''
+    writer = PDL.CSVRecordWriter(filePath)
+    blockRows = 100000
+    times = np.arange(blockRows//channels)*0.008
+    for n in range(0,nRows,blockRows):
+        rows = min(blockRows,nRows-n)//channels
+        for i in range(channels):
+            writer.write("Sensor {}".format(i),times[0:rows]+n,np.random.rand(rows))
+    writer.close()
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import PhidgetDataLogger as PDL
+    import numpy as np
+    import tempfile
+    import time
+    import os
+
+    sizes = [int(float(arg)) for arg in sys.argv[1:]] or [1000000,10000000,100000000]
+    #The old parser is too slow to be worth running on larger files
+    legacyLimit = 1000000
+    print("{:>12} {:>10} {:>12} {:>12} {:>12} {:>12}".format("Rows","Size (MB)",
+            "Legacy (s)","Block (s)","Convert (s)","Open .pdl (s)"))
+    with tempfile.TemporaryDirectory() as directory:
+        for nRows in sizes:
+            filePath = os.path.join(directory,"recording.csv")
+            makeRecording(filePath,nRows)
+            legacy = float("nan")
+            if nRows <= legacyLimit:
+                start = time.perf_counter()
+                legacyParser(filePath)
+                legacy = time.perf_counter() - start
+            start = time.perf_counter()
+            PDL.CSVRecordReader(filePath)
+            block = time.perf_counter() - start
+            start = time.perf_counter()
+            outputPath = PDL.convertToColumnar(filePath)
+            convert = time.perf_counter() - start
+            start = time.perf_counter()
+            reader = PDL.ColumnarRecordReader(outputPath)
+            for i in range(len(reader.channels)):
+                reader.read(i)
+            binary = time.perf_counter() - start
+            reader.close()
+            print("{:>12} {:>10.0f} {:>12.2f} {:>12.2f} {:>12.2f} {:>12.3f}".format(nRows,
+                    os.path.getsize(filePath)/1e6,legacy,block,convert,binary))
+            os.remove(filePath)
+            os.remove(outputPath)
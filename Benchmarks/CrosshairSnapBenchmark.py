@@ -0,0 +1,70 @@
+# Benchmark of cross hair snapping in the StoredDataPlotter. Times finding the
+# nearest point to a mouse position with the old full argmin search against the
+# search of ChunkedChannel, which reads only the chunk the mouse is over, for
+# one channel and across every channel, as the length of the recording grows.
+# The recording is written to a temporary .pdl file and opened as the plotter
+# does, so the first events also include reading chunks.
+# Sample counts can be given as arguments, eg. "python CrosshairSnapBenchmark.py 1e6 1e8".
+
+def argminSnap(xData,mouseX):
+    '''
+    Reproduces the old mouseMoved snap.
+    '''
+    return np.abs(xData-mouseX).argmin()
+
+def timeEvents(function,events):
+    '''
+    Returns the mean time in microseconds of calling function for each mouse
+    position in events.
+    '''
+    start = time.perf_counter()
+    for mouseX,mouseY in events:
+        function(mouseX,mouseY)
+    return (time.perf_counter() - start)/len(events)*1e6
+
+def openChannels(filePath,x,channels):
+    '''
+    Writes a recording of random values at times x and returns a
+    ChunkedChannel for each of its channels.
+    '''
+    writer = PDL.ColumnarRecordWriter(filePath)
+    blockSize = 1<<20
+    for i in range(channels):
+        for start in range(0,len(x),blockSize):
+            writer.write("Channel {}".format(i),x[start:start+blockSize],
+                    np.random.rand(len(x[start:start+blockSize])))
+    writer.close()
+    reader = PDL.ColumnarRecordReader(filePath)
+    return reader, [PDL.ChunkedChannel(reader,i) for i in range(channels)]
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import PhidgetDataLogger as PDL
+    import numpy as np
+    import tempfile
+    import time
+    import os
+
+    sizes = [int(float(arg)) for arg in sys.argv[1:]] or [10000,100000,1000000,10000000]
+    channels = 8
+    nEvents = 1000
+    #The old search is too slow to repeat for every event on large recordings
+    argminEvents = 20
+    print("{:>12} {:>14} {:>14} {:>14}".format("Samples","Argmin (us)",
+            "Search (us)","All chans (us)"))
+    directory = tempfile.mkdtemp()
+    for n in sizes:
+        x = np.arange(n)*0.008
+        filePath = os.path.join(directory,"snap.pdl")
+        reader,chunked = openChannels(filePath,x,channels)
+        events = np.random.rand(nEvents,2)*[x[-1],1.0]
+        argmin = timeEvents(lambda mouseX,mouseY: argminSnap(x,mouseX),events[0:argminEvents])
+        search = timeEvents(lambda mouseX,mouseY: chunked[0].nearestSample(mouseX),events)
+        allChannels = timeEvents(lambda mouseX,mouseY: PDL.nearestPoint(chunked,
+                mouseX,mouseY,x[-1]/1000,1/500),events)
+        print("{:>12} {:>14.1f} {:>14.1f} {:>14.1f}".format(n,argmin,search,allChannels))
+        reader.close()
+        os.remove(filePath)
+    os.rmdir(directory)
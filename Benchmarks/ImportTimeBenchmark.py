@@ -0,0 +1,65 @@
+# Benchmark of the time taken to import the package in a fresh interpreter.
+# Reports the cumulative import time of each of the package's modules and its
+# main dependencies using "python -X importtime", then the total start up time
+# of importing the package alone and of also loading the user interface classes.
+# The number of repeats can be given as an argument, eg. "python ImportTimeBenchmark.py 20".
+
+def importTimes(statement,packagePath):
+    '''
+    Runs statement in a new interpreter with -X importtime and returns a
+    dictionary of the cumulative import time in ms of every module imported.
+    '''
+    code = "import sys; sys.path.insert(0,{!r}); {}".format(packagePath,statement)
+    result = subprocess.run([sys.executable,"-X","importtime","-c",code],
+            stderr=subprocess.PIPE,universal_newlines=True,check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            fields = line[len("import time:"):].split("|")
+            try:
+                times[fields[2].strip()] = int(fields[1])/1000.0
+            except ValueError:
+                #Column heading line
+                pass
+    return times
+
+def startUpTime(statement,packagePath,repeats):
+    '''
+    Returns the median wall clock time in ms of starting a new interpreter and
+    running statement.
+    '''
+    code = "import sys; sys.path.insert(0,{!r}); {}".format(packagePath,statement)
+    durations = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable,"-c",code],check=True)
+        durations.append((time.perf_counter() - start)*1000.0)
+    return sorted(durations)[len(durations)//2]
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import subprocess
+    import time
+    import os
+
+    packagePath = os.path.abspath('../../')
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    baseline = "import PhidgetDataLogger"
+    withUI = "import PhidgetDataLogger; PhidgetDataLogger.PhidgetDisplayApp"
+
+    times = importTimes(withUI,packagePath)
+    dependencies = ["numpy","Phidget22","PyQt5","pyqtgraph","PyQt5.QtMultimedia"]
+    print("{:<45} {:>12}".format("Module","Cumulative (ms)"))
+    for module in dependencies + sorted(name for name in times if name.startswith("PhidgetDataLogger")):
+        if module in times:
+            print("{:<45} {:>12.1f}".format(module,times[module]))
+
+    loaded = importTimes(baseline,packagePath)
+    heavy = [module for module in ("PyQt5","pyqtgraph") if module in loaded]
+    print("\nQt modules loaded by '{}': {}".format(baseline,", ".join(heavy) or "none"))
+    print("{:<45} {:>12}".format("Start up","Median (ms)"))
+    print("{:<45} {:>12.1f}".format("python -c pass",startUpTime("pass",packagePath,repeats)))
+    print("{:<45} {:>12.1f}".format(baseline,startUpTime(baseline,packagePath,repeats)))
+    print("{:<45} {:>12.1f}".format("... and PhidgetDisplayApp",startUpTime(withUI,packagePath,repeats)))
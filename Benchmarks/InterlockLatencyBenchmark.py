@@ -0,0 +1,78 @@
+# Measures the latency from a sample crossing a threshold to a digital output
+# being set, through an Interlock checking samples on the sensor's callback
+# thread and through the alarm path of the acquisition engine, where the custom
+# alarm function sets the output. A SyntheticSensor sine wave crosses the
+# threshold once per cycle and a DummyDigitalOutputChannel stands in for the
+# relay. The raw time of each synthetic sample is when it was due, so latencies
+# are measured from then to the output being set. Requires no phidgets, eg.
+#
+#     python InterlockLatencyBenchmark.py --interval 1 --duration 10
+
+def interlockLatencies(args):
+    '''
+    Returns the latency in seconds from the sample tripping the interlock to
+    the output being set, for every trip.
+    '''
+    metrics = PDL.PerformanceMetrics()
+    sensor = PDL.SyntheticSensor(args.interval,15,"Interlock",frequency=args.frequency)
+    output = PDL.DummyDigitalOutputChannel()
+    interlock = PDL.Interlock(sensor,output,high=args.threshold,latched=False,metrics=metrics)
+    #Drain the sensor as the application would so it competes for the interpreter
+    engine = PDL.AcquisitionEngine([sensor],plotting=False)
+    engine.start()
+    time.sleep(args.duration)
+    engine.stop()
+    sensor.stop()
+    interlock.close()
+    return metrics.timings["interlock.Interlock"].view(0).copy()
+
+def alarmLatencies(args):
+    '''
+    Returns the latency in seconds from the sample raising each alarm to the
+    custom alarm function setting the output.
+    '''
+    sensor = PDL.SyntheticSensor(args.interval,15,"Alarm",frequency=args.frequency)
+    output = PDL.DummyDigitalOutputChannel()
+    engine = PDL.AcquisitionEngine([sensor],plotting=False)
+    engine.alarmDispatcher.setLimits(sensor.sensorName,debounce=0.0,minInterval=0.0)
+    latencies = []
+    measured = set()
+    def setOutput(args):
+        output.setState(True)
+        #The newest alarm event holds the time of the sample which raised it
+        events = [event for event in list(engine.alarms.events) if event["event"] == "raised"]
+        if len(events) > 0 and events[-1]["time"] not in measured:
+            measured.add(events[-1]["time"])
+            latencies.append(time.time() - events[-1]["time"])
+    engine.setAlarmFunction(setOutput)
+    engine.setAlarm(0,True,None,args.threshold)
+    engine.start()
+    time.sleep(args.duration)
+    engine.stop()
+    sensor.stop()
+    return np.array(latencies)
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import PhidgetDataLogger as PDL
+    import numpy as np
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Sample to output latency of interlocks and alarms.")
+    parser.add_argument("--interval",type=float,default=8.0,help="Time in ms between samples.")
+    parser.add_argument("--frequency",type=float,default=5.0,help="Threshold crossings per second.")
+    parser.add_argument("--threshold",type=float,default=0.9,help="Value the output is set at.")
+    parser.add_argument("--duration",type=float,default=10.0,help="Time in seconds to run each path.")
+    args = parser.parse_args()
+
+    print("{:<12} {:>8} {:>10} {:>10} {:>10}".format("Path","Trips","p50 (ms)","p99 (ms)","max (ms)"))
+    for name,measure in (("Interlock",interlockLatencies),("Alarm",alarmLatencies)):
+        latencies = measure(args)*1000.0
+        if len(latencies) == 0:
+            print("{:<12} {:>8}".format(name,0))
+            continue
+        print("{:<12} {:>8} {:>10.3f} {:>10.3f} {:>10.3f}".format(name,len(latencies),
+                np.percentile(latencies,50),np.percentile(latencies,99),latencies.max()))
@@ -0,0 +1,124 @@
+# Load generator for measuring the whole application with no phidgets attached.
+# Runs a number of SyntheticSensor channels at a set data interval through the
+# acquisition engine and recorder, or through the full user interface with --gui,
+# and reports the samples per second produced and acquired, the latency from each
+# sample being due to it being drained, the CPU used and the peak memory, eg.
+#
+#     python LoadGeneratorBenchmark.py --channels 30 --interval 8 --duration 30
+#     python LoadGeneratorBenchmark.py --channels 64 --interval 1 --processes 4 --burst 8
+#
+# With --processes the sensors run in worker processes whose memory is not included.
+
+def timeDrains(sensor,latencies):
+    '''
+    Wraps a sensor's getData to collect the latency of every sample drained
+    from it, measured from its raw time.
+    '''
+    getData = sensor.getData
+    def timedGetData():
+        x, y, plotX, plotY = getData()
+        if len(x) > 0:
+            latencies.append(time.time() - np.asarray(x))
+        return x, y, plotX, plotY
+    sensor.getData = timedGetData
+
+def runHeadless(sensors,duration,outputPath):
+    '''
+    Records the sensors for duration seconds and returns the samples acquired,
+    written and dropped by the recorder.
+    '''
+    recorder = PDL.Recorder(PDL.openRecordWriter(outputPath,sensors))
+    engine = PDL.AcquisitionEngine(sensors,plotting=False)
+    recorder.start()
+    engine.setRecorder(recorder)
+    engine.setRecordedChannels([True]*len(sensors))
+    engine.start()
+    time.sleep(duration)
+    engine.stop()
+    recorder.close()
+    return sum(engine.acquiredSamples), recorder.writtenSamples, recorder.droppedSamples
+
+def runGUI(sensors,duration):
+    '''
+    Runs the full application for duration seconds and returns the samples
+    acquired.
+    '''
+    from pyqtgraph.Qt import QtCore
+    app = PDL.PhidgetDisplayApp(sensors)
+    QtCore.QTimer.singleShot(int(duration*1000),app.app.quit)
+    app.run()
+    return sum(app.engine.acquiredSamples), None, None
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import PhidgetDataLogger as PDL
+    import numpy as np
+    import argparse
+    import tempfile
+    import time
+    import os
+
+    parser = argparse.ArgumentParser(description="Load the application with synthetic sensors.")
+    parser.add_argument("--channels",type=int,default=30)
+    parser.add_argument("--interval",type=float,default=8.0,help="Data interval in ms.")
+    parser.add_argument("--duration",type=float,default=10.0,help="Run time in seconds.")
+    parser.add_argument("--burst",type=int,default=1,help="Samples delivered together.")
+    parser.add_argument("--jitter",type=float,default=0.0,help="Delivery jitter in ms.")
+    parser.add_argument("--dropout",type=float,default=0.0,help="Fraction of samples lost.")
+    parser.add_argument("--detach",type=float,default=None,help="Mean seconds between detaches.")
+    parser.add_argument("--processes",type=int,default=0,help="Worker processes, 0 for none.")
+    parser.add_argument("--format",default=".pdl",choices=[".pdl",".csv"])
+    parser.add_argument("--gui",action="store_true",help="Run the full user interface.")
+    args = parser.parse_args()
+
+    configs = [{"type":"SyntheticSensor","dataInterval":args.interval,"refreshPeriod":10,
+            "sensorName":"Channel {}".format(i),"frequency":0.5 + 0.1*i,"noise":0.01,
+            "jitter":args.jitter,"burstSize":args.burst,"dropoutRate":args.dropout,
+            "detachInterval":args.detach,"seed":i} for i in range(args.channels)]
+    acquisition = None
+    if args.processes > 0:
+        acquisition = PDL.ProcessAcquisition(configs,args.processes)
+        sensors = acquisition.sensors
+    else:
+        sensors = [PDL.createSensor(config) for config in configs]
+    latencies = []
+    for sensor in sensors:
+        timeDrains(sensor,latencies)
+
+    outputPath = os.path.join(tempfile.mkdtemp(),"load" + args.format)
+    startCPU = time.process_time()
+    start = time.monotonic()
+    try:
+        if args.gui:
+            acquired,written,dropped = runGUI(sensors,args.duration)
+        else:
+            acquired,written,dropped = runHeadless(sensors,args.duration,outputPath)
+    finally:
+        elapsed = time.monotonic() - start
+        cpu = time.process_time() - startCPU
+        if acquisition != None:
+            ringDropped = sum(acquisition.droppedSamples())
+            acquisition.stop()
+        else:
+            for sensor in sensors:
+                sensor.stop()
+    expected = args.channels*elapsed*1000.0/args.interval*(1 - args.dropout)
+    latencies = np.concatenate(latencies)*1000.0 if len(latencies) > 0 else np.zeros(1)
+    print("{} channels at {} ms for {:.1f} s{}".format(args.channels,args.interval,elapsed,
+            " with the user interface" if args.gui else ""))
+    print("{:<28} {:>12.0f}".format("Expected samples/s",expected/elapsed))
+    print("{:<28} {:>12.0f}".format("Acquired samples/s",acquired/elapsed))
+    if written != None:
+        print("{:<28} {:>12.0f}".format("Written samples/s",written/elapsed))
+        print("{:<28} {:>12}".format("Recorder dropped samples",dropped))
+    if acquisition != None:
+        print("{:<28} {:>12}".format("Ring dropped samples",ringDropped))
+    print("{:<28} {:>12.2f}".format("Latency p50 (ms)",np.percentile(latencies,50)))
+    print("{:<28} {:>12.2f}".format("Latency p99 (ms)",np.percentile(latencies,99)))
+    print("{:<28} {:>12.2f}".format("Latency max (ms)",latencies.max()))
+    print("{:<28} {:>12.0f}".format("CPU (% of one core)",100.0*cpu/elapsed))
+    memory = PDL.peakMemory()
+    if memory != None:
+        print("{:<28} {:>12.1f}".format("Peak memory (MB)",memory))
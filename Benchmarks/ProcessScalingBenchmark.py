@@ -0,0 +1,63 @@
+# Benchmark of how the sample rate of a ProcessAcquisition scales with the number
+# of worker processes. Each worker polls its share of 32 DummySensor channels as
+# fast as it can, which like real phidget callbacks costs Python time for every
+# sample, and the main process drains every ring. Reports the total samples per
+# second received against a single process polling the same sensors itself.
+# Requires no phidgets. The duration in seconds of each run can be given as an
+# argument, eg. "python ProcessScalingBenchmark.py 10".
+
+def inProcessRate(configs,duration):
+    '''
+    Returns the samples per second of polling every sensor in this process.
+    '''
+    sensors = [PDL.createSensor(config) for config in configs]
+    received = 0
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        for sensor in sensors:
+            sensor.generateSample()
+            received += len(sensor.dataQ.drain())
+    return received/(time.monotonic() - start)
+
+def processRate(configs,processes,duration):
+    '''
+    Returns the samples per second received from a ProcessAcquisition and the
+    number of samples its rings dropped.
+    '''
+    acquisition = PDL.ProcessAcquisition(configs,processes,period=0.0)
+    try:
+        sensors = acquisition.sensors
+        #Let the workers get going before timing
+        time.sleep(0.5)
+        for sensor in sensors:
+            sensor.dataQ.drain()
+        received = 0
+        start = time.monotonic()
+        while time.monotonic() - start < duration:
+            for sensor in sensors:
+                received += len(sensor.dataQ.drain())
+            time.sleep(0.001)
+        return received/(time.monotonic() - start), sum(acquisition.droppedSamples())
+    finally:
+        acquisition.stop()
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import PhidgetDataLogger as PDL
+    import multiprocessing
+    import time
+
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    configs = [{"type":"DummySensor","omega":1.0,"refreshPeriod":10,
+            "sensorName":"Channel {}".format(i)} for i in range(32)]
+    baseline = inProcessRate(configs,duration)
+    print("CPUs: {}".format(multiprocessing.cpu_count()))
+    print("{:>10} {:>16} {:>10} {:>10}".format("Processes","Samples/s","Scaling","Dropped"))
+    print("{:>10} {:>16.0f} {:>10.2f} {:>10}".format("in process",baseline,1.0,0))
+    processes = 1
+    while processes <= min(multiprocessing.cpu_count(),len(configs)):
+        rate,dropped = processRate(configs,processes,duration)
+        print("{:>10} {:>16.0f} {:>10.2f} {:>10}".format(processes,rate,rate/baseline,dropped))
+        processes *= 2
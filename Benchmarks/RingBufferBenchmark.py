@@ -0,0 +1,51 @@
+# Micro-benchmark comparing the RingBuffer used by Sensor.getData with the old
+# np.append growth path. Requires no phidgets.
+
+def appendGrowth(nSamples,blockSize,initialSize):
+    '''
+    Reproduces the old Sensor.getData behaviour of writing samples one at a time
+    and growing the arrays with np.append once they are full.
+    '''
+    data = np.asarray([0.0]*initialSize)
+    times = np.asarray([0.0]*initialSize)
+    arrayIndex = 0
+    block = np.random.rand(blockSize)
+    for n in range(0,nSamples,blockSize):
+        for i in range(blockSize):
+            data[arrayIndex] = block[i]
+            times[arrayIndex] = block[i]
+            arrayIndex = arrayIndex + 1
+            if arrayIndex >= len(data):
+                data = np.append(data,0)
+                times = np.append(times,0)
+        plotX, plotY = times[0:arrayIndex], data[0:arrayIndex]
+
+def ringBuffer(nSamples,blockSize,capacity):
+    '''
+    Writes the same samples as appendGrowth to a RingBuffer in blocks.
+    '''
+    buffer = PDL.RingBuffer(capacity,2)
+    block = np.random.rand(blockSize)
+    for n in range(0,nSamples,blockSize):
+        buffer.extend(block,block)
+        plotX, plotY = buffer.view(0), buffer.view(1)
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import PhidgetDataLogger as PDL
+    import numpy as np
+    import timeit
+
+    #8ms data interval with samples collected every 45ms update
+    blockSize = 6
+    channels = 16
+    print("{:>12} {:>16} {:>16} {:>10}".format("Samples","np.append (s)","RingBuffer (s)","Speed up"))
+    for nSamples in [1000,5000,20000]:
+        #Old arrays started sized for a 15 second refresh at 8ms intervals
+        growth = min(timeit.repeat(lambda: appendGrowth(nSamples,blockSize,1875),
+                    number=1,repeat=3))*channels
+        ring = min(timeit.repeat(lambda: ringBuffer(nSamples,blockSize,nSamples),
+                    number=1,repeat=3))*channels
+        print("{:>12} {:>16.4f} {:>16.4f} {:>10.1f}".format(nSamples,growth,ring,growth/ring))
@@ -0,0 +1,49 @@
+# Throughput benchmark for the sensor sample queue. Compares the old per item
+# queue.Queue drain in Sensor.getData with the block drain of SampleQueue.
+# Requires no phidgets.
+
+def queueDrain(q):
+    '''
+    Reproduces the old Sensor.getData loop over queue.Queue.
+    '''
+    newData = []
+    newTimes = []
+    newRawTimes = []
+    while not q.empty():
+        datum = q.get()
+        newData.append(datum[0])
+        newTimes.append(datum[1])
+        newRawTimes.append(datum[2])
+    return np.asarray(newRawTimes), np.asarray(newData), np.asarray(newTimes)
+
+def samplesPerSecond(queueType,drain,burstSize,repeats=20):
+    '''
+    Times putting a burst of samples into a queue as a callback would and then
+    draining it. Returns the number of samples handled per second.
+    '''
+    total = 0.0
+    for i in range(repeats):
+        q = queueType()
+        start = time.perf_counter()
+        for j in range(burstSize):
+            rawTime = time.time()
+            q.put([1.0,rawTime-start,rawTime])
+        drain(q)
+        total += time.perf_counter() - start
+    return burstSize*repeats/total
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import PhidgetDataLogger as PDL
+    import numpy as np
+    import queue
+    import time
+
+    print("Samples per second per channel")
+    print("{:>10} {:>16} {:>16}".format("Burst","queue.Queue","SampleQueue"))
+    for burstSize in [6,100,1000,10000]:
+        old = samplesPerSecond(queue.Queue,queueDrain,burstSize)
+        new = samplesPerSecond(PDL.SampleQueue,lambda q: q.drain(),burstSize)
+        print("{:>10} {:>16.0f} {:>16.0f}".format(burstSize,old,new))
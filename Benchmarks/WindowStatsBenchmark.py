@@ -0,0 +1,57 @@
+# Micro-benchmark comparing the RunningWindowStats used by StrainCalibrator.onUpdate
+# with the old path of trimming Python lists with pop(0) and averaging the
+# highlighted reigon through a fresh boolean mask on every update. Reports the
+# time taken per 45ms update for increasing data rates. Requires no phidgets.
+
+def listWindow(blocks,window,minX,maxX):
+    '''
+    Reproduces the old StrainCalibrator.onUpdate averaging.
+    '''
+    ownXData = []
+    ownYData = []
+    for x,y in blocks:
+        for i in range(len(x)):
+            if len(ownXData) > 0:
+                if (x[i] - ownXData[0]) >= window:
+                    ownXData.pop(0)
+                    ownYData.pop(0)
+            ownXData.append(x[i])
+            ownYData.append(y[i])
+        actualPlotXData = np.asarray(ownXData)-ownXData[0]
+        actualPlotYData = np.asarray(ownYData)
+        if actualPlotXData[-1] >= minX:
+            mean = np.mean(actualPlotYData[np.where((actualPlotXData>minX) & (actualPlotXData < maxX))])
+
+def runningWindow(blocks,window,minX,maxX,capacity):
+    '''
+    Averages the same reigon with RunningWindowStats.
+    '''
+    stats = PDL.RunningWindowStats(capacity,maxX - minX,window - maxX)
+    for x,y in blocks:
+        stats.extend(x,y)
+        mean, drift = stats.mean(), stats.drift()
+
+if __name__ == "__main__":
+    #Only need the following 2 lines in examples you wont need these elsewhere
+    import sys
+    sys.path.insert(0, '../../')
+    import PhidgetDataLogger as PDL
+    import numpy as np
+    import timeit
+
+    #20 second refresh period with the reigon from 5 to 10 seconds
+    window, minX, maxX = 20.0, 5.0, 10.0
+    updates = 1000
+    print("{:>14} {:>18} {:>18} {:>10}".format("Rate (Hz)","Lists (ms/update)","Running (ms/update)","Speed up"))
+    for rate in [125,1000,8000]:
+        blockSize = int(rate*0.045)
+        blocks = []
+        for n in range(updates):
+            x = (n*blockSize + np.arange(blockSize))/float(rate)
+            blocks.append((x,np.random.rand(blockSize)))
+        capacity = 2*int(window*rate)
+        lists = min(timeit.repeat(lambda: listWindow(blocks,window,minX,maxX),
+                    number=1,repeat=3))*1000.0/updates
+        running = min(timeit.repeat(lambda: runningWindow(blocks,window,minX,maxX,capacity),
+                    number=1,repeat=3))*1000.0/updates
+        print("{:>14} {:>18.4f} {:>18.4f} {:>10.1f}".format(rate,lists,running,lists/running))
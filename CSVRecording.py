@@ -0,0 +1,246 @@
+from PhidgetDataLogger.ColumnarRecording import ColumnarRecordWriter, ColumnarRecordReader
+import numpy as np
+import os
+
+class CSVRecordWriter():
+    '''
+    Writes sensor recordings in the plain text format used by the application.
+    Each row holds a channel name, a time stamp and a sensor value separated by
+    "\\t,\\t". Blocks of samples are formatted together and written through a
+    large output buffer.
+    '''
+
+    headerString = ("# Channel name (units)"
+            " \t,\t Time (S) \t,\t Sensor value ()\n")
+
+    def __init__(self,filePath,sensors=None,bufferSize=1<<20):
+        '''
+        Constructor for the CSV writer. Opens the file and writes the header.
+
+        Arguments
+        ---------
+        filePath: Path of the file to create.
+
+        sensors: List of sensors being recorded. Not needed for the CSV format
+        which stores no channel information in its header.
+
+        bufferSize: Size in bytes of the output buffer.
+        '''
+        self.filePath = filePath
+        self.file = open(filePath,"wb",buffering=bufferSize)
+        self.file.write(self.headerString.encode())
+
+    def write(self,sensorName,times,values):
+        '''
+        Formats a block of samples from one channel and writes them to the file.
+        Returns the number of bytes written.
+        '''
+        n = len(times)
+        if n == 0:
+            return 0
+        interleaved = np.empty(2*n)
+        interleaved[0::2] = times
+        interleaved[1::2] = values
+        #Format every row with a single string operation. %r of a python float
+        #gives the same text as the "{}" formatting used previously.
+        rowFormat = sensorName.replace("%","%%") + "\t,\t%r\t,\t%r\t\n"
+        data = ((rowFormat*n) % tuple(interleaved.tolist())).encode()
+        self.file.write(data)
+        return len(data)
+
+    def flush(self,partial=False):
+        '''
+        Pushes buffered data to the operating system. Returns the number of
+        bytes written, which is always 0 as rows are written by write. partial
+        is ignored as no data is held back.
+        '''
+        self.file.flush()
+        return 0
+
+    def fileno(self):
+        '''
+        Returns the file descriptor of the output file. Used for fsync.
+        '''
+        return self.file.fileno()
+
+    def close(self):
+        '''
+        Flushes and closes the output file.
+        '''
+        self.file.close()
+
+class CSVRecordReader():
+    '''
+    Reads recordings in the plain text format. The file is read in large
+    blocks and the columns of each block are split and converted to numbers in
+    bulk with numpy rather than line by line. The parsed channels are split
+    into chunks with the same index and readChunk method as a
+    ColumnarRecordReader.
+    '''
+
+    separator = b"\t,\t"
+    #Number of samples in each chunk of the chunk index
+    chunkSize = 8192
+
+    def __init__(self,filePath,blockSize=1<<26):
+        '''
+        Constructor for the CSV reader. Reads and parses the whole file.
+
+        Arguments
+        ---------
+        filePath: Path of the recording to read.
+
+        blockSize: Number of bytes read and parsed at a time.
+        '''
+        self.filePath = filePath
+        #Channel names and the codes used for them while parsing
+        self.channels = {}
+        codes = []
+        times = []
+        values = []
+        remainder = b""
+        with open(filePath,"rb") as fileHandle:
+            while True:
+                block = fileHandle.read(blockSize)
+                data = remainder + block
+                if len(block) > 0:
+                    #Only parse whole lines, keeping the rest for the next block
+                    end = data.rfind(b"\n") + 1
+                    remainder = data[end:]
+                    data = data[0:end]
+                parsed = self.parseBlock(data)
+                if parsed != None:
+                    codes.append(parsed[0])
+                    times.append(parsed[1])
+                    values.append(parsed[2])
+                if len(block) == 0:
+                    break
+        self.groupChannels(codes,times,values)
+
+    def parseBlock(self,data):
+        '''
+        Parses a block of whole lines. Returns arrays of the channel codes, times
+        and values of every row, or None if the block has no rows.
+        '''
+        data = self.removeCommentLines(data)
+        #Remove blank lines
+        while b"\n\n" in data or b"\n\r\n" in data:
+            data = data.replace(b"\n\n",b"\n").replace(b"\n\r\n",b"\n")
+        data = data.strip(b"\n")
+        if len(data) == 0:
+            return None
+        #Turning every separator into a line break gives a flat list of fields
+        #with three to a row
+        fields = data.replace(self.separator,b"\n").split(b"\n")
+        if len(fields) % 3 != 0:
+            raise ValueError("Badly formatted row in {}".format(self.filePath))
+        names = fields[0::3]
+        #Convert the names to codes for the whole file
+        for name in dict.fromkeys(names):
+            if name not in self.channels:
+                self.channels[name] = len(self.channels)
+        codes = np.fromiter(map(self.channels.__getitem__,names),np.int32,len(names))
+        return (codes,np.array(fields[1::3]).astype(np.float64),
+                np.array(fields[2::3]).astype(np.float64))
+
+    def removeCommentLines(self,data):
+        '''
+        Removes lines starting with "#" from a block. These are only expected in
+        the header so each is found with a search rather than by checking
+        every line.
+        '''
+        start = 0 if data.startswith(b"#") else data.find(b"\n#") + 1
+        while start > 0 or data.startswith(b"#"):
+            end = data.find(b"\n",start)
+            data = data[0:start] + (data[end+1:] if end >= 0 else b"")
+            start = 0 if data.startswith(b"#") else data.find(b"\n#") + 1
+        return data
+
+    def groupChannels(self,codes,times,values):
+        '''
+        Splits the parsed rows into one array per channel with a single stable
+        sort on the channel codes, keeping each channel's samples in file order.
+        '''
+        if len(codes) == 0:
+            self.times = []
+            self.values = []
+            self.index = []
+            return
+        codes = np.concatenate(codes)
+        order = np.argsort(codes,kind="stable")
+        counts = np.bincount(codes,minlength=len(self.channels))
+        splits = np.cumsum(counts)[0:-1]
+        #Every channel is a view of the same sorted arrays
+        self.allTimes = np.concatenate(times)[order]
+        self.allValues = np.concatenate(values)[order]
+        self.times = np.split(self.allTimes,splits)
+        self.values = np.split(self.allValues,splits)
+        self.index = [self.buildIndex(start,count) for start,count in zip(np.r_[0,splits],counts)]
+
+    def buildIndex(self,start,count):
+        '''
+        Returns a chunk index, laid out as the index of a ColumnarRecordReader,
+        splitting the count samples of a channel from position start of the
+        sorted arrays into chunks of chunkSize samples. Their offsets are
+        positions in the sorted arrays rather than in the file.
+        '''
+        offsets = np.arange(start,start + count,self.chunkSize,dtype=np.int64)
+        index = np.zeros(len(offsets),dtype=ColumnarRecordReader.indexDtype)
+        index["offset"] = offsets
+        index["nSamples"] = np.minimum(start + count - offsets,self.chunkSize)
+        index["firstTime"] = self.allTimes[offsets]
+        index["lastTime"] = self.allTimes[offsets + index["nSamples"] - 1]
+        return index
+
+    def channelNames(self):
+        '''
+        Returns the names of every channel in the recording.
+        '''
+        return [name.decode() for name in self.channels]
+
+    def sampleCount(self,channel):
+        '''
+        Returns the number of samples recorded for a channel.
+        '''
+        return len(self.times[channel])
+
+    def timeBounds(self,channel):
+        '''
+        Returns the first and last sample times of a channel, or None if the
+        channel has no samples.
+        '''
+        times = self.times[channel]
+        if len(times) == 0:
+            return None
+        return float(times[0]), float(times[-1])
+
+    def readChunk(self,chunk):
+        '''
+        Returns the times and values held in a single chunk of the chunk index
+        as views without copying.
+        '''
+        start = int(chunk["offset"])
+        end = start + int(chunk["nSamples"])
+        return self.allTimes[start:end], self.allValues[start:end]
+
+    def read(self,channel):
+        '''
+        Returns the times and values of a channel.
+        '''
+        return self.times[channel], self.values[channel]
+
+def convertToColumnar(csvPath,outputPath=None,compression=None):
+    '''
+    Converts a text recording to the binary columnar format, which is much
+    faster to open. The output is written next to the original with a .pdl
+    extension unless another path is given. Returns the output path.
+    '''
+    if outputPath == None:
+        outputPath = os.path.splitext(csvPath)[0] + ".pdl"
+    reader = CSVRecordReader(csvPath)
+    writer = ColumnarRecordWriter(outputPath,compression=compression)
+    for i,name in enumerate(reader.channelNames()):
+        times,values = reader.read(i)
+        writer.write(name,times,values)
+    writer.close()
+    return outputPath
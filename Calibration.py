@@ -0,0 +1,208 @@
+import numpy as np
+import datetime
+import json
+
+#Calibrations convert raw sensor values, such as the voltage ratio of a load
+#cell, to the quantity being measured. Each works on whole arrays of values at
+#once and can be inverted to get back the raw values.
+
+class LinearCalibration():
+    '''
+    Calibration of the form calibrated = gradient*raw + intercept.
+    '''
+
+    def __init__(self,gradient,intercept):
+        '''
+        Constructor for a linear calibration.
+        '''
+        self.gradient = float(gradient)
+        self.intercept = float(intercept)
+
+    def apply(self,values):
+        '''
+        Returns the calibrated values of an array of raw values.
+        '''
+        return np.asarray(values)*self.gradient + self.intercept
+
+    def invert(self,values):
+        '''
+        Returns the raw values of an array of calibrated values.
+        '''
+        if self.gradient == 0:
+            raise ValueError("A calibration with a gradient of 0 can not be inverted")
+        return (np.asarray(values) - self.intercept)/self.gradient
+
+    def toDict(self):
+        '''
+        Returns the calibration as a dictionary which can be saved as JSON.
+        '''
+        return {"type":"linear","gradient":self.gradient,"intercept":self.intercept}
+
+class PolynomialCalibration():
+    '''
+    Calibration by a polynomial of the raw value. Only invertible over a range
+    of raw values in which the polynomial is monotonic.
+    '''
+
+    #Number of points used to tabulate the polynomial for inversion
+    inversionPoints = 4097
+
+    def __init__(self,coefficients,rawRange):
+        '''
+        Constructor for a polynomial calibration.
+
+        Arguments
+        ---------
+        coefficients: Coefficients of the polynomial, highest power first as
+        returned by numpy.polyfit.
+
+        rawRange: Lowest and highest raw values the calibration is used for.
+        The polynomial must be monotonic over this range.
+        '''
+        self.coefficients = np.asarray(coefficients,dtype=np.float64)
+        self.rawRange = (float(rawRange[0]),float(rawRange[1]))
+        self.derivative = np.polyder(self.coefficients)
+        self.rawTable = np.linspace(self.rawRange[0],self.rawRange[1],self.inversionPoints)
+        self.calibratedTable = np.polyval(self.coefficients,self.rawTable)
+        steps = np.diff(self.calibratedTable)
+        if not (np.all(steps > 0) or np.all(steps < 0)):
+            raise ValueError("Polynomial is not monotonic over the raw range")
+
+    def apply(self,values):
+        '''
+        Returns the calibrated values of an array of raw values.
+        '''
+        return np.polyval(self.coefficients,np.asarray(values,dtype=np.float64))
+
+    def invert(self,values):
+        '''
+        Returns the raw values of an array of calibrated values. Starts from a
+        linear interpolation of the tabulated polynomial then refines the
+        result with Newton's method.
+        '''
+        values = np.asarray(values,dtype=np.float64)
+        raw = interpolate(values,self.calibratedTable,self.rawTable)
+        for i in range(3):
+            slope = np.polyval(self.derivative,raw)
+            raw = raw - np.divide(np.polyval(self.coefficients,raw) - values,slope,
+                    out=np.zeros_like(raw),where=slope != 0)
+        return raw
+
+    def toDict(self):
+        '''
+        Returns the calibration as a dictionary which can be saved as JSON.
+        '''
+        return {"type":"polynomial","coefficients":self.coefficients.tolist(),
+                "rawRange":list(self.rawRange)}
+
+class LookupTableCalibration():
+    '''
+    Calibration by linear interpolation between measured points, for example a
+    thermocouple table or a multi point load cell calibration. Values outside
+    the table are extrapolated from its first or last two points.
+    '''
+
+    def __init__(self,rawPoints,calibratedPoints):
+        '''
+        Constructor for a lookup table calibration. Takes the raw and
+        calibrated values of each point. Both must be strictly increasing or
+        decreasing so the table can be inverted.
+        '''
+        rawPoints = np.asarray(rawPoints,dtype=np.float64)
+        calibratedPoints = np.asarray(calibratedPoints,dtype=np.float64)
+        if len(rawPoints) < 2 or len(rawPoints) != len(calibratedPoints):
+            raise ValueError("Lookup table needs at least 2 pairs of points")
+        order = np.argsort(rawPoints)
+        self.rawPoints = rawPoints[order]
+        self.calibratedPoints = calibratedPoints[order]
+        for points in (self.rawPoints,self.calibratedPoints):
+            steps = np.diff(points)
+            if not (np.all(steps > 0) or np.all(steps < 0)):
+                raise ValueError("Lookup table points must be strictly monotonic")
+
+    def apply(self,values):
+        '''
+        Returns the calibrated values of an array of raw values.
+        '''
+        return interpolate(values,self.rawPoints,self.calibratedPoints)
+
+    def invert(self,values):
+        '''
+        Returns the raw values of an array of calibrated values.
+        '''
+        return interpolate(values,self.calibratedPoints,self.rawPoints)
+
+    def toDict(self):
+        '''
+        Returns the calibration as a dictionary which can be saved as JSON.
+        '''
+        return {"type":"lookup","rawPoints":self.rawPoints.tolist(),
+                "calibratedPoints":self.calibratedPoints.tolist()}
+
+def interpolate(values,xPoints,yPoints):
+    '''
+    Linearly interpolates values between points, extrapolating from the end
+    segments outside them. xPoints must be strictly increasing or decreasing.
+    '''
+    values = np.asarray(values,dtype=np.float64)
+    if xPoints[0] > xPoints[-1]:
+        xPoints = xPoints[::-1]
+        yPoints = yPoints[::-1]
+    result = np.interp(values,xPoints,yPoints)
+    below = values < xPoints[0]
+    above = values > xPoints[-1]
+    if below.any():
+        slope = (yPoints[1] - yPoints[0])/(xPoints[1] - xPoints[0])
+        result[below] = yPoints[0] + (values[below] - xPoints[0])*slope
+    if above.any():
+        slope = (yPoints[-1] - yPoints[-2])/(xPoints[-1] - xPoints[-2])
+        result[above] = yPoints[-1] + (values[above] - xPoints[-1])*slope
+    return result
+
+def calibrationFromDict(calibration):
+    '''
+    Creates a calibration from a dictionary made by its toDict method. A
+    dictionary holding only a "gradient" and "intercept" gives a linear
+    calibration.
+    '''
+    calibrationType = calibration.get("type","linear")
+    if calibrationType == "linear":
+        return LinearCalibration(calibration["gradient"],calibration["intercept"])
+    if calibrationType == "polynomial":
+        return PolynomialCalibration(calibration["coefficients"],calibration["rawRange"])
+    if calibrationType == "lookup":
+        return LookupTableCalibration(calibration["rawPoints"],calibration["calibratedPoints"])
+    raise ValueError("Unknown calibration type {}".format(calibrationType))
+
+def loadCalibration(filePath):
+    '''
+    Reads a calibration from a .cal file. Lines starting with "#" are comments.
+    The rest of the file is either a JSON calibration as saved by
+    saveCalibration or the "gradient , intercept" line of a linear calibration.
+    '''
+    with open(filePath) as fileHandle:
+        lines = [line for line in fileHandle if not line.startswith("#")]
+    text = "".join(lines).strip()
+    if len(text) == 0:
+        raise ValueError("Empty file")
+    if text.startswith("{"):
+        return calibrationFromDict(json.loads(text))
+    gradient,intercept = text.splitlines()[-1].split(",")
+    return LinearCalibration(float(gradient),float(intercept))
+
+def saveCalibration(calibration,filePath,description="Callibration data"):
+    '''
+    Writes a calibration to a .cal file. Linear calibrations are written as a
+    "gradient , intercept" line, which older versions can also read, and others
+    as JSON.
+    '''
+    timeStamp = datetime.datetime.now().strftime('%d/%m/%Y__%H:%M:%S')
+    with open(filePath,"w") as fileHandle:
+        fileHandle.write("#{}\n".format(description))
+        fileHandle.write("#Callibration performed on {}\n".format(timeStamp))
+        if isinstance(calibration,LinearCalibration):
+            fileHandle.write("#Callibration in form calibrated = gradient*raw + intercept\n")
+            fileHandle.write("#Data listed: gradient,intercept\n")
+            fileHandle.write("{} , {}".format(calibration.gradient,calibration.intercept))
+        else:
+            fileHandle.write(json.dumps(calibration.toDict()))
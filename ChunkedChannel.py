@@ -0,0 +1,281 @@
+from PhidgetDataLogger.DecimationPyramid import DecimationPyramid
+from PhidgetDataLogger.RangeQuery import RangeQuery
+from collections import OrderedDict
+import numpy as np
+
+class ChunkedChannel():
+    '''
+    One channel of a recording read a chunk at a time through the chunk index
+    of a ColumnarRecordReader or CSVRecordReader, so only the chunks in view
+    are ever read. Times are given from the channel's first sample, which is
+    done by shifting the few values returned rather than copying the channel.
+
+    A summary is built in one pass over the chunks holding the count, mean,
+    spread, minimum and maximum of every chunk and the smallest and largest
+    sample of every binSize samples. Long ranges are drawn from a
+    DecimationPyramid of the summary, so they never touch the samples. Short
+    ranges are drawn from a RangeQuery of each chunk in view, built when the
+    chunk is first read and kept for the most recently used chunks.
+
+    Statistics of a range take the chunks wholly inside it from running sums
+    and DecimationPyramids of the chunk summaries and the chunks at its ends
+    from their RangeQuery, so each costs O(log n) once those two chunks have
+    been read.
+    '''
+
+    #Number of samples summarised by each smallest and largest sample
+    binSize = 256
+    #Number of chunks whose samples and range query are kept once read
+    cachedChunks = 64
+
+    def __init__(self,reader,channel,summary=None):
+        '''
+        Constructor for the chunked channel.
+
+        Arguments
+        ---------
+        reader: ColumnarRecordReader or CSVRecordReader of the recording.
+
+        channel: Index of the channel in the reader. Must hold some samples.
+
+        summary: Summary previously returned by getSummary for the same
+        channel of the same unchanged recording. Built if None.
+        '''
+        self.reader = reader
+        self.channel = channel
+        self.chunks = reader.index[channel]
+        self.firstTimes = self.chunks["firstTime"]
+        self.lastTimes = self.chunks["lastTime"]
+        self.offset = float(self.firstTimes[0])
+        #Time of the last sample from the first
+        self.end = float(self.lastTimes[-1]) - self.offset
+        if summary != None and int(summary["binSize"]) == self.binSize:
+            self.setSummary(summary)
+        else:
+            self.buildSummary()
+        self.buildSums()
+        self.overview = DecimationPyramid(self.pointX,self.pointY)
+        #Range queries of the chunks read most recently, keyed by chunk number
+        self.queries = OrderedDict()
+
+    def buildSummary(self):
+        '''
+        Reads every chunk once to build the summary.
+        '''
+        n = len(self.chunks)
+        self.chunkMean = np.zeros(n)
+        self.chunkM2 = np.zeros(n)
+        self.chunkMin = np.zeros(n)
+        self.chunkMax = np.zeros(n)
+        pointX = []
+        pointY = []
+        for k in range(n):
+            x,y = self.reader.readChunk(self.chunks[k])
+            mean = float(np.mean(y))
+            self.chunkMean[k] = mean
+            self.chunkM2[k] = float(np.sum((y - mean)**2))
+            self.chunkMin[k] = float(np.min(y))
+            self.chunkMax[k] = float(np.max(y))
+            #Smallest and largest sample of every bin, with a smaller last bin
+            full = len(y) - len(y) % self.binSize
+            starts = np.arange(0,len(y),self.binSize)
+            minIndex = np.empty(len(starts),dtype=np.int64)
+            maxIndex = np.empty(len(starts),dtype=np.int64)
+            groups = y[0:full].reshape(-1,self.binSize)
+            minIndex[0:len(groups)] = starts[0:len(groups)] + np.argmin(groups,axis=1)
+            maxIndex[0:len(groups)] = starts[0:len(groups)] + np.argmax(groups,axis=1)
+            if full < len(y):
+                minIndex[-1] = full + np.argmin(y[full:])
+                maxIndex[-1] = full + np.argmax(y[full:])
+            indices = np.empty(2*len(starts),dtype=np.int64)
+            np.minimum(minIndex,maxIndex,out=indices[0::2])
+            np.maximum(minIndex,maxIndex,out=indices[1::2])
+            pointX.append(x[indices])
+            pointY.append(y[indices])
+        self.pointX = np.concatenate(pointX)
+        self.pointY = np.concatenate(pointY)
+
+    def buildSums(self):
+        '''
+        Computes running sums over the chunks of their sample counts and of the
+        sums of their values and squared values, and pyramids of the chunk
+        minima and maxima, from the summary.
+        '''
+        counts = self.chunks["nSamples"].astype(np.float64)
+        #Values are offset by their mean before summing to limit the rounding
+        #error of the variance on long recordings
+        self.sumOffset = float(np.sum(counts*self.chunkMean)/np.sum(counts))
+        shifted = self.chunkMean - self.sumOffset
+        self.countSums = np.r_[0.0,np.cumsum(counts)]
+        self.sums = np.r_[0.0,np.cumsum(counts*shifted)]
+        self.squareSums = np.r_[0.0,np.cumsum(self.chunkM2 + counts*shifted*shifted)]
+        self.minPyramid = DecimationPyramid(self.firstTimes,self.chunkMin)
+        self.maxPyramid = DecimationPyramid(self.firstTimes,self.chunkMax)
+
+    def getSummary(self):
+        '''
+        Returns the summary as a dictionary of arrays which can be saved and
+        passed back to the constructor.
+        '''
+        return {"binSize":np.array(self.binSize),"chunkMean":self.chunkMean,
+                "chunkM2":self.chunkM2,"chunkMin":self.chunkMin,
+                "chunkMax":self.chunkMax,"pointX":self.pointX,"pointY":self.pointY}
+
+    def setSummary(self,summary):
+        '''
+        Restores the summary from a dictionary made by getSummary.
+        '''
+        self.chunkMean = summary["chunkMean"]
+        self.chunkM2 = summary["chunkM2"]
+        self.chunkMin = summary["chunkMin"]
+        self.chunkMax = summary["chunkMax"]
+        self.pointX = summary["pointX"]
+        self.pointY = summary["pointY"]
+
+    def chunkRange(self,x0,x1):
+        '''
+        Returns the range of chunk numbers holding samples from x0 to x1,
+        measured from the first sample.
+        '''
+        return (int(np.searchsorted(self.lastTimes,x0 + self.offset,side="left")),
+                int(np.searchsorted(self.firstTimes,x1 + self.offset,side="right")))
+
+    def query(self,k):
+        '''
+        Returns the RangeQuery of chunk k, reading the chunk and building it if
+        it is not one of those kept.
+        '''
+        query = self.queries.get(k)
+        if query == None:
+            query = RangeQuery(*self.reader.readChunk(self.chunks[k]))
+            self.queries[k] = query
+            if len(self.queries) > self.cachedChunks:
+                self.queries.popitem(last=False)
+        else:
+            self.queries.move_to_end(k)
+        return query
+
+    def envelope(self,x0,x1,pixels):
+        '''
+        Returns the x and y values to draw for the range x0 to x1 on a plot
+        "pixels" wide, about two points per pixel. x is measured from the first
+        sample. Ranges with more than binSize samples per pixel are drawn from
+        the summary, others from the pyramids of the chunks in view.
+        '''
+        c0,c1 = self.chunkRange(x0,x1)
+        if c1 <= c0:
+            return np.empty(0), np.empty(0)
+        pixels = max(int(pixels),1)
+        counts = self.chunks["nSamples"][c0:c1]
+        n = int(counts.sum())
+        if n > self.binSize*pixels:
+            x,y = self.overview.envelope(x0 + self.offset,x1 + self.offset,pixels)
+        else:
+            parts = [self.query(k).pyramid.envelope(x0 + self.offset,x1 + self.offset,
+                    -(-pixels*int(count)//n)) for k,count in zip(range(c0,c1),counts)]
+            x = np.concatenate([part[0] for part in parts])
+            y = np.concatenate([part[1] for part in parts])
+        return x - self.offset, y
+
+    def statistics(self,x0,x1):
+        '''
+        Returns a dictionary of the count, mean, standard deviation, minimum
+        and maximum of the samples from x0 to x1.
+        '''
+        c0,c1 = self.chunkRange(x0,x1)
+        t0 = x0 + self.offset
+        t1 = x1 + self.offset
+        if c1 <= c0:
+            nan = float("nan")
+            return {"count":0,"mean":nan,"std":nan,"min":nan,"max":nan}
+        #Chunks w0 to w1 are wholly inside the range, the rest are read
+        w0 = c0 if self.firstTimes[c0] >= t0 else c0 + 1
+        w1 = max(c1 if self.lastTimes[c1 - 1] <= t1 else c1 - 1,w0)
+        counts = []
+        means = []
+        m2s = []
+        minimums = []
+        maximums = []
+        if w1 > w0:
+            n = self.countSums[w1] - self.countSums[w0]
+            total = self.sums[w1] - self.sums[w0]
+            counts.append(n)
+            means.append(self.sumOffset + total/n)
+            m2s.append(max(self.squareSums[w1] - self.squareSums[w0] - total*total/n,0.0))
+            minimums.append(self.chunkMin[self.minPyramid.rangeExtrema(w0,w1)[0]])
+            maximums.append(self.chunkMax[self.maxPyramid.rangeExtrema(w0,w1)[1]])
+        for k in sorted(set(range(c0,w0)) | set(range(w1,c1))):
+            query = self.query(k)
+            n = query.count(t0,t1)
+            if n > 0:
+                counts.append(float(n))
+                means.append(query.mean(t0,t1))
+                m2s.append(n*query.std(t0,t1)**2)
+                minimum,maximum = query.minMax(t0,t1)
+                minimums.append(minimum)
+                maximums.append(maximum)
+        total = int(sum(counts))
+        if total == 0:
+            nan = float("nan")
+            return {"count":0,"mean":nan,"std":nan,"min":nan,"max":nan}
+        counts = np.array(counts)
+        means = np.array(means)
+        #Spreads of the parts are combined about the overall mean
+        mean = float(np.sum(counts*means))/total
+        m2 = float(np.sum(m2s) + np.sum(counts*(means - mean)**2))
+        return {"count":total,"mean":mean,"std":float(np.sqrt(m2/total)),
+                "min":float(min(minimums)),"max":float(max(maximums))}
+
+    def nearestSample(self,xValue):
+        '''
+        Returns the time, measured from the first sample, and value of the
+        sample closest in time to xValue. Only the chunk holding xValue and the
+        next are read.
+        '''
+        t = xValue + self.offset
+        k = min(max(int(np.searchsorted(self.firstTimes,t,side="right")) - 1,0),len(self.chunks) - 1)
+        best = None
+        for chunk in range(k,min(k + 2,len(self.chunks))):
+            query = self.query(chunk)
+            i = query.nearestIndex(t)
+            if best == None or abs(query.x[i] - t) < abs(best[0] - t):
+                best = (float(query.x[i]),float(query.y[i]))
+            if t <= self.lastTimes[chunk]:
+                break
+        return best[0] - self.offset, best[1]
+
+    def export(self,writer,name,x0,x1):
+        '''
+        Writes every sample from x0 to x1 to a recording writer, such as a
+        CSVRecordWriter or ColumnarRecordWriter, a chunk at a time with times
+        measured from the first sample. Returns the number of bytes written.
+        '''
+        c0,c1 = self.chunkRange(x0,x1)
+        written = 0
+        for k in range(c0,c1):
+            x,y = self.reader.readChunk(self.chunks[k])
+            i0 = np.searchsorted(x,x0 + self.offset,side="left")
+            i1 = np.searchsorted(x,x1 + self.offset,side="right")
+            if i1 > i0:
+                written += writer.write(name,x[i0:i1] - self.offset,y[i0:i1])
+        return written
+
+def nearestPoint(channels,xValue,yValue,xScale=1.0,yScale=1.0):
+    '''
+    Finds the sample closest to the point (xValue,yValue) across several
+    ChunkedChannels. Each channel is searched for its sample nearest in time
+    and the one closest to the point is picked, with distances in x and y
+    divided by xScale and yScale, such as the size of a pixel on a plot, so the
+    two axes are compared in the same units. Returns the position of the
+    channel in channels and the time and value of the sample, or None if there
+    are no channels.
+    '''
+    best = None
+    bestDistance = float("inf")
+    for k,channel in enumerate(channels):
+        x,y = channel.nearestSample(xValue)
+        distance = ((x - xValue)/xScale)**2 + ((y - yValue)/yScale)**2
+        if best == None or distance < bestDistance:
+            best = (k,x,y)
+            bestDistance = distance
+    return best
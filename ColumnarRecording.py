@@ -0,0 +1,327 @@
+import numpy as np
+import struct
+import json
+import zlib
+import time
+import mmap
+import os
+
+#Layout of a columnar recording file (.pdl)
+#
+#   magic (8 bytes) | header length (uint32) | JSON header | padding to 8 bytes
+#   record | record | ...
+#
+#Every record starts with a 40 byte record header: a 4 byte record type, the
+#channel index, flags, number of samples, payload length in bytes and the first
+#and last sample times. "CHAN" records hold the JSON metadata of a new channel.
+#"CHNK" records hold a chunk of samples from one channel as all the times then
+#all the values, both float64, optionally zlib compressed. Records are only
+#ever appended so a recording which is cut short is still readable.
+fileMagic = b"PDLREC\x00\x01"
+recordHeader = struct.Struct("<4sHHIQdd4x")
+channelRecord = b"CHAN"
+chunkRecord = b"CHNK"
+#Flag set on chunks whose payload is zlib compressed
+compressedFlag = 0x1
+
+def channelMetadata(sensor):
+    '''
+    Builds the metadata stored for a channel from a sensor object. "calibrated"
+    is whether the recorded values have had the calibration applied.
+    '''
+    calibration = None
+    if getattr(sensor,"useCallibration",False) and sensor.calibration != None:
+        calibration = sensor.calibration.toDict()
+    return {"name":sensor.sensorName,
+            "units":getattr(sensor,"sensorUnits",None),
+            "dataInterval":getattr(sensor,"dataInterval",None),
+            "calibration":calibration,
+            "calibrated":calibration != None and getattr(sensor,"recordCalibrated",True)}
+
+class ColumnarRecordWriter():
+    '''
+    Writes recordings in a chunked binary format with the samples of each
+    channel stored together. Much smaller and faster to write and read than
+    the text format. Has the same interface as CSVRecordWriter so it can be
+    used by a Recorder.
+    '''
+
+    def __init__(self,filePath,sensors=None,chunkSize=8192,compression=None,
+            compressionLevel=1,bufferSize=1<<20,partialInterval=60.0):
+        '''
+        Constructor for the columnar writer. Opens the file and writes the
+        header and the metadata of every sensor given.
+
+        Arguments
+        ---------
+        filePath: Path of the file to create.
+
+        sensors: List of sensors being recorded. Their names, units, data
+        intervals and calibrations are stored in the file. Channels which
+        were not given here are added the first time they are written to.
+
+        chunkSize: Number of samples of a channel held in memory before they are
+        written as a chunk.
+
+        compression: None or "zlib".
+
+        compressionLevel: zlib compression level from 1 (fastest) to 9.
+
+        partialInterval: Time in seconds a channel's samples can be held back
+        in a partial chunk before a flush writes them anyway, limiting what is
+        lost if the program is killed. If None partial chunks are only written
+        by close or a flush with partial set. Periodic flushes otherwise write
+        only full chunks so chunks stay large.
+        '''
+        if compression not in (None,"zlib"):
+            raise ValueError("compression must be None or 'zlib'")
+        self.filePath = filePath
+        self.chunkSize = chunkSize
+        self.compression = compression
+        self.compressionLevel = compressionLevel
+        self.partialInterval = partialInterval
+        self.channels = {}
+        self.pending = []
+        self.file = open(filePath,"wb",buffering=bufferSize)
+        header = json.dumps({"version":1,"created":time.time(),
+                "compression":compression}).encode()
+        header += b" "*(-(len(fileMagic)+4+len(header)) % 8)
+        self.file.write(fileMagic + struct.pack("<I",len(header)) + header)
+        if sensors != None:
+            for sensor in sensors:
+                self.addChannel(channelMetadata(sensor))
+
+    def addChannel(self,metadata):
+        '''
+        Writes the metadata record for a new channel. Returns the channel index.
+        '''
+        index = len(self.channels)
+        self.channels[metadata["name"]] = index
+        #Pending times, values, sample count and the time the oldest arrived
+        self.pending.append([[],[],0,None])
+        payload = json.dumps(metadata).encode()
+        payload += b" "*(-len(payload) % 8)
+        self.file.write(recordHeader.pack(channelRecord,index,0,0,len(payload),0,0))
+        self.file.write(payload)
+        return index
+
+    def write(self,sensorName,times,values):
+        '''
+        Adds a block of samples from one channel. Samples are written once a
+        full chunk has built up, and a large block is split into chunks of
+        chunkSize samples. Returns the number of bytes written.
+        '''
+        if sensorName not in self.channels:
+            #Laid out as channelMetadata makes it for a sensor
+            self.addChannel({"name":sensorName,"units":None,"dataInterval":None,
+                    "calibration":None,"calibrated":False})
+        index = self.channels[sensorName]
+        pending = self.pending[index]
+        if pending[2] == 0:
+            pending[3] = time.monotonic()
+        pending[0].append(np.asarray(times,dtype=np.float64))
+        pending[1].append(np.asarray(values,dtype=np.float64))
+        pending[2] += len(times)
+        if pending[2] >= self.chunkSize:
+            return self.writePending(index)
+        return 0
+
+    def writePending(self,index,partial=False):
+        '''
+        Writes the pending samples of a channel as chunks of chunkSize samples.
+        Any left over are kept back, or written as a partial chunk if partial
+        is True. Returns the number of bytes written.
+        '''
+        pending = self.pending[index]
+        if pending[2] == 0:
+            return 0
+        times = np.concatenate(pending[0])
+        values = np.concatenate(pending[1])
+        n = len(times)
+        end = n if partial else n - n % self.chunkSize
+        written = 0
+        for start in range(0,end,self.chunkSize):
+            written += self.writeChunk(index,times[start:start+self.chunkSize],
+                    values[start:start+self.chunkSize])
+        if end < n:
+            self.pending[index] = [[times[end:n]],[values[end:n]],n - end,pending[3]]
+        else:
+            self.pending[index] = [[],[],0,None]
+        return written
+
+    def writeChunk(self,index,times,values):
+        '''
+        Writes samples of a channel as a single chunk. Returns the number of
+        bytes written.
+        '''
+        payload = times.tobytes() + values.tobytes()
+        flags = 0
+        if self.compression == "zlib":
+            payload = zlib.compress(payload,self.compressionLevel)
+            flags |= compressedFlag
+        padding = b"\x00"*(-len(payload) % 8)
+        self.file.write(recordHeader.pack(chunkRecord,index,flags,len(times),
+                len(payload),times[0],times[-1]))
+        self.file.write(payload + padding)
+        return recordHeader.size + len(payload) + len(padding)
+
+    def flush(self,partial=False):
+        '''
+        Pushes buffered data to the operating system. Full chunks are written
+        as soon as they build up so only partial chunks can be held back. They
+        are written if partial is True or once they have waited for longer than
+        partialInterval. Returns the number of bytes written.
+        '''
+        written = 0
+        now = time.monotonic()
+        for index,pending in enumerate(self.pending):
+            if pending[2] > 0 and (partial or (self.partialInterval != None
+                    and now - pending[3] >= self.partialInterval)):
+                written += self.writePending(index,True)
+        self.file.flush()
+        return written
+
+    def fileno(self):
+        '''
+        Returns the file descriptor of the output file. Used for fsync.
+        '''
+        return self.file.fileno()
+
+    def close(self):
+        '''
+        Writes any pending samples and closes the output file.
+        '''
+        self.flush(True)
+        self.file.close()
+
+class ColumnarRecordReader():
+    '''
+    Reads recordings written by ColumnarRecordWriter. The file is memory mapped
+    and only the record headers are read when it is opened, building an index
+    of where each channel's chunks are. Sample data is only touched when it is
+    read, and uncompressed chunks are returned as views of the mapped file
+    without copying.
+    '''
+
+    #Layout of the per channel chunk index
+    indexDtype = np.dtype([("offset",np.int64),("nSamples",np.int64),
+            ("payloadLength",np.int64),("flags",np.int64),
+            ("firstTime",np.float64),("lastTime",np.float64)])
+
+    def __init__(self,filePath,channels=None,index=None):
+        '''
+        Constructor for the columnar reader. Maps the file and indexes its
+        records. A channel list and index saved from an earlier reader of the
+        same unchanged file can be given to skip indexing.
+        '''
+        self.filePath = filePath
+        with open(filePath,"rb") as fileHandle:
+            if os.fstat(fileHandle.fileno()).st_size == 0:
+                raise ValueError("{} is empty".format(filePath))
+            self.map = mmap.mmap(fileHandle.fileno(),0,access=mmap.ACCESS_READ)
+        if self.map[0:len(fileMagic)] != fileMagic:
+            raise ValueError("{} is not a columnar recording".format(filePath))
+        headerLength = struct.unpack_from("<I",self.map,len(fileMagic))[0]
+        offset = len(fileMagic) + 4
+        self.header = json.loads(self.map[offset:offset+headerLength].decode())
+        if index != None:
+            self.channels = channels
+            self.index = index
+        else:
+            self.channels = []
+            self.index = self.buildIndex(offset + headerLength)
+
+    def buildIndex(self,offset):
+        '''
+        Walks the record headers from offset to the end of the file, reading the
+        channel metadata and noting the position of every chunk. Stops at the
+        first incomplete record, left if the recording was cut short. Returns
+        one index array per channel.
+        '''
+        size = len(self.map)
+        chunks = []
+        while offset + recordHeader.size <= size:
+            (recordType,channel,flags,nSamples,payloadLength,
+                    firstTime,lastTime) = recordHeader.unpack_from(self.map,offset)
+            offset += recordHeader.size
+            if offset + payloadLength > size:
+                break
+            if recordType == channelRecord:
+                metadata = self.map[offset:offset+payloadLength].decode()
+                self.channels.append(json.loads(metadata))
+                chunks.append([])
+            elif recordType == chunkRecord:
+                chunks[channel].append((offset,nSamples,payloadLength,flags,
+                        firstTime,lastTime))
+            offset += payloadLength + (-payloadLength % 8)
+        return [np.array(channelChunks,dtype=self.indexDtype) for channelChunks in chunks]
+
+    def channelNames(self):
+        '''
+        Returns the names of every channel in the recording.
+        '''
+        return [channel["name"] for channel in self.channels]
+
+    def sampleCount(self,channel):
+        '''
+        Returns the number of samples recorded for a channel.
+        '''
+        return int(self.index[channel]["nSamples"].sum())
+
+    def timeBounds(self,channel):
+        '''
+        Returns the first and last sample times of a channel, or None if the
+        channel has no samples.
+        '''
+        chunks = self.index[channel]
+        if len(chunks) == 0:
+            return None
+        return float(chunks["firstTime"][0]), float(chunks["lastTime"][-1])
+
+    def readChunk(self,chunk):
+        '''
+        Returns the times and values held in a single chunk. Uncompressed
+        chunks are returned as views of the mapped file.
+        '''
+        nSamples = int(chunk["nSamples"])
+        if chunk["flags"] & compressedFlag:
+            offset = int(chunk["offset"])
+            payload = zlib.decompress(self.map[offset:offset+int(chunk["payloadLength"])])
+            data = np.frombuffer(payload,dtype=np.float64)
+        else:
+            data = np.frombuffer(self.map,dtype=np.float64,count=2*nSamples,
+                    offset=int(chunk["offset"]))
+        return data[0:nSamples], data[nSamples:2*nSamples]
+
+    def read(self,channel,startTime=None,endTime=None):
+        '''
+        Returns the times and values of a channel. If a start or end time is
+        given only the chunks overlapping that range are read, so the result
+        may include some samples either side of it. A channel held in a single
+        uncompressed chunk is returned without copying.
+        '''
+        chunks = self.index[channel]
+        first = 0
+        last = len(chunks)
+        #Chunk times only increase so the overlapping chunks are found by bisection
+        if startTime != None:
+            first = np.searchsorted(chunks["lastTime"],startTime,side="left")
+        if endTime != None:
+            last = np.searchsorted(chunks["firstTime"],endTime,side="right")
+        parts = [self.readChunk(chunk) for chunk in chunks[first:last]]
+        if len(parts) == 0:
+            return np.empty(0), np.empty(0)
+        if len(parts) == 1:
+            return parts[0]
+        return (np.concatenate([part[0] for part in parts]),
+                np.concatenate([part[1] for part in parts]))
+
+    def close(self):
+        '''
+        Unmaps the file. The map is left open if views of it are still in use
+        and is released once they are.
+        '''
+        try:
+            self.map.close()
+        except BufferError:
+            pass
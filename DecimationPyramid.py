@@ -0,0 +1,174 @@
+import numpy as np
+
+class DecimationPyramid():
+    '''
+    Multi-resolution min/max summary of a single channel. Each level splits the
+    channel into bins of equal numbers of samples and keeps the index of the
+    smallest and largest sample in every bin, with each level's bins "factor"
+    times larger than the last. Drawing any range then only needs about two
+    points per pixel while still showing every peak.
+    '''
+
+    def __init__(self,x,y,factor=4,baseBinSize=16,state=None):
+        '''
+        Constructor for the pyramid. Builds every level in O(n) unless a saved
+        state is given.
+
+        Arguments
+        ---------
+        x: Sample times. Must be increasing.
+
+        y: Sample values.
+
+        factor: Number of bins of one level combined into a bin of the next.
+
+        baseBinSize: Number of samples in each bin of the finest level. Ranges
+        with fewer than baseBinSize samples per pixel are drawn from the raw
+        samples.
+
+        state: Levels previously returned by getState for the same x and y. Used
+        to reload a pyramid from a cache instead of rebuilding it.
+        '''
+        self.x = x
+        self.y = y
+        self.factor = factor
+        self.baseBinSize = baseBinSize
+        #Indices into x and y. 32 bit where possible to halve memory use.
+        self.indexType = np.int32 if len(y) < 2**31 else np.int64
+        self.binSizes = []
+        self.minIndices = []
+        self.maxIndices = []
+        if state != None:
+            self.setState(state)
+        elif len(y) > baseBinSize:
+            index = np.arange(len(y),dtype=self.indexType)
+            minIndex,maxIndex = self.reduce(index,index,baseBinSize)
+            binSize = baseBinSize
+            while True:
+                self.binSizes.append(binSize)
+                self.minIndices.append(minIndex)
+                self.maxIndices.append(maxIndex)
+                if len(minIndex) <= factor:
+                    break
+                minIndex,maxIndex = self.reduce(minIndex,maxIndex,factor)
+                binSize *= factor
+
+    def getState(self):
+        '''
+        Returns the levels of the pyramid as a dictionary of arrays which can be
+        saved and passed back to the constructor.
+        '''
+        lengths = [len(minIndex) for minIndex in self.minIndices]
+        empty = np.empty(0,dtype=self.indexType)
+        return {"factor":np.array(self.factor),
+                "baseBinSize":np.array(self.baseBinSize),
+                "binSizes":np.array(self.binSizes,dtype=np.int64),
+                "levelLengths":np.array(lengths,dtype=np.int64),
+                "minIndices":np.concatenate(self.minIndices + [empty]),
+                "maxIndices":np.concatenate(self.maxIndices + [empty])}
+
+    def setState(self,state):
+        '''
+        Restores the levels of the pyramid from a dictionary made by getState.
+        '''
+        self.factor = int(state["factor"])
+        self.baseBinSize = int(state["baseBinSize"])
+        self.binSizes = [int(binSize) for binSize in state["binSizes"]]
+        splits = np.cumsum(state["levelLengths"])[0:-1]
+        if len(self.binSizes) > 0:
+            self.minIndices = np.split(state["minIndices"],splits)
+            self.maxIndices = np.split(state["maxIndices"],splits)
+
+    def reduce(self,minIndex,maxIndex,groupSize):
+        '''
+        Combines groups of groupSize bins into single bins. Returns the indices
+        of the smallest and largest sample of each new bin.
+        '''
+        n = len(minIndex)
+        full = n - n % groupSize
+        newMin = []
+        newMax = []
+        for indices,newIndices,pick in ((minIndex,newMin,np.argmin),(maxIndex,newMax,np.argmax)):
+            groups = indices[0:full].reshape(-1,groupSize)
+            chosen = pick(self.y[groups],axis=1)
+            newIndices.append(groups[np.arange(len(groups)),chosen])
+            #Left over bins which do not fill a group form a smaller last bin
+            if full < n:
+                tail = indices[full:]
+                newIndices.append(tail[pick(self.y[tail])].reshape(1))
+        return np.concatenate(newMin), np.concatenate(newMax)
+
+    def indexRange(self,x0,x1):
+        '''
+        Returns the range of sample indices covering x0 to x1 including one
+        sample either side so lines reach the edges of the view.
+        '''
+        i0 = max(np.searchsorted(self.x,x0,side="left") - 1,0)
+        i1 = min(np.searchsorted(self.x,x1,side="right") + 1,len(self.x))
+        return i0,i1
+
+    def rangeExtrema(self,i0,i1):
+        '''
+        Returns the indices of the smallest and largest samples from index i0 up
+        to but not including i1. The range is covered by whole bins from the
+        coarsest levels that fit inside it, with only the few samples and bins
+        at its edges checked individually, so the cost grows with the number of
+        levels rather than the length of the range.
+        '''
+        if i1 <= i0:
+            raise ValueError("Empty range")
+        minCandidates = []
+        maxCandidates = []
+        binSize = self.baseBinSize
+        b0 = -(-i0//binSize)
+        b1 = i1//binSize
+        if len(self.binSizes) == 0 or b0 >= b1:
+            b0 = b1 = i0
+        #Samples at either edge of the range not covered by a whole bin
+        edges = np.r_[i0:b0*binSize if b1 > b0 else i1,b1*binSize if b1 > b0 else i1:i1]
+        minCandidates.append(edges)
+        maxCandidates.append(edges)
+        for level in range(len(self.binSizes)):
+            if b1 <= b0:
+                break
+            c0 = -(-b0//self.factor)
+            c1 = b1//self.factor
+            if level + 1 == len(self.binSizes) or c0 >= c1:
+                #Take every remaining bin from this level
+                c0 = c1 = b1
+            for indices,candidates in ((self.minIndices[level],minCandidates),
+                    (self.maxIndices[level],maxCandidates)):
+                candidates.append(indices[b0:c0*self.factor if c1 > c0 else b1])
+                candidates.append(indices[c1*self.factor if c1 > c0 else b1:b1])
+            b0,b1 = c0,c1
+        minCandidates = np.concatenate(minCandidates)
+        maxCandidates = np.concatenate(maxCandidates)
+        return (int(minCandidates[np.argmin(self.y[minCandidates])]),
+                int(maxCandidates[np.argmax(self.y[maxCandidates])]))
+
+    def envelope(self,x0,x1,pixels):
+        '''
+        Returns the x and y values to draw for the range x0 to x1 on a plot
+        "pixels" wide. If the range holds few enough samples they are returned
+        directly as views, otherwise the minimum and maximum of each bin of the
+        coarsest level with at least one bin per pixel are returned in the order
+        they occur.
+        '''
+        i0,i1 = self.indexRange(x0,x1)
+        n = i1 - i0
+        pixels = max(int(pixels),1)
+        if n <= self.baseBinSize*pixels or len(self.binSizes) == 0:
+            return self.x[i0:i1], self.y[i0:i1]
+        level = 0
+        while (level + 1 < len(self.binSizes)
+                and n/self.binSizes[level+1] >= pixels):
+            level += 1
+        binSize = self.binSizes[level]
+        b0 = i0//binSize
+        b1 = -(-i1//binSize)
+        minIndex = self.minIndices[level][b0:b1]
+        maxIndex = self.maxIndices[level][b0:b1]
+        indices = np.empty(2*len(minIndex),dtype=minIndex.dtype)
+        np.minimum(minIndex,maxIndex,out=indices[0::2])
+        np.maximum(minIndex,maxIndex,out=indices[1::2])
+        return self.x[indices], self.y[indices]
@@ -0,0 +1,43 @@
+from PhidgetDataLogger.DigitalOutputChannel import DigitalOutputChannel
+import threading
+import time
+
+class DummyDigitalOutputChannel(DigitalOutputChannel):
+    '''
+    Class derived from DigitalOutputChannel to simulate a digital output, such
+    as a relay, without an IO board. Every change of state is kept with the
+    time it was made so interlocks can be tested with simulated sensors.
+    '''
+
+    def __init__(self,channelNo=0,switchTime=0.0):
+        '''
+        Constructor for the dummy output channel.
+
+        Arguments
+        ---------
+        channelNo: Channel number, only used to identify the channel.
+
+        switchTime: Time in seconds setState takes, to simulate a slow device.
+        '''
+        self.switchTime = switchTime
+        self.lock = threading.Lock()
+        #Time and new state of every call to setState
+        self.stateChanges = []
+        DigitalOutputChannel.__init__(self,None,channelNo)
+
+    def attachChannel(self):
+        '''
+        Overrides attachChannel from DigitalOutputChannel. There is no IO board
+        to attach to. The output starts low.
+        '''
+        self.state = False
+
+    def setState(self,state):
+        '''
+        Overrides setState from DigitalOutputChannel. Records the new state.
+        '''
+        if self.switchTime > 0:
+            time.sleep(self.switchTime)
+        with self.lock:
+            self.state = state
+            self.stateChanges.append((time.time(),state))
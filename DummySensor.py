@@ -10,29 +10,49 @@ class DummySensor(Sensor):
     ''' Class derived from Sensor to simulte a phidget sensor by outputting
     sin waves. Used for testing application without phidgets.'''
 
+    #Nominal time in ms between dummy samples. One sample is produced each time
+    #getData is called which the acquisition engine does every 20ms.
+    dataInterval = 20
+
     def __init__(self, omega,refreshPeriod,sensorName=None):
         '''
         Constructor for dummy sensor. omega is used to change frquency of output sin wave.
         '''
-        self.refreshPeriod = refreshPeriod*1000.0
-        self.sensorName = sensorName
         self.omega = omega
         self.sensorUnits = "N/A"
-        self.times =[ ]
-        self.data = []
+        Sensor.__init__(self,None,self.dataInterval,refreshPeriod,sensorName)
+
+    def attachSensor(self):
+        '''
+        Overrides attachSensor from Sensor. There is no phidget to attach to.
+        '''
+        self.attached = True
+
+    def activateDisconnectListener(self):
+        '''
+        Overrides activateDisconnectListener from Sensor. A dummy sensor can
+        not be disconnected.
+        '''
+        pass
+
+    def activateDataListener(self):
+        '''
+        Overrides activateDataListener from Sensor. Samples are generated on
+        request in getData so there is no event to listen for.
+        '''
         self.startTime = time.time()
 
+    def generateSample(self):
+        '''
+        Adds a new dummy sensor value to the data queue.
+        '''
+        rawTime = time.time()
+        self.dataQ.put([np.sin(self.omega*rawTime),rawTime-self.startTime,rawTime])
+
     def getData(self):
         '''
-        Overrides getData method from Sensor. Returns time and dummy sensor values
-        as well as all values logged since last refresh period
-        '''
-        if time.time()- self.startTime > 15:
-            self.data = []
-            self.times = []
-            self.startTime =time.time()
-        y = np.sin(self.omega*time.time())
-        x= time.time()-self.startTime
-        self.times.append(x)
-        self.data.append(y)
-        return([time.time()],[y],self.times,self.data )
+        Overrides getData method from Sensor. Generates a new dummy sensor value
+        then returns it the same way as a real Sensor would.
+        '''
+        self.generateSample()
+        return Sensor.getData(self)
@@ -25,5 +25,8 @@ if __name__ == "__main__":
 
     #Load function and arguments to application
     PDA.loadAlarmFunction(alarmFunction,"Alarm has been sounded")
+    #The function runs on its own thread so may be slow. While an alarm carries
+    #on it is called again at most every 5 seconds, change this for sensor 1
+    PDA.engine.alarmDispatcher.setLimits("sensor 1",debounce=1.0,minInterval=30.0)
     #Start application
     PDA.run()
@@ -0,0 +1,102 @@
+from PhidgetDataLogger.AcquisitionEngine import AcquisitionEngine
+from PhidgetDataLogger.Recorder import Recorder, openRecordWriter
+from PhidgetDataLogger.PerformanceMetrics import PerformanceMetrics
+from PhidgetDataLogger.MetricsExporter import MetricsExporter
+import threading
+import signal
+import time
+
+class HeadlessRecorder():
+    '''
+    Records sensors to a file without any user interface, for logging PCs with
+    no display. Uses the same acquisition engine and recorder as the main
+    application so writes the same formats, and holds no more than a fixed
+    amount of data in memory however long it runs.
+    '''
+
+    def __init__(self,sensors,outputPath,duration=None,statusInterval=60.0,
+            metricsTarget=None,metricsInterval=10.0):
+        '''
+        Constructor for the headless recorder. Opens the output file.
+
+        Arguments
+        ---------
+        sensors: List of sensors to record.
+
+        outputPath: File to record to. Must end in ".csv" or ".pdl".
+
+        duration: Time in seconds to record for. Records until stopped if None.
+
+        statusInterval: Time in seconds between printed status lines.
+
+        metricsTarget: File or "udp://host:port" the performance metrics are
+        exported to, or None to not export them.
+
+        metricsInterval: Time in seconds between exported metrics.
+        '''
+        self.sensors = sensors
+        self.outputPath = outputPath
+        self.duration = duration
+        self.statusInterval = statusInterval
+        self.stopEvent = threading.Event()
+        self.metrics = PerformanceMetrics()
+        self.recorder = Recorder(openRecordWriter(outputPath,sensors),metrics=self.metrics)
+        self.engine = AcquisitionEngine(sensors,plotting=False,metrics=self.metrics)
+        self.metricsExporter = None
+        if metricsTarget != None:
+            self.metricsExporter = MetricsExporter(self.metrics,metricsTarget,metricsInterval)
+
+    def stop(self,*args):
+        '''
+        Ends the recording. Can be called from another thread or used as a
+        signal handler.
+        '''
+        self.stopEvent.set()
+
+    def run(self):
+        '''
+        Records until the duration has passed or stop is called, then writes out
+        anything still queued and closes the file. Is blocking.
+        '''
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM,self.stop)
+        self.recorder.start()
+        self.engine.setRecorder(self.recorder)
+        self.engine.setRecordedChannels([True]*len(self.sensors))
+        self.engine.start()
+        if self.metricsExporter != None:
+            self.metricsExporter.start()
+        startTime = time.monotonic()
+        print("\n***** Recording to {} *****".format(self.outputPath))
+        try:
+            while not self.stopEvent.is_set():
+                remaining = self.statusInterval
+                if self.duration != None:
+                    remaining = min(remaining,self.duration - (time.monotonic() - startTime))
+                    if remaining <= 0:
+                        break
+                self.stopEvent.wait(remaining)
+                self.printStatus()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.engine.stop()
+            self.engine.setRecorder(None)
+            self.recorder.close()
+            if self.metricsExporter != None:
+                self.metricsExporter.close()
+        self.printStatus()
+        print("\n***** Recording finished *****")
+
+    def printStatus(self):
+        '''
+        Prints the number of samples written and dropped so far.
+        '''
+        status = "Written: {} samples ({:.1f} MB)  Dropped: {} samples".format(
+                self.recorder.writtenSamples,self.recorder.writtenBytes/1e6,
+                self.recorder.droppedSamples)
+        if self.recorder.error != None:
+            status += "  Error: {}".format(self.recorder.error)
+        if self.engine.error != None:
+            status += "  Acquisition error: {}".format(self.engine.error)
+        print(status,flush=True)
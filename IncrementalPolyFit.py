@@ -0,0 +1,224 @@
+import numpy as np
+import math
+
+class IncrementalPolyFit():
+    '''
+    Weighted least squares polynomial fit which keeps running sums of the
+    points rather than the points themselves. Adding or removing a point only
+    updates the sums, and the fit is solved from them at a cost which does not
+    depend on the number of points.
+    '''
+
+    #Removing a point which dominated the sums cancels most of their digits.
+    #The fit is marked stale if any sum falls below this fraction of its peak.
+    precisionLimit = 1e-6
+
+    def __init__(self,order=1):
+        '''
+        Constructor for the fit.
+
+        Arguments
+        ---------
+        order: Order of the polynomial, 1 for a straight line.
+        '''
+        self.order = order
+        self.nCoefficients = order + 1
+        #x values are measured from the first point added so the sums of high
+        #powers stay well scaled
+        self.xOffset = None
+        self.count = 0
+        #Sums of w*x**k for k up to 2*order, w*x**k*y for k up to order and w*y*y
+        self.xSums = np.zeros(2*order + 1)
+        self.xySums = np.zeros(order + 1)
+        self.yySum = 0.0
+        self.peakSums = np.zeros(2*order + 1)
+        #Set when the sums may have lost precision and should be rebuilt from
+        #the points
+        self.stale = False
+
+    def powers(self,x,maxPower):
+        '''
+        Returns the powers 0 to maxPower of x measured from the offset.
+        '''
+        return (x - self.xOffset)**np.arange(maxPower + 1)
+
+    def add(self,x,y,weight=1.0):
+        '''
+        Adds a point to the fit.
+        '''
+        if self.xOffset == None:
+            self.xOffset = float(x)
+        xPowers = self.powers(x,2*self.order)
+        self.xSums += weight*xPowers
+        self.xySums += weight*y*xPowers[0:self.nCoefficients]
+        self.yySum += weight*y*y
+        self.count += 1
+        np.maximum(self.peakSums,np.abs(self.xSums),out=self.peakSums)
+
+    def remove(self,x,y,weight=1.0):
+        '''
+        Removes a point previously added with the same x, y and weight.
+        '''
+        xPowers = self.powers(x,2*self.order)
+        self.xSums -= weight*xPowers
+        self.xySums -= weight*y*xPowers[0:self.nCoefficients]
+        self.yySum -= weight*y*y
+        self.count -= 1
+        if self.count == 0:
+            self.__init__(self.order)
+        elif (x == self.xOffset
+                or np.any(np.abs(self.xSums) < self.peakSums*self.precisionLimit)):
+            self.stale = True
+
+    def rebuild(self,x,y,weights=None):
+        '''
+        Starts the fit again from arrays of points, measuring x from their mean.
+        Used when the fit is stale or its order changes.
+        '''
+        self.__init__(self.order)
+        x = np.asarray(x,dtype=np.float64)
+        y = np.asarray(y,dtype=np.float64)
+        weights = np.ones(len(x)) if weights is None else np.asarray(weights,dtype=np.float64)
+        if len(x) == 0:
+            return
+        self.xOffset = float(np.mean(x))
+        xPowers = (x[:,None] - self.xOffset)**np.arange(2*self.order + 1)
+        self.xSums = weights.dot(xPowers)
+        self.xySums = (weights*y).dot(xPowers[:,0:self.nCoefficients])
+        self.yySum = float((weights*y).dot(y))
+        self.count = len(x)
+        self.peakSums = np.abs(self.xSums)
+
+    def normalMatrix(self):
+        '''
+        Returns the matrix of the normal equations.
+        '''
+        indices = np.arange(self.nCoefficients)
+        return self.xSums[indices[:,None] + indices[None,:]]
+
+    def solve(self):
+        '''
+        Returns the solution of the normal equations, in powers of x measured
+        from the offset, and the inverse of the normal matrix. The matrix is
+        scaled to a unit diagonal before inverting to keep it well conditioned.
+        '''
+        if self.count < self.nCoefficients:
+            raise ValueError("At least {} points are needed".format(self.nCoefficients))
+        matrix = self.normalMatrix()
+        scale = np.sqrt(np.abs(np.diag(matrix)))
+        scale[scale == 0] = 1.0
+        inverse = np.linalg.pinv(matrix/np.outer(scale,scale))/np.outer(scale,scale)
+        return inverse.dot(self.xySums), inverse
+
+    def coefficients(self):
+        '''
+        Returns the coefficients of the fitted polynomial, highest power first
+        as used by numpy.polyval.
+        '''
+        solution,inverse = self.solve()
+        return self.offsetTransform().dot(solution)
+
+    def offsetTransform(self):
+        '''
+        Returns the matrix which converts coefficients of powers of x measured
+        from the offset to coefficients of powers of x, highest power first.
+        '''
+        #(x - a)**k expanded with the binomial theorem
+        transform = np.zeros((self.nCoefficients,self.nCoefficients))
+        for k in range(self.nCoefficients):
+            for j in range(k + 1):
+                binomial = math.factorial(k)//(math.factorial(j)*math.factorial(k - j))
+                transform[self.order-j,k] = binomial*(-self.xOffset)**(k - j)
+        return transform
+
+    def predict(self,x):
+        '''
+        Returns the fitted values at x.
+        '''
+        solution,inverse = self.solve()
+        return np.polyval(solution[::-1],np.asarray(x,dtype=np.float64) - self.xOffset)
+
+    def residuals(self,x,y):
+        '''
+        Returns the residuals of points, y minus the fitted values.
+        '''
+        return np.asarray(y,dtype=np.float64) - self.predict(x)
+
+    def residualSumOfSquares(self):
+        '''
+        Returns the weighted sum of the squared residuals of every point.
+        '''
+        solution,inverse = self.solve()
+        rss = (self.yySum - 2*solution.dot(self.xySums)
+                + solution.dot(self.normalMatrix()).dot(solution))
+        return max(float(rss),0.0)
+
+    def rSquared(self):
+        '''
+        Returns the coefficient of determination of the fit.
+        '''
+        total = self.yySum - self.xySums[0]**2/self.xSums[0]
+        if total <= 0:
+            return 1.0
+        return 1.0 - self.residualSumOfSquares()/total
+
+    def residualVariance(self):
+        '''
+        Returns the estimated variance of a point of unit weight, or nan if
+        there are no spare degrees of freedom.
+        '''
+        degrees = self.count - self.nCoefficients
+        if degrees <= 0:
+            return float("nan")
+        return self.residualSumOfSquares()/degrees
+
+    def coefficientIntervals(self,confidence=0.95):
+        '''
+        Returns the half widths of the confidence intervals of the coefficients,
+        in the same order as coefficients. Assumes normally distributed errors
+        with variances inversely proportional to the weights.
+        '''
+        solution,inverse = self.solve()
+        #The change to powers of x is linear so carries the covariance through
+        transform = self.offsetTransform()
+        covariance = self.residualVariance()*transform.dot(inverse).dot(transform.T)
+        t = tQuantile(0.5 + confidence/2,self.count - self.nCoefficients)
+        return t*np.sqrt(np.abs(np.diag(covariance)))
+
+    def predictionIntervals(self,x,confidence=0.95):
+        '''
+        Returns the half widths of the confidence intervals of the fitted values
+        at x.
+        '''
+        solution,inverse = self.solve()
+        xPowers = (np.asarray(x,dtype=np.float64)[...,None] - self.xOffset)**np.arange(self.nCoefficients)
+        variance = np.einsum("...i,ij,...j->...",xPowers,inverse,xPowers)
+        t = tQuantile(0.5 + confidence/2,self.count - self.nCoefficients)
+        return t*np.sqrt(np.abs(variance)*self.residualVariance())
+
+def tQuantile(p,degrees):
+    '''
+    Returns the p quantile of Student's t distribution. Exact for 1 and 2
+    degrees of freedom and from a Cornish-Fisher expansion about the normal
+    quantile otherwise, which is accurate to about 0.1% from 3 degrees of
+    freedom. Returns nan for fewer than 1 degree of freedom.
+    '''
+    if degrees < 1:
+        return float("nan")
+    if degrees == 1:
+        return math.tan(math.pi*(p - 0.5))
+    if degrees == 2:
+        return (2*p - 1)/math.sqrt(2*p*(1 - p))
+    #Normal quantile by bisection of the error function
+    low,high = -40.0,40.0
+    for i in range(100):
+        middle = (low + high)/2
+        if 0.5*(1 + math.erf(middle/math.sqrt(2))) < p:
+            low = middle
+        else:
+            high = middle
+    z = (low + high)/2
+    v = float(degrees)
+    return (z + (z**3 + z)/(4*v) + (5*z**5 + 16*z**3 + 3*z)/(96*v**2)
+            + (3*z**7 + 19*z**5 + 17*z**3 - 15*z)/(384*v**3)
+            + (79*z**9 + 776*z**7 + 1482*z**5 - 1920*z**3 - 945*z)/(92160*v**4))
@@ -0,0 +1,160 @@
+import numpy as np
+import threading
+import time
+
+class Interlock():
+    '''
+    Hardware interlock binding a sensor threshold straight to a digital
+    output, for safety shutdowns which can not wait for the acquisition engine
+    or the user interface. Every sample is checked on the thread that adds it
+    to the sensor's data queue, normally the phidget data callback, and the
+    output is set as soon as a sample is outside the limits. The latency from
+    the raw time of the sample to the output being set is measured for each
+    trip. For a phidget the raw time is taken in the same callback, so this
+    is mostly the time taken to set the output.
+
+    Samples from a RemoteSensor are added in a worker process so it can not
+    be used with an interlock in the main process.
+    '''
+
+    def __init__(self,sensor,output,low=None,high=None,hysteresis=0.0,tripState=True,
+            latched=True,name=None,metrics=None):
+        '''
+        Constructor for the interlock. The interlock is armed straight away.
+
+        Arguments
+        ---------
+        sensor: Sensor whose samples are checked. Its calibration, if it has one
+        in use, is applied before they are checked.
+
+        output: DigitalOutputChannel set when the interlock trips.
+
+        low, high: The interlock trips on any sample at or below low or at or
+        above high. Either can be None.
+
+        hysteresis: Distance back inside the limits a sample must be to reset
+        an interlock which is not latched, as for the alarms of an AlarmEngine.
+
+        tripState: State the output is set to when the interlock trips. It is
+        set to the other state when the interlock is reset.
+
+        latched: If True the interlock stays tripped until reset is called.
+        Otherwise it is reset once the newest sample of a block of samples is
+        back inside the limits by the hysteresis. Any sample outside the limits
+        still trips it, so a breach which clears within one block sets the
+        output and then sets it back straight away.
+
+        name: Name used for the interlock.<name> latency timing and the
+        interlock.trips.<name> trip count in the metrics. Defaults to the
+        sensor's name.
+
+        metrics: PerformanceMetrics the latency timings and trip counts are
+        recorded in, or None.
+        '''
+        self.sensor = sensor
+        self.output = output
+        self.low = -np.inf if low == None else float(low)
+        self.high = np.inf if high == None else float(high)
+        self.hysteresis = float(hysteresis)
+        self.tripState = tripState
+        self.latched = latched
+        self.name = name if name != None else sensor.sensorName
+        self.metrics = metrics
+        #Held while the output is set so two threads can not set it at once
+        self.lock = threading.Lock()
+        self.tripped = False
+        self.tripCount = 0
+        #Time stamp and value of the sample that last tripped the interlock
+        self.tripTime = None
+        self.tripValue = None
+        #Seconds from the sample's raw time to the output being set, last trip
+        self.latency = None
+        self.error = None
+        if not hasattr(sensor.dataQ,"addListener"):
+            raise TypeError("{} can not be used with an interlock, its samples are "
+                    "not added in this process".format(sensor.sensorName))
+        sensor.dataQ.addListener(self.onSamples)
+
+    def onSamples(self,values,rawTimes):
+        '''
+        Checks samples as they are added to the sensor's data queue and trips
+        or resets the interlock.
+        '''
+        sensor = self.sensor
+        if sensor.useCallibration and sensor.calibration != None:
+            values = sensor.calibration.apply(values)
+        if len(values) == 1:
+            #Single samples from a callback are checked without numpy
+            value = float(values[0])
+            if value >= self.high or value <= self.low:
+                self.trip(value,rawTimes[0])
+            elif (not self.latched and value < self.high - self.hysteresis
+                    and value > self.low + self.hysteresis):
+                self.release()
+            return
+        values = np.asarray(values,dtype=np.float64)
+        breached = (values >= self.high) | (values <= self.low)
+        if breached.any():
+            #The first sample outside trips the interlock
+            index = int(np.argmax(breached))
+            self.trip(float(values[index]),rawTimes[index])
+        if not self.latched:
+            #Only the newest sample outside the hysteresis band can reset it
+            cleared = (values < self.high - self.hysteresis) & (values > self.low + self.hysteresis)
+            decided = np.flatnonzero(breached | cleared)
+            if len(decided) > 0 and not breached[decided[-1]]:
+                self.release()
+
+    def trip(self,value,rawTime):
+        '''
+        Trips the interlock on a sample outside the limits, setting the output,
+        unless it is already tripped.
+        '''
+        if self.tripped:
+            return
+        try:
+            with self.lock:
+                if self.tripped:
+                    return
+                #Set first so the trip is known when the output changes
+                self.tripTime = float(rawTime)
+                self.tripValue = value
+                self.output.setState(self.tripState)
+                self.tripped = True
+                self.tripCount += 1
+            self.latency = time.time() - self.tripTime
+            if self.metrics != None:
+                self.metrics.increment("interlock.trips")
+                self.metrics.increment("interlock.trips." + self.name)
+                self.metrics.addTiming("interlock." + self.name,self.latency)
+        except Exception as error:
+            #Must not raise into the phidget callback. Leave the error to be shown
+            self.error = error
+
+    def release(self):
+        '''
+        Resets an interlock which is not latched once the samples are back
+        inside the limits, catching any error setting the output.
+        '''
+        if not self.tripped:
+            return
+        try:
+            self.reset()
+        except Exception as error:
+            self.error = error
+
+    def reset(self):
+        '''
+        Resets a tripped interlock, setting the output back to its normal state.
+        If a sample is still outside the limits it trips again.
+        '''
+        with self.lock:
+            if self.tripped:
+                self.output.setState(not self.tripState)
+                self.tripped = False
+
+    def close(self):
+        '''
+        Stops checking the sensor's samples. The output is left as it is.
+        '''
+        self.sensor.dataQ.removeListener(self.onSamples)
@@ -0,0 +1,178 @@
+import numpy as np
+
+class LiveDecimator():
+    '''
+    Min/max summary of a live curve drawn over a fixed span of time, such as a
+    sensor's refresh period, on a plot a given number of pixels wide. The span
+    is split into one bin per pixel and only the smallest and largest sample
+    of each bin are kept, so every peak is still drawn while the points drawn
+    never grow beyond two per pixel however many samples there are. Samples
+    are added as the curve grows and only update the bins they fall in. Bins
+    are aligned to multiples of the bin width so a curve which scrolls, losing
+    its oldest samples as new ones arrive, only drops the bins it has left.
+    '''
+
+    def __init__(self,span,pixels=1000):
+        '''
+        Constructor for the decimator.
+
+        Arguments
+        ---------
+        span: Length of x the curve is drawn over, in the same units as x.
+
+        pixels: Width of the plot in pixels. One bin is kept per pixel.
+        '''
+        self.span = float(span)
+        self.resize(pixels)
+
+    def resize(self,pixels):
+        '''
+        Changes the number of bins to suit a plot of a new width. Every bin is
+        emptied so the whole curve is summarised again by the next update.
+        '''
+        self.pixels = max(int(pixels),1)
+        self.binWidth = self.span/self.pixels
+        self.allocate(self.pixels)
+        self.clear()
+
+    def allocate(self,bins):
+        '''
+        Creates empty bins. Empty bins have a minimum of inf and maximum of
+        -inf so any sample replaces them.
+        '''
+        self.minX = np.zeros(bins)
+        self.maxX = np.zeros(bins)
+        self.minY = np.full(bins,np.inf)
+        self.maxY = np.full(bins,-np.inf)
+
+    def clear(self):
+        '''
+        Empties every bin.
+        '''
+        self.minY.fill(np.inf)
+        self.maxY.fill(-np.inf)
+        #First and last x of the curve summarised and the bin of the first x,
+        #which is held in the first bin of the arrays
+        self.firstX = None
+        self.lastX = None
+        self.firstBin = 0
+        #Number of bins up to and including the last holding any samples
+        self.used = 0
+        #Curve given to the last update while it was too short to need binning
+        self.raw = None
+
+    def update(self,x,y):
+        '''
+        Brings the summary up to date with a curve which has grown since the
+        last call, such as the plot buffer of a sensor. Only the samples after
+        those already added are binned and if the curve has lost its oldest
+        samples only the bins they were in are changed. If the curve has been
+        cleared it is summarised again from the start. Curves with no more than
+        two samples per pixel are drawn as they are, so view must be called
+        before the curve is next changed.
+        '''
+        n = len(x)
+        if n <= 2*self.pixels:
+            if self.firstX != None:
+                self.clear()
+            self.raw = (x,y)
+            return
+        self.raw = None
+        x = np.asarray(x,dtype=np.float64)
+        y = np.asarray(y,dtype=np.float64)
+        if (self.firstX != None and self.firstX <= x[0] <= self.lastX
+                and x[-1] >= self.lastX):
+            #The curve has grown from where it was last time
+            start = int(np.searchsorted(x,self.lastX,side="right"))
+            if x[0] != self.firstX:
+                self.trim(x[0:start],y[0:start])
+        else:
+            self.clear()
+            self.firstBin = int(np.floor(x[0]/self.binWidth))
+            start = 0
+        self.firstX = float(x[0])
+        self.lastX = float(x[-1])
+        if start < n:
+            self.add(x[start:n],y[start:n])
+
+    def trim(self,x,y):
+        '''
+        Drops the bins before the first sample of a curve which has lost its
+        oldest samples. x and y are the samples already added.
+        '''
+        firstBin = int(np.floor(x[0]/self.binWidth))
+        shift = firstBin - self.firstBin
+        if shift > 0:
+            keep = max(self.used - shift,0)
+            for array,empty in ((self.minX,0.0),(self.maxX,0.0),(self.minY,np.inf),(self.maxY,-np.inf)):
+                array[0:keep] = array[shift:shift + keep]
+                array[keep:self.used] = empty
+            self.used = keep
+            self.firstBin = firstBin
+        #The first bin may have lost some of its samples so is filled again from
+        #those left in it
+        self.minY[0] = np.inf
+        self.maxY[0] = -np.inf
+        end = int(np.searchsorted(x,(firstBin + 1)*self.binWidth,side="right")) + 1
+        end = np.count_nonzero(np.floor(x[0:end]/self.binWidth) <= firstBin)
+        self.add(x[0:end],y[0:end])
+
+    def add(self,x,y):
+        '''
+        Adds a block of new samples to the bins they fall in.
+        '''
+        bins = np.floor(x/self.binWidth).astype(np.int64) - self.firstBin
+        np.clip(bins,0,None,out=bins)
+        last = int(bins.max())
+        if last >= len(self.minY):
+            #The curve has run past its span, such as a late refresh
+            self.grow(max(last + 1,2*len(self.minY)))
+        #Sort by bin then value so the first and last sample of each bin's
+        #group are its smallest and largest
+        order = np.lexsort((y,bins))
+        sortedBins = bins[order]
+        starts = np.flatnonzero(np.r_[True,sortedBins[1:] != sortedBins[:-1]])
+        ends = np.r_[starts[1:],len(bins)] - 1
+        groupBins = sortedBins[starts]
+        minIndex = order[starts]
+        maxIndex = order[ends]
+        #Only bins already holding samples, at most the first of the block,
+        #can keep their current extremes. Of equal samples the first smallest
+        #and last largest are kept, the same as within a block.
+        smaller = y[minIndex] < self.minY[groupBins]
+        self.minY[groupBins[smaller]] = y[minIndex[smaller]]
+        self.minX[groupBins[smaller]] = x[minIndex[smaller]]
+        larger = y[maxIndex] >= self.maxY[groupBins]
+        self.maxY[groupBins[larger]] = y[maxIndex[larger]]
+        self.maxX[groupBins[larger]] = x[maxIndex[larger]]
+        self.used = max(self.used,last + 1)
+
+    def grow(self,bins):
+        '''
+        Adds empty bins to the end, keeping the existing ones.
+        '''
+        old = (self.minX,self.maxX,self.minY,self.maxY)
+        self.allocate(bins)
+        for new,existing in zip((self.minX,self.maxX,self.minY,self.maxY),old):
+            new[0:len(existing)] = existing
+
+    def view(self):
+        '''
+        Returns new x and y arrays to draw: the smallest and largest sample of
+        every bin holding any, in the order they occur, or a copy of a short
+        curve.
+        '''
+        if self.raw != None:
+            return np.array(self.raw[0],dtype=np.float64), np.array(self.raw[1],dtype=np.float64)
+        k = self.used
+        minX, maxX = self.minX[0:k], self.maxX[0:k]
+        minY, maxY = self.minY[0:k], self.maxY[0:k]
+        filled = minY <= maxY
+        minFirst = minX <= maxX
+        x = np.empty((k,2))
+        y = np.empty((k,2))
+        x[:,0] = np.where(minFirst,minX,maxX)
+        x[:,1] = np.where(minFirst,maxX,minX)
+        y[:,0] = np.where(minFirst,minY,maxY)
+        y[:,1] = np.where(minFirst,maxY,minY)
+        return x[filled].reshape(-1), y[filled].reshape(-1)
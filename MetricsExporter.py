@@ -0,0 +1,80 @@
+import threading
+import socket
+import json
+
+class MetricsExporter(threading.Thread):
+    '''
+    Exports snapshots of PerformanceMetrics at a fixed interval for long runs
+    to be monitored. Each snapshot is written as one line of JSON, either
+    appended to a local file or sent as a UDP datagram to a collector.
+    '''
+
+    def __init__(self,metrics,target,interval=10.0):
+        '''
+        Constructor for the exporter. Call start to begin exporting.
+
+        Arguments
+        ---------
+        metrics: PerformanceMetrics to export.
+
+        target: Path of the file to append to, or "udp://host:port" to send
+        each snapshot to a socket.
+
+        interval: Time in seconds between snapshots.
+        '''
+        threading.Thread.__init__(self,daemon=True)
+        self.metrics = metrics
+        self.target = target
+        self.interval = interval
+        self.stopEvent = threading.Event()
+        self.exportedSnapshots = 0
+        self.error = None
+        if target.startswith("udp://"):
+            host,port = target[len("udp://"):].rsplit(":",1)
+            self.address = (host,int(port))
+            self.socket = socket.socket(socket.AF_INET,socket.SOCK_DGRAM)
+            self.file = None
+        else:
+            self.socket = None
+            self.file = open(target,"a")
+
+    def run(self):
+        '''
+        Main loop of the exporter thread. Exports a snapshot every interval
+        until close is called, then a last one.
+        '''
+        previous = self.metrics.snapshot()
+        while not self.stopEvent.wait(self.interval):
+            previous = self.export(previous)
+        self.export(previous)
+        if self.file != None:
+            self.file.close()
+        else:
+            self.socket.close()
+
+    def export(self,previous):
+        '''
+        Exports a snapshot with rates since the previous one and returns it.
+        Errors are kept rather than raised so a missing collector never stops
+        the application.
+        '''
+        snapshot = self.metrics.snapshot(previous)
+        line = json.dumps(snapshot) + "\n"
+        try:
+            if self.file != None:
+                self.file.write(line)
+                self.file.flush()
+            else:
+                self.socket.sendto(line.encode(),self.address)
+            self.exportedSnapshots += 1
+        except (OSError,ValueError) as e:
+            self.error = e
+        return snapshot
+
+    def close(self):
+        '''
+        Stops exporting and waits for the last snapshot to be written.
+        '''
+        self.stopEvent.set()
+        if self.is_alive():
+            self.join()
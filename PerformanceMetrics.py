@@ -0,0 +1,127 @@
+from PhidgetDataLogger.RingBuffer import RingBuffer
+import numpy as np
+import threading
+import time
+import sys
+
+class PerformanceMetrics():
+    '''
+    Thread safe store of the counters, gauges and timings measured on the hot
+    paths of the application, such as the samples acquired from each sensor,
+    the backlog of each data queue and the time taken by each plot update.
+    Snapshots of every metric are taken for the performance overlay of the
+    main application and for a MetricsExporter.
+    '''
+
+    #Number of the most recent durations kept for each timing
+    timingCapacity = 1024
+
+    def __init__(self):
+        '''
+        Constructor for the metrics.
+        '''
+        self.lock = threading.Lock()
+        #Running totals such as samples acquired, keyed by name
+        self.counters = {}
+        #Latest values such as queue depths, keyed by name
+        self.gauges = {}
+        #Recent durations in seconds and the count of every duration, keyed by name
+        self.timings = {}
+        self.timingCounts = {}
+
+    def increment(self,name,n=1):
+        '''
+        Adds n to a counter.
+        '''
+        with self.lock:
+            self.counters[name] = self.counters.get(name,0) + n
+
+    def setGauge(self,name,value):
+        '''
+        Sets the latest value of a gauge.
+        '''
+        with self.lock:
+            self.gauges[name] = value
+
+    def addTiming(self,name,seconds):
+        '''
+        Adds a duration in seconds to a timing.
+        '''
+        with self.lock:
+            if name not in self.timings:
+                self.timings[name] = RingBuffer(self.timingCapacity)
+                self.timingCounts[name] = 0
+            self.timings[name].append(seconds)
+            self.timingCounts[name] += 1
+
+    def snapshot(self,previous=None):
+        '''
+        Returns a dictionary of every metric. Counters are given as totals and,
+        if a previous snapshot is given, as rates per second since it was taken.
+        Timings are summarised in ms by the median, 99th percentile and maximum
+        of their recent durations.
+        '''
+        with self.lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            durations = {name:buffer.view(0).copy() for name,buffer in self.timings.items()}
+            counts = dict(self.timingCounts)
+        now = time.monotonic()
+        rates = {}
+        if previous != None and now > previous["time"]:
+            elapsed = now - previous["time"]
+            for name,count in counters.items():
+                rates[name] = (count - previous["counters"].get(name,0))/elapsed
+        timings = {}
+        for name,values in durations.items():
+            values = values*1000.0
+            timings[name] = {"count":counts[name],"p50":float(np.percentile(values,50)),
+                    "p99":float(np.percentile(values,99)),"max":float(values.max())}
+        return {"time":now,"wallTime":time.time(),"counters":counters,"rates":rates,
+                "gauges":gauges,"timings":timings}
+
+def formatSnapshot(snapshot):
+    '''
+    Returns a snapshot as lines of text for display: a row per sensor with its
+    sample rate, data queue backlog and dropped samples followed by the
+    recorder's throughput, the alarm actions run and a row per timing.
+    '''
+    counters = snapshot["counters"]
+    rates = snapshot["rates"]
+    gauges = snapshot["gauges"]
+    lines = ["{:<20} {:>10} {:>8} {:>8}".format("Sensor","Samples/s","Backlog","Dropped")]
+    for name in sorted(key[len("samples."):] for key in counters if key.startswith("samples.")):
+        lines.append("{:<20.20} {:>10.1f} {:>8} {:>8}".format(name,rates.get("samples." + name,0.0),
+                gauges.get("backlog." + name,0),gauges.get("dropped." + name,0)))
+    if "recorder.samples" in counters:
+        lines.append("")
+        lines.append("Recorder {:.0f} samples/s  {:.2f} MB/s  queue {}  dropped {}".format(
+                rates.get("recorder.samples",0.0),rates.get("recorder.bytes",0.0)/1e6,
+                gauges.get("recorder.queue",0),counters.get("recorder.dropped",0)))
+    if "alarm.dispatched" in counters:
+        lines.append("")
+        lines.append("Alarm actions {}  coalesced {}  suppressed {}  timed out {}  failed {}".format(
+                counters.get("alarm.dispatched",0),counters.get("alarm.coalesced",0),
+                counters.get("alarm.suppressed",0),counters.get("alarm.timeouts",0),
+                counters.get("alarm.errors",0)))
+    if len(snapshot["timings"]) > 0:
+        lines.append("")
+        lines.append("{:<20} {:>10} {:>8} {:>8}".format("Timing (ms)","p50","p99","max"))
+        for name,timing in sorted(snapshot["timings"].items()):
+            lines.append("{:<20.20} {:>10.2f} {:>8.2f} {:>8.2f}".format(name,timing["p50"],
+                    timing["p99"],timing["max"]))
+    return "\n".join(lines)
+
+def peakMemory():
+    '''
+    Returns the peak resident memory of this process since it started in MB,
+    or None if it can not be measured on this platform. The peak never falls,
+    so it includes everything the process has done before.
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #Reported in bytes on macOS and kB elsewhere
+    return peak/1e6 if sys.platform == "darwin" else peak/1e3
@@ -5,6 +5,12 @@ from pyqtgraph.ptime import time as ptime
 from PhidgetDataLogger.StrainSensor import StrainSensor
 from PhidgetDataLogger.StoredDataPlotter import StoredDataPlotter
 from PhidgetDataLogger.StrainCalibrator import StrainCalibrator
+from PhidgetDataLogger.Recorder import Recorder, recordWriters, openRecordWriter
+from PhidgetDataLogger.AcquisitionEngine import AcquisitionEngine
+from PhidgetDataLogger.PerformanceMetrics import PerformanceMetrics, formatSnapshot
+from PhidgetDataLogger.MetricsExporter import MetricsExporter
+from PhidgetDataLogger.AlarmEngine import formatEvent
+from PhidgetDataLogger.Calibration import loadCalibration
 from PhidgetDataLogger.aqua.qsshelper import QSSHelper
 import time
 import datetime
@@ -16,6 +22,10 @@ class PhidgetDisplayApp(QtGui.QWidget):
     and callibration UIs.
     '''
 
+    #Record writer used for each output file extension
+    recordWriters = recordWriters
+    recordingFilter = "Text recording (*.csv);;Binary recording (*.pdl)"
+
     def __init__(self,sensors,xDataRanges=None,yDataRanges=None,parent=None):
         '''
         Constructor for the entire Phidget application. Takes list of sensors as
@@ -32,10 +42,23 @@ class PhidgetDisplayApp(QtGui.QWidget):
         self.xDataRanges = xDataRanges
         #SDPs (Stored Data Plotters) are usd to plot data from files.
         self.SDPs = []
+        #Recorder writing the current recording on a background thread
+        self.recorder = None
+        #Sample rates, queue depths and hot path timings shown in the
+        #performance overlay and optionally exported
+        self.metrics = PerformanceMetrics()
+        self.metricsExporter = None
+        #Sensors are drained, recorded and checked for alarms on background
+        #threads so the user interface can not hold up recording
+        self.engine = AcquisitionEngine(self.sensors,metrics=self.metrics)
+        self.calibratingSensor = None
         self.loadSounds()
         self.setUpPlotWidget()
         self.setUpUIWidgets()
         self.setUpMainWidget()
+        self.pushRecordedChannels()
+        self.pushAlarmSettings()
+        self.engine.start()
         self.connectPlotUpdates()
         qss = QSSHelper.open_qss(os.path.join(self.styleSheetPath,"aqua.qss"))
         self.app.setStyleSheet(qss)
@@ -47,6 +70,10 @@ class PhidgetDisplayApp(QtGui.QWidget):
         Starts the main application window. Is blocking.
         '''
         self.app.exec_()
+        self.engine.stop()
+        self.stopRecording()
+        if self.metricsExporter != None:
+            self.metricsExporter.close()
 
 
     def setUpPlotWidget(self):
@@ -70,15 +97,14 @@ class PhidgetDisplayApp(QtGui.QWidget):
             #Set X and Y data ranges if given use refresh priod for x if not.
             if self.yDataRanges != None:
                 plot.setYRange(self.yDataRanges[i][0],self.yDataRanges[i][1],padding=0)
-            if self.xDataRanges != None:
-                plot.setXRange(self.xDataRanges[i][0],self.xDataRanges[i][1],padding=0)
-            else:
-                plot.setXRange(0,self.sensors[i].refreshPeriod/1000.0,padding=0)
+            plot.setXRange(*self.sweepXRange(i),padding=0)
             #Add axis lables to plots
             plot.setLabels(left=('Sensor units', self.sensors[i].sensorUnits))
             plot.setLabels(bottom=('Time', 's'))
             plot.setLabels(top=str(self.sensors[i].sensorName))
             plot.showGrid(x=True,y=True)
+            #Plot data is decimated to the width of the plot so is updated on resize
+            plot.plotItem.vb.sigResized.connect(self.pushPlotWidths)
             self.plots.append(plot)
             self.curves.append(curve)
             #Arrange plots on grid.
@@ -88,6 +114,15 @@ class PhidgetDisplayApp(QtGui.QWidget):
                 plotLayout.addWidget(plot,coords[i][0],coords[i][1])
         self.plotLayout = plotLayout
 
+    def sweepXRange(self,i):
+        '''
+        Returns the x range of a plot in sweep mode, the x data range if one was
+        given or the sensor's refresh period if not.
+        '''
+        if self.xDataRanges != None:
+            return self.xDataRanges[i][0], self.xDataRanges[i][1]
+        return 0, self.sensors[i].refreshPeriod/1000.0
+
     def setUpUIWidgets(self):
         '''
         Creates all not grpahing UI elements and adds them to the applicatiom
@@ -98,6 +133,7 @@ class PhidgetDisplayApp(QtGui.QWidget):
         for i in range(len(self.sensors)):
             checkWidget = QtGui.QCheckBox("Record {}".format(self.sensors[i].sensorName))
             checkWidget.setChecked(True)
+            checkWidget.clicked.connect(self.pushRecordedChannels)
             self.checkWidgets.append(checkWidget)
 
         #File selection for output button and label to display output path
@@ -192,6 +228,22 @@ class PhidgetDisplayApp(QtGui.QWidget):
         channelBox.setLayout(channelLayout)
         UILayout.addWidget(channelBox)
 
+        #Display mode of each plot. Sweep starts again from zero each refresh
+        #period and scroll moves along with the latest refresh period.
+        self.displayModeMenus = []
+        displayBox = QtGui.QGroupBox("Plot display")
+        displayLayout = QtGui.QGridLayout()
+        for i in range(len(self.sensors)):
+            displayModeMenu = QtGui.QComboBox()
+            displayModeMenu.addItems(["Sweep","Scroll"])
+            displayModeMenu.setCurrentIndex(self.sensors[i].displayModes.index(self.sensors[i].displayMode))
+            displayModeMenu.currentIndexChanged.connect(self.onDisplayModeChange)
+            self.displayModeMenus.append(displayModeMenu)
+            displayLayout.addWidget(QtGui.QLabel(self.sensors[i].sensorName),i,0)
+            displayLayout.addWidget(displayModeMenu,i,1)
+        displayBox.setLayout(displayLayout)
+        UILayout.addWidget(displayBox)
+
         #Clock/timer box
         clockBox = QtGui.QGroupBox("Set recording duration")
         clockLayout = QtGui.QVBoxLayout()
@@ -209,6 +261,31 @@ class PhidgetDisplayApp(QtGui.QWidget):
         #Add recording button by itself
         UILayout.addWidget(self.recordingButton)
 
+        #Label showing how much has been written and dropped by the recorder
+        self.recorderStatusText = QtGui.QLabel("")
+        self.recorderStatusText.setToolTip("Samples written to and dropped from the current recording.")
+        self.recorderStatusText.setFrameShape(QtWidgets.QFrame.Panel)
+        self.recorderStatusText.setFrameShadow(QtWidgets.QFrame.Sunken)
+        self.recorderStatusText.setWordWrap(True)
+        UILayout.addWidget(self.recorderStatusText)
+        self.recorderStatusTimer = QtCore.QTimer()
+        self.recorderStatusTimer.timeout.connect(self.updateRecorderStatus)
+        self.recorderStatusTimer.start(500)
+
+        #Performance overlay drawn over the plots
+        self.showMetricsToggle = QtGui.QCheckBox("Show performance overlay")
+        self.showMetricsToggle.setToolTip("Shows sample rates, queue backlogs, dropped samples and update timings.")
+        self.showMetricsToggle.stateChanged.connect(self.onShowMetricsToggle)
+        UILayout.addWidget(self.showMetricsToggle)
+        self.metricsOverlay = QtGui.QLabel(self)
+        self.metricsOverlay.setStyleSheet("background-color: rgba(0,0,0,180); color: rgb(220,220,220);"
+                "font-family: monospace; padding: 6px;")
+        self.metricsOverlay.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.metricsOverlay.hide()
+        self.metricsSnapshot = None
+        self.metricsTimer = QtCore.QTimer()
+        self.metricsTimer.timeout.connect(self.updateMetricsOverlay)
+
         #User controlled alarms for unsafe values control box.
         self.alarmFunc = None
         self.alarms = []
@@ -217,6 +294,9 @@ class PhidgetDisplayApp(QtGui.QWidget):
         alarmLayout.addWidget(QtGui.QLabel("Alarm active"),0,0)
         alarmLayout.addWidget(QtGui.QLabel("Low alarm"),0,1)
         alarmLayout.addWidget(QtGui.QLabel("High alarm"),0,2)
+        alarmLayout.addWidget(QtGui.QLabel("Hysteresis"),0,3)
+        alarmLayout.addWidget(QtGui.QLabel("Rate (/s)"),0,4)
+        alarmLayout.addWidget(QtGui.QLabel("Hold (s)"),0,5)
         for i in range(len(self.sensors)):
             alarmActive = QtGui.QCheckBox(self.sensors[i].sensorName)
             alarmHigh = QtGui.QDoubleSpinBox()
@@ -231,12 +311,34 @@ class PhidgetDisplayApp(QtGui.QWidget):
             alarmHigh.setMaximum(1000)
             alarmLow.setMinimum(-1000)
             alarmLow.setMaximum(1000)
-            self.alarms.append([alarmActive,alarmHigh,alarmLow])
+            #Distance back inside the limits needed to clear the alarm, rate of
+            #change which also triggers it (0 is off) and the time the alarm
+            #condition must last before it is triggered
+            alarmHysteresis = QtGui.QDoubleSpinBox()
+            alarmRate = QtGui.QDoubleSpinBox()
+            alarmHold = QtGui.QDoubleSpinBox()
+            for spinBox in (alarmHysteresis,alarmRate,alarmHold):
+                spinBox.setSizePolicy(QtGui.QSizePolicy.Minimum ,QtGui.QSizePolicy.Minimum)
+                spinBox.setMinimumSize(0,0)
+                spinBox.setDecimals(3)
+                spinBox.setMinimum(0)
+            alarmHysteresis.setMaximum(1000)
+            alarmRate.setMaximum(100000)
+            alarmHold.setMaximum(3600)
+            self.alarms.append([alarmActive,alarmHigh,alarmLow,alarmHysteresis,alarmRate,alarmHold])
             self.alarms[-1][0].clicked.connect(self.onAlarmActivationChange)
-            alarmLayout.addWidget(alarmActive,i+1,0)
-            alarmLayout.addWidget(alarmHigh,i+1,1)
-            alarmLayout.addWidget(alarmLow,i+1,2)
-            self.alarmBox.setLayout(alarmLayout)
+            for column,widget in enumerate(self.alarms[-1]):
+                if column > 0:
+                    widget.valueChanged.connect(self.pushAlarmSettings)
+                alarmLayout.addWidget(widget,i+1,column)
+        #Time stamped log of every alarm raised and cleared
+        self.alarmLog = QtGui.QPlainTextEdit()
+        self.alarmLog.setReadOnly(True)
+        self.alarmLog.setMaximumBlockCount(200)
+        self.alarmLog.setMaximumHeight(100)
+        alarmLayout.addWidget(QtGui.QLabel("Alarm events"),len(self.sensors)+1,0)
+        alarmLayout.addWidget(self.alarmLog,len(self.sensors)+2,0,1,6)
+        self.alarmBox.setLayout(alarmLayout)
         UILayout.addWidget(self.alarmBox)
 
         #Callibration control box. Only add if there are sensors of type strain
@@ -288,32 +390,92 @@ class PhidgetDisplayApp(QtGui.QWidget):
 
     def connectPlotUpdates(self):
         '''
-        Defines the function for replotting graphs in real time and handling user set alarms.
+        Connects updatePlots to a timer so the graphs are redrawn in real time.
         '''
-        #def function to be called to update live plots
-        def update():
-            for i in range(len(self.sensors)):
-                #Update plots and write to file if recording
-                x, y, plotX, plotY = self.sensors[i].getData()
-                self.curves[i].setData(plotX,plotY)
-                self.writeDataToFile(x,y,self.sensors[i],self.checkWidgets[i])
-                #Handle alarms
-                alarm = self.alarms[i]
-                if alarm[0].isChecked() and len(y) > 0:
-                    if y[-1] <= alarm[1].value() or y[-1] >= alarm[2].value():
-                        self.plots[i].setBackground((128,10,10))
-                        if self.alarmFunc != None:
-                            self.alarmFunc(self.alarmFuncArgs)
-                        if self.alarmSound.isFinished():
-                            self.alarmSound.play()
-                    else:
-                        pass#self.plots[i].setBackground((40,40,40))
-
+        self.plottedSequences = [None]*len(self.sensors)
+        self.lastPlotUpdate = None
         #Connect function to timer. Will trigger every timeout.
         self.replotTimer = QtCore.QTimer()
-        self.replotTimer.timeout.connect(update)
+        self.replotTimer.timeout.connect(self.updatePlots)
         self.replotTimer.start(45)
 
+    def updatePlots(self):
+        '''
+        Replots graphs with new data and shows user set alarms. Data is only
+        read from the acquisition engine's snapshots, which are recorded and
+        checked for alarms on its own threads.
+        '''
+        start = time.perf_counter()
+        if self.lastPlotUpdate != None:
+            #Grows beyond the timer interval when drawing the plots falls behind
+            self.metrics.addTiming("ui.frameInterval",start - self.lastPlotUpdate)
+        self.lastPlotUpdate = start
+        for i in range(len(self.sensors)):
+            sequence, plotX, plotY, alarmed = self.engine.takeSnapshot(i)
+            #Only redraw plots with new data
+            if sequence != self.plottedSequences[i]:
+                self.curves[i].setData(plotX,plotY)
+                self.plottedSequences[i] = sequence
+                #Scrolling plots show the latest refresh period
+                if self.sensors[i].displayMode == "scroll" and len(plotX) > 0:
+                    x0,x1 = self.sweepXRange(i)
+                    self.plots[i].setXRange(plotX[-1] - (x1 - x0),plotX[-1],padding=0)
+            #Handle alarms
+            if alarmed and self.alarms[i][0].isChecked():
+                self.plots[i].setBackground((128,10,10))
+                if self.alarmSound.isFinished():
+                    self.alarmSound.play()
+        for event in self.engine.alarms.takeEvents():
+            self.alarmLog.appendPlainText(formatEvent(event))
+        self.metrics.addTiming("ui.update",time.perf_counter() - start)
+
+    def onShowMetricsToggle(self):
+        '''
+        Shows or hides the performance overlay.
+        '''
+        if self.showMetricsToggle.isChecked():
+            self.metricsSnapshot = self.metrics.snapshot()
+            self.metricsTimer.start(1000)
+            self.updateMetricsOverlay()
+            self.metricsOverlay.show()
+            self.metricsOverlay.raise_()
+        else:
+            self.metricsTimer.stop()
+            self.metricsOverlay.hide()
+
+    def updateMetricsOverlay(self):
+        '''
+        Shows the latest metrics, with rates since the last update, in the
+        performance overlay.
+        '''
+        self.metricsSnapshot = self.metrics.snapshot(self.metricsSnapshot)
+        self.metricsOverlay.setText(formatSnapshot(self.metricsSnapshot))
+        self.metricsOverlay.adjustSize()
+        self.positionMetricsOverlay()
+
+    def positionMetricsOverlay(self):
+        '''
+        Places the performance overlay in the top right corner of the window.
+        '''
+        self.metricsOverlay.move(max(0,self.width() - self.metricsOverlay.width() - 20),20)
+
+    def resizeEvent(self,event):
+        '''
+        Keeps the performance overlay in the corner when the window is resized.
+        '''
+        QtGui.QWidget.resizeEvent(self,event)
+        self.positionMetricsOverlay()
+
+    def startMetricsExport(self,target,interval=10.0):
+        '''
+        Starts exporting the metrics to a file or "udp://host:port" every
+        interval seconds for long runs to be monitored. See MetricsExporter.
+        '''
+        if self.metricsExporter != None:
+            self.metricsExporter.close()
+        self.metricsExporter = MetricsExporter(self.metrics,target,interval)
+        self.metricsExporter.start()
+
     def loadSounds(self):
         '''
         Loads any sounds required for the applicaiton and store them as QSound objects.
@@ -339,11 +501,14 @@ class PhidgetDisplayApp(QtGui.QWidget):
         Handles the seletion of an output file.
         '''
         fileName, filter = QtGui.QFileDialog.getSaveFileName(parent=self,
-                caption='Select output file', filter='*.csv')
+                caption='Select output file', filter=self.recordingFilter)
         if fileName != "":
             self.recordingButton.setEnabled(True)
-            if not fileName.endswith(".csv"):
-                fileName = fileName + ".csv"
+            if os.path.splitext(fileName)[1] not in self.recordWriters:
+                if "*.pdl" in filter:
+                    fileName = fileName + ".pdl"
+                else:
+                    fileName = fileName + ".csv"
             self.currentOutputFile = fileName
             self.outputFileText.setText(fileName)
 
@@ -354,14 +519,14 @@ class PhidgetDisplayApp(QtGui.QWidget):
         #Stops live plotting on main window while sensor is being callibrated
         for i in range(len(self.sensors)):
             if self.sensors[i].sensorName == str(self.chooseSensorMenu.currentText()):
+                #Hand the sensor over to the callibration window
+                self.onReconnectPress()
+                self.engine.setPaused(i,True)
+                self.calibratingSensor = i
                 self.sensors[i].useCallibration = False
                 self.CallibrationWindow = StrainCalibrator(self.sensors[i])
                 fun = lambda: self.reConnectBtn.setEnabled(True)
                 self.CallibrationWindow.destroyed.connect(fun)
-                try:
-                    self.replotTimer.disconnect()
-                except TypeError:
-                    pass
 
     def onRecordingPress(self):
         '''
@@ -391,37 +556,86 @@ class PhidgetDisplayApp(QtGui.QWidget):
                 fileName = self.currentOutputFile.split(".")
                 fileName = "{}__{}__.{}".format(fileName[0],timeStamp,fileName[1])
                 fileName = os.path.abspath(fileName)
-                self.file = open(fileName,"w+")
-                self.insertHeader()
+                self.startRecording(fileName)
         else:
+            self.stopRecording()
             self.recordingButton.setText("Start recording")
             self.recordingButton.setIcon(self.style().standardIcon(QtGui.QStyle.SP_MediaPlay))
 
     def onReconnectPress(self):
         '''
-        Reconnects the plots on the main window to the sensors resuming live plotting
-        in the main window
+        Hands the sensor being callibrated back to the acquisition engine, resuming
+        its live plotting and recording in the main window
         '''
-        self.connectPlotUpdates()
+        if self.calibratingSensor != None:
+            self.engine.setPaused(self.calibratingSensor,False)
+            self.calibratingSensor = None
         self.reConnectBtn.setEnabled(False)
 
-    def insertHeader(self):
+    def startRecording(self,fileName):
         '''
-        Adds column headings to start of output file has header.
+        Opens the output file and starts the recorder thread which writes to it.
         '''
-        headerString = ("# Channel name (units)"
-                " \t,\t Time (S) \t,\t Sensor value ()")
-        self.file.write(headerString)
+        self.stopRecording()
+        self.recorder = Recorder(openRecordWriter(fileName,self.sensors),metrics=self.metrics)
+        self.recorder.start()
+        self.engine.setRecorder(self.recorder)
 
-    def writeDataToFile(self,xs,ys,sensor,widget):
+    def stopRecording(self):
         '''
-        Writes output from selected channels to chosen output file
+        Writes out anything still queued and closes the current recording.
         '''
-        if self.recordingButton.isChecked():
-            if widget.isChecked():
-                for i in range(len(xs)):
-                    self.file.write("{}\t,\t{}\t,\t{}\t\n".format(
-                                sensor.sensorName,xs[i],ys[i]))
+        if self.recorder != None:
+            self.engine.setRecorder(None)
+            self.recorder.close()
+            self.updateRecorderStatus()
+
+    def pushRecordedChannels(self):
+        '''
+        Passes the channels chosen for recording to the acquisition engine.
+        '''
+        self.engine.setRecordedChannels([widget.isChecked() for widget in self.checkWidgets])
+
+    def onDisplayModeChange(self):
+        '''
+        Passes the display mode chosen for each plot to the acquisition engine
+        and puts the x range of sweeping plots back.
+        '''
+        for i,menu in enumerate(self.displayModeMenus):
+            mode = self.sensors[i].displayModes[menu.currentIndex()]
+            if mode != self.sensors[i].displayMode:
+                self.engine.setDisplayMode(i,mode)
+                if mode == "sweep":
+                    self.plots[i].setXRange(*self.sweepXRange(i),padding=0)
+
+    def pushPlotWidths(self):
+        '''
+        Passes the width in pixels of each plot to the acquisition engine, which
+        decimates the plot data to it.
+        '''
+        for i,plot in enumerate(self.plots):
+            self.engine.setPlotWidth(i,max(int(plot.plotItem.vb.width()),100))
+
+    def pushAlarmSettings(self):
+        '''
+        Passes the alarm rules set by the user to the acquisition engine.
+        '''
+        for i,alarm in enumerate(self.alarms):
+            self.engine.setAlarmRule(i,alarm[0].isChecked(),alarm[1].value(),alarm[2].value(),
+                    alarm[3].value(),alarm[4].value(),alarm[5].value())
+
+    def updateRecorderStatus(self):
+        '''
+        Shows the number of samples written and dropped by the recorder.
+        '''
+        if self.recorder == None:
+            return
+        status = "Written: {} samples ({:.1f} MB)\nDropped: {} samples".format(
+                self.recorder.writtenSamples,self.recorder.writtenBytes/1e6,
+                self.recorder.droppedSamples)
+        if self.recorder.error != None:
+            status += "\nError: {}".format(self.recorder.error)
+        self.recorderStatusText.setText(status)
 
     def onLoadFilePress(self):
         '''
@@ -429,31 +643,24 @@ class PhidgetDisplayApp(QtGui.QWidget):
         manual inspection of saved data while still moitoring live data.
         '''
         filePath, filter = QtGui.QFileDialog.getOpenFileName(self,
-                'Open File', './    ',filter="*.csv")
+                'Open File', './    ',filter="Recordings (*.csv *.pdl)")
         if filePath != "":
             self.SDPs.append(StoredDataPlotter(filePath))
 
     def onLoadCalPress(self):
         '''
         Loads a saved callibration to a chosen sensor. Updates live plots accordingly.
+        Linear, polynomial and lookup table callibrations can be loaded.
         '''
         filePath, filter = QtGui.QFileDialog.getOpenFileName(self,
                 'Open File', './    ',filter="*.cal")
         try:
             if filePath != "":
-                fileHandle = open(filePath)
-                lines = fileHandle.readlines()
-                if len(lines) <= 0:
-                    raise ValueError('Empty file')
-                for line in lines:
-                    if not line.startswith("#"):
-                        lineArray = line.rstrip().split(",")
-                        gradient = float(lineArray[0].rstrip())
-                        intercept = float(lineArray[1].rstrip())
-                        for i in range(len(self.sensors)):
-                            if self.sensors[i].sensorName == str(self.chooseSensorMenu.currentText()):
-                                self.sensors[i].setCallibration(gradient,intercept)
-                                break
+                calibration = loadCalibration(filePath)
+                for i in range(len(self.sensors)):
+                    if self.sensors[i].sensorName == str(self.chooseSensorMenu.currentText()):
+                        self.sensors[i].setCalibration(calibration)
+                        break
         except Exception:
             self.msg = QtGui.QMessageBox()
             self.msg.setIcon(QtGui.QMessageBox.Warning)
@@ -475,6 +682,7 @@ class PhidgetDisplayApp(QtGui.QWidget):
         '''
         Resets the plot background colors if an alarm is deactivated.
         '''
+        self.pushAlarmSettings()
         for i in range(len(self.alarms)):
             if not self.alarms[i][0].isChecked():
                 self.plots[i].setBackground((40,40,40))
@@ -493,6 +701,7 @@ class PhidgetDisplayApp(QtGui.QWidget):
             if dt.seconds >= self.timerTime.seconds or not self.recordingButton.isChecked():
                 self.durationTimer.disconnect()
                 self.recordingButton.setChecked(False)
+                self.stopRecording()
                 self.secondsInput.setEnabled(True)
                 self.minutesInput.setEnabled(True)
                 self.hoursInput.setEnabled(True)
@@ -519,7 +728,12 @@ class PhidgetDisplayApp(QtGui.QWidget):
         '''
         Sets up a custom user function to be called when the user defined alarms
         are triggered. Takes the function as first argument and arguments of that
-        function as following arguments
+        function as following arguments. The function is run on the acquisition
+        engine's alarm dispatcher, so a slow function does not hold up plotting
+        or recording and it is called at most every few seconds while an alarm
+        carries on. The limits of each sensor's alarm can be changed with
+        engine.alarmDispatcher.setLimits.
         '''
         self.alarmFunc = func
         self.alarmFuncArgs = args
+        self.engine.setAlarmFunction(func,*args)
@@ -0,0 +1,127 @@
+from PhidgetDataLogger.SharedSampleRing import SharedSampleRing
+from PhidgetDataLogger.RemoteSensor import RemoteSensor
+from PhidgetDataLogger.SensorConfig import createSensor
+from PhidgetDataLogger.Calibration import calibrationFromDict
+import multiprocessing
+import queue
+import time
+import os
+
+class ProcessAcquisition():
+    '''
+    Shares sensors between worker processes so their callbacks do not compete
+    for the GIL with each other or with plotting and recording. Each worker
+    creates and owns a group of sensors and streams their samples back through
+    one SharedSampleRing per sensor. The main process gets a RemoteSensor for
+    each, which can be given to an AcquisitionEngine like any other sensor.
+    Needs Python 3.8 or newer.
+    '''
+
+    #Time in seconds to wait for the workers to create their sensors
+    startTimeout = 60.0
+
+    def __init__(self,configs,processes=None,period=0.01,capacity=65536):
+        '''
+        Constructor for the process acquisition. Starts the worker processes and
+        waits for them to create their sensors.
+
+        Arguments
+        ---------
+        configs: List of sensor configs as taken by createSensor. Calibrations
+        are applied in the main process so the workers send raw values.
+
+        processes: Number of worker processes. Defaults to the number of CPUs.
+        The sensors are shared between them round robin.
+
+        period: Time in seconds between each drain of a worker's sensors.
+
+        capacity: Number of samples each sensor's ring holds. Must cover the
+        samples arriving between drains in the main process.
+        '''
+        configs = [dict(config) for config in configs]
+        calibrations = [(config.pop("calibration",None),config.pop("recordCalibrated",True))
+                for config in configs]
+        processes = max(1,min(processes or os.cpu_count() or 1,len(configs)))
+        self.rings = [SharedSampleRing(capacity) for config in configs]
+        self.groups = [list(range(i,len(configs),processes)) for i in range(processes)]
+        #Spawned rather than forked so the Phidget library starts afresh in each
+        context = multiprocessing.get_context("spawn")
+        self.stopEvent = context.Event()
+        infoQueue = context.Queue()
+        self.workers = [context.Process(target=runWorker,name="Acquisition process {}".format(i),
+                args=(i,[configs[j] for j in group],[self.rings[j].name for j in group],
+                capacity,period,self.stopEvent,infoQueue),daemon=True)
+                for i,group in enumerate(self.groups)]
+        try:
+            for worker in self.workers:
+                worker.start()
+            infos = [None]*len(configs)
+            for i in range(processes):
+                worker,result = infoQueue.get(timeout=self.startTimeout)
+                if isinstance(result,str):
+                    raise RuntimeError("Acquisition process {} failed to start. {}".format(worker,result))
+                for j,info in zip(self.groups[worker],result):
+                    infos[j] = info
+        except queue.Empty:
+            self.stop()
+            raise RuntimeError("Acquisition processes did not start within {} s".format(self.startTimeout))
+        except Exception:
+            self.stop()
+            raise
+        self.sensors = [RemoteSensor(ring,info) for ring,info in zip(self.rings,infos)]
+        for sensor,(calibration,recordCalibrated) in zip(self.sensors,calibrations):
+            if calibration != None:
+                sensor.setCalibration(calibrationFromDict(calibration),recordCalibrated)
+
+    def stop(self):
+        '''
+        Stops the worker processes and frees the shared memory. The remote
+        sensors can not be used afterwards.
+        '''
+        self.stopEvent.set()
+        for worker in self.workers:
+            if worker.pid != None:
+                worker.join(5.0)
+                if worker.is_alive():
+                    worker.terminate()
+                    worker.join()
+        for ring in self.rings:
+            if ring.memory != None:
+                ring.close()
+
+    def droppedSamples(self):
+        '''
+        Returns the number of samples dropped by each sensor's ring.
+        '''
+        return [ring.droppedSamples() for ring in self.rings]
+
+def runWorker(index,configs,ringNames,capacity,period,stopEvent,infoQueue):
+    '''
+    Worker process loop. Creates the worker's sensors, reports them back on
+    infoQueue then copies their samples to their rings once per period until
+    stopEvent is set.
+    '''
+    try:
+        sensors = [createSensor(config) for config in configs]
+        rings = [SharedSampleRing(capacity,name) for name in ringNames]
+    except Exception as error:
+        infoQueue.put((index,"{}: {}".format(type(error).__name__,error)))
+        return
+    infoQueue.put((index,[{"sensorName":sensor.sensorName,
+            "sensorUnits":getattr(sensor,"sensorUnits",None),
+            "dataInterval":sensor.dataInterval,
+            "refreshPeriod":sensor.refreshPeriod/1000.0} for sensor in sensors]))
+    #Sensors such as DummySensor make samples when polled rather than in callbacks
+    generators = [getattr(sensor,"generateSample",None) for sensor in sensors]
+    try:
+        while not stopEvent.is_set():
+            start = time.monotonic()
+            for sensor,ring,generate in zip(sensors,rings,generators):
+                if generate != None:
+                    generate()
+                ring.write(sensor.dataQ.drain())
+                ring.setAttached(sensor.attached)
+            stopEvent.wait(max(0.0,period - (time.monotonic() - start)))
+    finally:
+        for ring in rings:
+            ring.close()
@@ -0,0 +1,144 @@
+from PhidgetDataLogger.DecimationPyramid import DecimationPyramid
+import numpy as np
+
+class RangeQuery():
+    '''
+    Answers questions about the samples of a channel between two times without
+    scanning the whole channel. The ends of a range are found by binary search
+    on the sample times, the mean and standard deviation come from running sums
+    of the values and their squares, and the minimum and maximum from a
+    DecimationPyramid, so each query costs O(log n).
+    '''
+
+    #Ranges with up to this many samples are summed directly, which is just as
+    #fast and avoids the rounding error of differencing large running sums
+    directLimit = 4096
+
+    def __init__(self,x,y,pyramid=None):
+        '''
+        Constructor for the range query. The running sums are computed in O(n)
+        the first time a mean or standard deviation is asked for.
+
+        Arguments
+        ---------
+        x: Sample times. Must be increasing.
+
+        y: Sample values.
+
+        pyramid: DecimationPyramid of x and y used to find the minimum and
+        maximum of a range. One is built if not given.
+        '''
+        self.x = x
+        self.y = y
+        self.pyramid = pyramid if pyramid != None else DecimationPyramid(x,y)
+        self.sums = None
+        self.squareSums = None
+
+    def buildSums(self):
+        '''
+        Computes the running sums of the values and their squares.
+        '''
+        #Values are offset by their mean before summing to limit the rounding
+        #error of the variance on long recordings
+        self.offset = float(np.mean(self.y)) if len(self.y) > 0 else 0.0
+        shifted = np.asarray(self.y,dtype=np.float64) - self.offset
+        self.sums = np.zeros(len(self.y)+1)
+        self.squareSums = np.zeros(len(self.y)+1)
+        np.cumsum(shifted,out=self.sums[1:])
+        np.cumsum(shifted*shifted,out=self.squareSums[1:])
+
+    def indexRange(self,x0,x1):
+        '''
+        Returns the indices of the first sample at or after x0 and one past the
+        last sample at or before x1.
+        '''
+        return (int(np.searchsorted(self.x,x0,side="left")),
+                int(np.searchsorted(self.x,x1,side="right")))
+
+    def region(self,x0,x1):
+        '''
+        Returns the times and values of every sample from x0 to x1 as views
+        without copying.
+        '''
+        i0,i1 = self.indexRange(x0,x1)
+        return self.x[i0:i1], self.y[i0:i1]
+
+    def count(self,x0,x1):
+        '''
+        Returns the number of samples from x0 to x1.
+        '''
+        i0,i1 = self.indexRange(x0,x1)
+        return i1 - i0
+
+    def mean(self,x0,x1):
+        '''
+        Returns the mean of the samples from x0 to x1, or nan if there are none.
+        '''
+        i0,i1 = self.indexRange(x0,x1)
+        if i1 <= i0:
+            return float("nan")
+        if i1 - i0 <= self.directLimit:
+            return float(np.mean(self.y[i0:i1]))
+        if self.sums is None:
+            self.buildSums()
+        return self.offset + float(self.sums[i1] - self.sums[i0])/(i1 - i0)
+
+    def std(self,x0,x1):
+        '''
+        Returns the standard deviation of the samples from x0 to x1, or nan if
+        there are none. Matches numpy.std.
+        '''
+        i0,i1 = self.indexRange(x0,x1)
+        if i1 <= i0:
+            return float("nan")
+        if i1 - i0 <= self.directLimit:
+            return float(np.std(self.y[i0:i1]))
+        if self.sums is None:
+            self.buildSums()
+        n = i1 - i0
+        mean = (self.sums[i1] - self.sums[i0])/n
+        variance = (self.squareSums[i1] - self.squareSums[i0])/n - mean*mean
+        return float(np.sqrt(max(variance,0.0)))
+
+    def minMax(self,x0,x1):
+        '''
+        Returns the smallest and largest samples from x0 to x1, or nans if
+        there are none.
+        '''
+        i0,i1 = self.indexRange(x0,x1)
+        if i1 <= i0:
+            return float("nan"), float("nan")
+        minIndex,maxIndex = self.pyramid.rangeExtrema(i0,i1)
+        return float(self.y[minIndex]), float(self.y[maxIndex])
+
+    def statistics(self,x0,x1):
+        '''
+        Returns a dictionary of the count, mean, standard deviation, minimum
+        and maximum of the samples from x0 to x1.
+        '''
+        minimum,maximum = self.minMax(x0,x1)
+        return {"count":self.count(x0,x1),"mean":self.mean(x0,x1),
+                "std":self.std(x0,x1),"min":minimum,"max":maximum}
+
+    def nearestIndex(self,xValue):
+        '''
+        Returns the index of the sample closest in time to xValue, or None if
+        the channel has no samples. Found by binary search without allocating
+        any arrays.
+        '''
+        n = len(self.x)
+        if n == 0:
+            return None
+        i = int(np.searchsorted(self.x,xValue))
+        if i == n or (i > 0 and xValue - self.x[i-1] <= self.x[i] - xValue):
+            return i - 1
+        return i
+
+    def export(self,writer,name,x0,x1):
+        '''
+        Writes every sample from x0 to x1 to a recording writer, such as a
+        CSVRecordWriter or ColumnarRecordWriter, as a single block. Returns the
+        number of bytes written.
+        '''
+        times,values = self.region(x0,x1)
+        return writer.write(name,times,values)
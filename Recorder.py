@@ -0,0 +1,194 @@
+from PhidgetDataLogger.CSVRecording import CSVRecordWriter
+from PhidgetDataLogger.ColumnarRecording import ColumnarRecordWriter
+import numpy as np
+import threading
+import queue
+import time
+import os
+
+#Record writer used for each output file extension
+recordWriters = {".csv":CSVRecordWriter,".pdl":ColumnarRecordWriter}
+
+def openRecordWriter(filePath,sensors=None):
+    '''
+    Opens the record writer for a file chosen by its extension, ".csv" for text
+    or ".pdl" for the binary columnar format.
+    '''
+    extension = os.path.splitext(filePath)[1]
+    if extension not in recordWriters:
+        raise ValueError("Recordings must end in {}".format(" or ".join(recordWriters)))
+    return recordWriters[extension](filePath,sensors)
+
+class Recorder(threading.Thread):
+    '''
+    Writes recordings to disk on its own thread. Blocks of samples are handed
+    over through a bounded queue so formatting and disk stalls never hold up
+    the thread producing the data. Keeps counters of what has been written and
+    dropped so they can be shown to the user.
+    '''
+
+    #fsync policies. "never" leaves syncing to the operating system, "flush"
+    #syncs after every flush and "close" syncs once when the recording ends.
+    fsyncPolicies = ("never","flush","close")
+
+    def __init__(self,recordFile,maxQueuedBlocks=1000,flushInterval=1.0,
+            fsyncPolicy="never",blockWhenFull=False,blockTimeout=0.05,metrics=None):
+        '''
+        Constructor for the recorder. Call start to begin writing.
+
+        Arguments
+        ---------
+        recordFile: Open record writer such as a CSVRecordWriter or a
+        ColumnarRecordWriter. Must provide write, flush, fileno and close methods.
+        write and flush return the number of bytes they wrote. flush takes
+        whether to write data held back in partial chunks.
+
+        maxQueuedBlocks: Number of blocks which can wait to be written before
+        the queue is full.
+
+        flushInterval: Time in seconds between flushes of the writer.
+
+        fsyncPolicy: One of "never", "flush" or "close".
+
+        blockWhenFull: If True submit waits up to blockTimeout seconds for
+        space in a full queue before dropping a block. If False blocks are
+        dropped as soon as the queue is full.
+
+        metrics: PerformanceMetrics to count the samples and bytes written and
+        dropped and time each write in, or None.
+        '''
+        threading.Thread.__init__(self,daemon=True)
+        if fsyncPolicy not in self.fsyncPolicies:
+            raise ValueError("fsyncPolicy must be one of {}".format(self.fsyncPolicies))
+        self.recordFile = recordFile
+        self.blocks = queue.Queue(maxQueuedBlocks)
+        self.flushInterval = flushInterval
+        self.fsyncPolicy = fsyncPolicy
+        self.blockWhenFull = blockWhenFull
+        self.blockTimeout = blockTimeout
+        self.metrics = metrics
+        self.submittedSamples = 0
+        self.writtenSamples = 0
+        self.writtenBytes = 0
+        self.droppedBlocks = 0
+        self.droppedSamples = 0
+        self.error = None
+        self.closed = False
+
+    def submit(self,sensorName,times,values):
+        '''
+        Queues a block of samples from one channel to be written. Returns False
+        if the block had to be dropped.
+        '''
+        if len(times) == 0:
+            return True
+        block = (sensorName,np.array(times,dtype=np.float64),
+                np.array(values,dtype=np.float64))
+        self.submittedSamples += len(times)
+        try:
+            if self.blockWhenFull:
+                self.blocks.put(block,timeout=self.blockTimeout)
+            else:
+                self.blocks.put_nowait(block)
+        except queue.Full:
+            self.droppedBlocks += 1
+            self.droppedSamples += len(times)
+            if self.metrics != None:
+                self.metrics.increment("recorder.dropped",len(times))
+            return False
+        if self.metrics != None:
+            self.metrics.setGauge("recorder.queue",self.blocks.qsize())
+        return True
+
+    def run(self):
+        '''
+        Main loop of the writer thread. Writes blocks as they arrive and flushes
+        every flushInterval seconds until close is called.
+        '''
+        lastFlush = time.time()
+        running = True
+        while running:
+            try:
+                block = self.blocks.get(timeout=self.flushInterval)
+            except queue.Empty:
+                block = False
+            #Write everything waiting before flushing so writes are large
+            while block is not False:
+                if block is None:
+                    running = False
+                else:
+                    self.writeBlock(block)
+                try:
+                    block = self.blocks.get_nowait()
+                except queue.Empty:
+                    block = False
+            if time.time() - lastFlush >= self.flushInterval:
+                self.flush(self.fsyncPolicy == "flush")
+                lastFlush = time.time()
+        #Anything the writer still holds back is written before the final sync
+        self.flush(self.fsyncPolicy != "never",True)
+        try:
+            self.recordFile.close()
+        except Exception as e:
+            self.error = e
+
+    def writeBlock(self,block):
+        '''
+        Writes a single block to the record file. After a write error all
+        further blocks are counted as dropped.
+        '''
+        sensorName,times,values = block
+        if self.error is None:
+            try:
+                start = time.perf_counter()
+                written = self.recordFile.write(sensorName,times,values)
+                self.writtenBytes += written
+                self.writtenSamples += len(times)
+                if self.metrics != None:
+                    self.metrics.addTiming("recorder.write",time.perf_counter() - start)
+                    self.metrics.increment("recorder.samples",len(times))
+                    self.metrics.increment("recorder.bytes",written)
+                return
+            except Exception as e:
+                self.error = e
+        self.droppedBlocks += 1
+        self.droppedSamples += len(times)
+        if self.metrics != None:
+            self.metrics.increment("recorder.dropped",len(times))
+
+    def flush(self,sync=False,partial=False):
+        '''
+        Flushes the record file and optionally forces it to disk. If partial is
+        True formats which hold back data until a chunk fills, such as the
+        columnar format, write it all.
+        '''
+        if self.error is not None:
+            return
+        try:
+            written = self.recordFile.flush(partial)
+            self.writtenBytes += written
+            if self.metrics != None:
+                self.metrics.increment("recorder.bytes",written)
+            if sync:
+                os.fsync(self.recordFile.fileno())
+        except Exception as e:
+            self.error = e
+
+    def queuedBlocks(self):
+        '''
+        Returns the number of blocks waiting to be written.
+        '''
+        return self.blocks.qsize()
+
+    def close(self):
+        '''
+        Writes any queued blocks, closes the record file and stops the thread.
+        Blocks until the writer thread has finished.
+        '''
+        if self.closed:
+            return
+        self.closed = True
+        if self.ident is None:
+            self.start()
+        self.blocks.put(None)
+        self.join()
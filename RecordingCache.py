@@ -0,0 +1,227 @@
+from PhidgetDataLogger.ColumnarRecording import ColumnarRecordReader
+from PhidgetDataLogger.CSVRecording import CSVRecordReader
+from PhidgetDataLogger.ChunkedChannel import ChunkedChannel
+import numpy as np
+import json
+import os
+
+class RecordingCache():
+    '''
+    Sidecar file kept next to a recording holding what is worked out when it
+    is opened: the channel list, sample counts, time bounds and chunk index
+    of binary recordings and the summary each ChunkedChannel draws long ranges
+    and takes statistics from. No samples are stored, so the cache stays a
+    small fraction of the size of the recording. Text recordings are still
+    parsed every time they are opened, so only their summaries are kept;
+    converting them with convertToColumnar gives a binary recording whose
+    samples are read straight from the file instead. The cache is keyed by
+    the size and modification time of the recording, so a cache for a file
+    which has since changed is ignored and rebuilt.
+    '''
+
+    suffix = ".pdlcache"
+    version = 3
+
+    def __init__(self,recordingPath):
+        '''
+        Constructor for the cache of a single recording. Nothing is read until
+        load is called.
+
+        Arguments
+        ---------
+        recordingPath: Path of the recording. The cache is saved alongside it
+        with ".pdlcache" added to the name.
+        '''
+        self.recordingPath = recordingPath
+        self.cachePath = recordingPath + self.suffix
+        self.meta = {}
+        #Arrays read from the cache file or added since. Arrays in the file are
+        #only read when first asked for.
+        self.arrays = {}
+        self.cacheFile = None
+        self.key = None
+        #Set when anything is added which is not yet saved
+        self.changed = False
+
+    def fileKey(self):
+        '''
+        Returns the size and modification time of the recording.
+        '''
+        status = os.stat(self.recordingPath)
+        return [status.st_size,status.st_mtime_ns]
+
+    def load(self):
+        '''
+        Opens the cache file and reads its metadata. Returns True if it matches
+        the recording, or False if it is missing, out of date or unreadable.
+        The arrays it holds are read as they are needed.
+        '''
+        #Taken before the recording is read so a file which changes while it is
+        #being read is never cached as up to date
+        self.key = self.fileKey()
+        self.close()
+        try:
+            cacheFile = np.load(self.cachePath,allow_pickle=False)
+        except Exception:
+            return False
+        try:
+            meta = json.loads(str(cacheFile["meta"]))
+        except Exception:
+            cacheFile.close()
+            return False
+        if meta.get("version") != self.version or meta.get("key") != self.key:
+            cacheFile.close()
+            return False
+        self.cacheFile = cacheFile
+        self.arrays = {}
+        self.meta = meta
+        return True
+
+    def arrayNames(self):
+        '''
+        Returns the names of every array in the cache, whether read yet or not.
+        '''
+        names = set(self.arrays)
+        if self.cacheFile != None:
+            names.update(name for name in self.cacheFile.files if name != "meta")
+        return names
+
+    def getArray(self,name):
+        '''
+        Returns an array from the cache, reading it from the file the first time
+        it is asked for, or None if the cache does not hold it.
+        '''
+        if name not in self.arrays:
+            if self.cacheFile == None or name not in self.cacheFile.files:
+                return None
+            self.arrays[name] = self.cacheFile[name]
+        return self.arrays[name]
+
+    def save(self):
+        '''
+        Writes the cache file. It is written to a temporary file first and then
+        renamed so a partly written cache is never read. Failing to write the
+        cache, for example in a read only folder, is not treated as an error.
+        '''
+        #Any arrays not read yet are carried over from the old file
+        for name in self.arrayNames():
+            self.getArray(name)
+        self.close()
+        self.meta["version"] = self.version
+        self.meta["key"] = self.key if self.key != None else self.fileKey()
+        temporaryPath = self.cachePath + ".tmp"
+        try:
+            with open(temporaryPath,"wb") as fileHandle:
+                np.savez(fileHandle,meta=np.array(json.dumps(self.meta)),**self.arrays)
+            os.replace(temporaryPath,self.cachePath)
+            self.changed = False
+        except OSError:
+            pass
+
+    def close(self):
+        '''
+        Closes the cache file. Arrays already read are kept.
+        '''
+        if self.cacheFile != None:
+            self.cacheFile.close()
+            self.cacheFile = None
+
+    def setChannels(self,channels,counts,bounds):
+        '''
+        Stores the metadata, sample counts and time bounds of every channel.
+        '''
+        self.meta["channels"] = channels
+        self.meta["sampleCounts"] = [int(count) for count in counts]
+        self.meta["timeBounds"] = bounds
+        self.changed = True
+
+    def setColumnarIndex(self,reader):
+        '''
+        Stores the channels and chunk index of a ColumnarRecordReader.
+        '''
+        channels = range(len(reader.channels))
+        self.setChannels(reader.channels,[reader.sampleCount(i) for i in channels],
+                [reader.timeBounds(i) for i in channels])
+        for i in channels:
+            self.arrays["index{}".format(i)] = reader.index[i]
+
+    def columnarIndex(self):
+        '''
+        Returns the channels and chunk index stored by setColumnarIndex, which
+        can be passed to ColumnarRecordReader to skip indexing the file.
+        '''
+        channels = self.meta["channels"]
+        return channels, [self.getArray("index{}".format(i)) for i in range(len(channels))]
+
+    def setChannelSummary(self,channel,summary):
+        '''
+        Stores the summary of a channel made by ChunkedChannel.getSummary,
+        which holds its decimation.
+        '''
+        for name,array in summary.items():
+            self.arrays["summary{}_{}".format(channel,name)] = array
+        self.changed = True
+
+    def channelSummary(self,channel):
+        '''
+        Returns the stored summary of a channel, or None if there is none.
+        '''
+        prefix = "summary{}_".format(channel)
+        summary = {name[len(prefix):]:self.getArray(name) for name in self.arrayNames()
+                if name.startswith(prefix)}
+        return summary if len(summary) > 0 else None
+
+    def channelNames(self):
+        '''
+        Returns the names of every channel in the recording.
+        '''
+        return [channel["name"] for channel in self.meta["channels"]]
+
+    def sampleCount(self,channel):
+        '''
+        Returns the number of samples recorded for a channel.
+        '''
+        return self.meta["sampleCounts"][channel]
+
+    def timeBounds(self,channel):
+        '''
+        Returns the first and last sample times of a channel, or None if the
+        channel has no samples.
+        '''
+        bounds = self.meta["timeBounds"][channel]
+        return tuple(bounds) if bounds != None else None
+
+def openRecording(filePath):
+    '''
+    Opens a recording as the StoredDataPlotter does. Returns its reader and
+    the names of its channels with a ChunkedChannel for each, which reads only
+    the chunks it needs. Binary recordings are memory mapped so their sensor
+    values are views of the file rather than copies. Channels without any
+    samples are left out. If the recording has an up to date cache the chunk
+    index of a binary recording and the summary of every channel are taken
+    from it, otherwise the cache is saved once they are built. Text
+    recordings are always parsed and only their summaries are cached.
+    '''
+    cache = RecordingCache(filePath)
+    cached = cache.load()
+    if filePath.endswith(".pdl"):
+        if cached:
+            reader = ColumnarRecordReader(filePath,*cache.columnarIndex())
+        else:
+            reader = ColumnarRecordReader(filePath)
+            cache.setColumnarIndex(reader)
+    else:
+        reader = CSVRecordReader(filePath)
+    sensorNames = []
+    channels = []
+    for i,name in enumerate(reader.channelNames()):
+        if reader.sampleCount(i) > 0:
+            summary = cache.channelSummary(i)
+            channels.append(ChunkedChannel(reader,i,summary))
+            if summary == None:
+                cache.setChannelSummary(i,channels[-1].getSummary())
+            sensorNames.append(name)
+    if cache.changed:
+        cache.save()
+    cache.close()
+    return reader, sensorNames, channels
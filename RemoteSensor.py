@@ -0,0 +1,84 @@
+from PhidgetDataLogger import Sensor
+import numpy as np
+import time
+
+class RemoteSensor(Sensor):
+    '''
+    Stands in the main process for a sensor owned by a worker process of a
+    ProcessAcquisition. Its dataQ is the shared ring the worker streams the
+    sensor's samples into, so it is drained, calibrated, plotted and recorded
+    exactly like a local sensor. Plot times are taken from this sensor's own
+    refreshes rather than the worker's.
+    '''
+
+    def __init__(self,ring,info):
+        '''
+        Constructor for a remote sensor.
+
+        Arguments
+        ---------
+        ring: SharedSampleRing the worker writes the sensor's raw samples to.
+
+        info: Dictionary describing the worker's sensor with its "sensorName",
+        "sensorUnits", "dataInterval" in ms and "refreshPeriod" in seconds.
+        '''
+        self.ring = ring
+        self.sensorUnits = info["sensorUnits"]
+        Sensor.__init__(self,None,info["dataInterval"],info["refreshPeriod"],info["sensorName"])
+        self.dataQ = ring
+
+    @property
+    def attached(self):
+        '''
+        Whether the worker's sensor is attached.
+        '''
+        return self.ring.isAttached()
+
+    @attached.setter
+    def attached(self,attached):
+        #Attachment is only changed by the worker
+        pass
+
+    def attachSensor(self):
+        '''
+        Overrides attachSensor from Sensor. The worker attaches the sensor.
+        '''
+        pass
+
+    def activateDisconnectListener(self):
+        '''
+        Overrides activateDisconnectListener from Sensor. The worker listens
+        for disconnection and records it in the ring.
+        '''
+        pass
+
+    def activateDataListener(self):
+        '''
+        Overrides activateDataListener from Sensor. Samples arrive through the
+        ring so there is no event to listen for. The start time is moved back
+        to the first sample drained, which the worker may have taken before
+        this sensor was made.
+        '''
+        self.startTime = time.time()
+        self.firstDrain = True
+
+    def drainSamples(self):
+        '''
+        Overrides drainSamples from Sensor. The worker's sensor never resets its
+        start time as it is never plotted, so the time since the last refresh
+        of each sample is worked out again here from its raw time. Samples taken
+        before the last refresh but drained after it are placed at its start.
+        '''
+        block = self.ring.drain()
+        if self.firstDrain and len(block) > 0:
+            self.startTime = min(self.startTime,float(block["rawTime"][0]))
+            self.firstDrain = False
+        block["deltaTime"] = np.maximum(block["rawTime"] - self.startTime,0.0)
+        return block
+
+    def droppedSamples(self):
+        '''
+        Returns the number of samples the worker had to drop because the ring
+        was full.
+        '''
+        return self.ring.droppedSamples()
@@ -0,0 +1,107 @@
+import numpy as np
+
+class RingBuffer():
+    '''
+    Fixed capacity circular buffer backed by a single preallocated numpy array.
+    Used by the sensors to hold the samples shown on the live plots without
+    reallocating as new samples arrive.
+    '''
+
+    def __init__(self,capacity,width=1,dtype=np.float64):
+        '''
+        Constructor for the ring buffer.
+
+        Arguments
+        ---------
+        capacity: Maximum number of samples held. Once full the oldest samples
+        are discarded as new ones are added.
+
+        width: Number of values stored for each sample. A sensor uses 2, one
+        column for the sample times and one for the sample values.
+
+        dtype: numpy data type of the stored values.
+        '''
+        self.capacity = max(int(capacity),1)
+        self.width = width
+        #Twice the capacity is allocated so the stored samples are always held
+        #contiguously and can be handed out as views. When writing reaches the end
+        #of the array the newest samples are moved back to the front, which only
+        #happens once every "capacity" appends so appends are O(1) amortised.
+        self.buffer = np.zeros((width,2*self.capacity),dtype=dtype)
+        self.start = 0
+        self.end = 0
+        #Running count of every sample ever added. Used to tell how many samples
+        #have been pushed out of the buffer.
+        self.totalAppended = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def append(self,*values):
+        '''
+        Adds a single sample to the buffer. Takes one value per column.
+        '''
+        if self.end == self.buffer.shape[1]:
+            self.compact(1)
+        self.buffer[:,self.end] = values
+        self.end += 1
+        self.totalAppended += 1
+        if self.end - self.start > self.capacity:
+            self.start = self.end - self.capacity
+
+    def extend(self,*columns):
+        '''
+        Adds a block of samples to the buffer. Takes one array per column, all of
+        the same length. If the block is longer than the capacity only its
+        newest samples are kept.
+        '''
+        n = len(columns[0])
+        if n == 0:
+            return
+        self.totalAppended += n
+        if n >= self.capacity:
+            for i in range(self.width):
+                self.buffer[i,0:self.capacity] = columns[i][n-self.capacity:]
+            self.start = 0
+            self.end = self.capacity
+            return
+        if self.end + n > self.buffer.shape[1]:
+            self.compact(n)
+        for i in range(self.width):
+            self.buffer[i,self.end:self.end+n] = columns[i]
+        self.end += n
+        if self.end - self.start > self.capacity:
+            self.start = self.end - self.capacity
+
+    def compact(self,spaceNeeded):
+        '''
+        Moves the samples which will survive the next write of "spaceNeeded"
+        samples to the front of the array.
+        '''
+        keep = min(self.end - self.start,self.capacity - spaceNeeded)
+        self.buffer[:,0:keep] = self.buffer[:,self.end-keep:self.end]
+        self.start = 0
+        self.end = keep
+
+    def view(self,column=None):
+        '''
+        Returns a view of the samples currently held, oldest first. No data is
+        copied so the view is only valid until the buffer is next written to.
+        Returns a single column if one is given otherwise a (width,n) array.
+        '''
+        if column is None:
+            return self.buffer[:,self.start:self.end]
+        return self.buffer[column,self.start:self.end]
+
+    def discard(self,n):
+        '''
+        Removes the oldest n samples. Nothing is moved or reallocated.
+        '''
+        self.start = min(self.start + max(int(n),0),self.end)
+
+    def clear(self):
+        '''
+        Empties the buffer. No memory is released or reallocated.
+        '''
+        self.start = 0
+        self.end = 0
@@ -0,0 +1,219 @@
+from PhidgetDataLogger.RingBuffer import RingBuffer
+import numpy as np
+
+class RunningWindowStats():
+    '''
+    Streaming statistics of the samples in a sliding time window. Samples are
+    held in a ring buffer and running sums are kept of the samples in the
+    window, so the mean, variance and the slope of a straight line fitted to
+    the window are available at any time at a cost which does not depend on
+    the number of samples in it. Used by the strain calibrator to average the
+    highlighted region of its live plot and tell when the signal has settled.
+    '''
+
+    def __init__(self,capacity,span,delay=0.0):
+        '''
+        Constructor for the running statistics.
+
+        Arguments
+        ---------
+        capacity: Number of samples held. Must cover the span and delay at the
+        sensor's data rate otherwise the window is cut short.
+
+        span: Length in seconds of the window.
+
+        delay: Age in seconds of the newest samples in the window. With a
+        delay of 0 the window holds the newest samples.
+        '''
+        self.buffer = RingBuffer(capacity,2)
+        self.span = float(span)
+        self.delay = float(delay)
+        self.reset()
+
+    def reset(self):
+        '''
+        Clears the running sums. The window covers samples with indices from
+        leaveIndex up to but not including enterIndex, counting every sample
+        ever added.
+        '''
+        self.enterIndex = self.buffer.totalAppended
+        self.leaveIndex = self.buffer.totalAppended
+        #Times and values are measured from an offset near the window so the
+        #sums of their squares keep their precision
+        self.timeOffset = None
+        self.valueOffset = None
+        self.sums = np.zeros(6)
+        #Number of samples added to or removed from the sums since they were
+        #last recomputed, bounding the rounding error they collect
+        self.updates = 0
+
+    def setWindow(self,span,delay=0.0):
+        '''
+        Moves the window and recomputes the sums from the samples held.
+        '''
+        self.span = float(span)
+        self.delay = float(delay)
+        self.reset()
+        self.leaveIndex = self.buffer.totalAppended - len(self.buffer)
+        self.enterIndex = self.leaveIndex
+        if len(self.buffer) > 0:
+            self.update(np.empty(0),np.empty(0))
+
+    def clear(self):
+        '''
+        Discards every sample held.
+        '''
+        self.buffer.clear()
+        self.reset()
+
+    def extend(self,times,values):
+        '''
+        Adds a block of samples, oldest first, and slides the window along to
+        the newest of them.
+        '''
+        times = np.asarray(times,dtype=np.float64)
+        values = np.asarray(values,dtype=np.float64)
+        if len(times) == 0:
+            return
+        self.update(times,values)
+        self.buffer.extend(times,values)
+
+    def update(self,times,values):
+        '''
+        Moves the window to end at the newest of the samples held and the block
+        being added, then updates the sums with the samples entering and leaving.
+        '''
+        first = self.buffer.totalAppended - len(self.buffer)
+        bufferTimes = self.buffer.view(0)
+        newest = times[-1] if len(times) > 0 else bufferTimes[-1]
+        def position(limit,side):
+            return (first + np.searchsorted(bufferTimes,limit,side)
+                    + np.searchsorted(times,limit,side))
+        #Samples about to be pushed out of the buffer can not stay in the window
+        oldestKept = self.buffer.totalAppended + len(times) - self.buffer.capacity
+        leave = max(position(newest - self.delay - self.span,"left"),self.leaveIndex,oldestKept)
+        enter = max(position(newest - self.delay,"right"),self.enterIndex,leave)
+        if leave >= self.enterIndex or self.updates > self.buffer.capacity:
+            self.recompute(leave,enter,times,values)
+        else:
+            self.accumulate(self.samples(self.enterIndex,enter,times,values),1.0)
+            self.accumulate(self.samples(self.leaveIndex,leave,times,values),-1.0)
+        self.leaveIndex = leave
+        self.enterIndex = enter
+
+    def samples(self,index0,index1,times,values):
+        '''
+        Returns the times and values of the samples with indices from index0 up
+        to but not including index1, taken from the buffer and the block being
+        added.
+        '''
+        first = self.buffer.totalAppended - len(self.buffer)
+        i0 = max(index0 - first,0)
+        i1 = max(index1 - first,i0)
+        held = len(self.buffer)
+        sampleTimes = self.buffer.view(0)[i0:i1]
+        sampleValues = self.buffer.view(1)[i0:i1]
+        if i1 > held:
+            sampleTimes = np.concatenate((sampleTimes,times[max(i0 - held,0):i1 - held]))
+            sampleValues = np.concatenate((sampleValues,values[max(i0 - held,0):i1 - held]))
+        return sampleTimes, sampleValues
+
+    def accumulate(self,samples,sign):
+        '''
+        Adds samples to the sums, or removes them if sign is -1.
+        '''
+        sampleTimes,sampleValues = samples
+        if len(sampleTimes) == 0:
+            return
+        if self.timeOffset == None:
+            self.timeOffset = float(sampleTimes[0])
+            self.valueOffset = float(sampleValues[0])
+        t = sampleTimes - self.timeOffset
+        y = sampleValues - self.valueOffset
+        #Count, sums of t, y, t*t, t*y and y*y
+        self.sums += sign*np.array([len(t),t.sum(),y.sum(),t.dot(t),t.dot(y),y.dot(y)])
+        self.updates += len(t)
+
+    def recompute(self,leave,enter,times,values):
+        '''
+        Computes the sums afresh from the samples in the window.
+        '''
+        self.timeOffset = None
+        self.valueOffset = None
+        self.sums = np.zeros(6)
+        self.accumulate(self.samples(leave,enter,times,values),1.0)
+        self.updates = 0
+
+    def count(self):
+        '''
+        Returns the number of samples in the window.
+        '''
+        return self.enterIndex - self.leaveIndex
+
+    def mean(self):
+        '''
+        Returns the mean of the samples in the window or nan if it is empty.
+        '''
+        n = self.count()
+        if n == 0:
+            return float("nan")
+        return self.valueOffset + self.sums[2]/n
+
+    def variance(self):
+        '''
+        Returns the sample variance of the window or nan if it holds fewer
+        than 2 samples.
+        '''
+        n = self.count()
+        if n < 2:
+            return float("nan")
+        return max(self.sums[5] - self.sums[2]**2/n,0.0)/(n - 1)
+
+    def std(self):
+        '''
+        Returns the sample standard deviation of the window.
+        '''
+        return np.sqrt(self.variance())
+
+    def slope(self):
+        '''
+        Returns the gradient of a least squares straight line through the
+        samples in the window, in value units per second. Returns 0 if the
+        window holds fewer than 2 distinct times.
+        '''
+        n,st,sy,stt,sty,syy = self.sums
+        denominator = n*stt - st*st
+        if self.count() < 2 or denominator <= 0:
+            return 0.0
+        return (n*sty - st*sy)/denominator
+
+    def drift(self):
+        '''
+        Returns the change in value across the span of the window given by its
+        slope.
+        '''
+        return self.slope()*self.span
+
+    def isFull(self):
+        '''
+        Returns True once samples have been held for the whole of the delay
+        and span, so the window is not cut short.
+        '''
+        if len(self.buffer) == 0:
+            return False
+        times = self.buffer.view(0)
+        return times[0] <= times[-1] - self.delay - self.span
+
+    def isSettled(self,tolerance):
+        '''
+        Returns True when the window is full and its drift is no more than
+        tolerance.
+        '''
+        return self.isFull() and self.count() >= 3 and abs(self.drift()) <= tolerance
+
+    def view(self):
+        '''
+        Returns views of the times and values of every sample held, oldest
+        first. Only valid until more samples are added.
+        '''
+        return self.buffer.view(0), self.buffer.view(1)
@@ -0,0 +1,86 @@
+import numpy as np
+import threading
+
+#Layout of a block of samples returned by SampleQueue.drain
+sampleDtype = np.dtype([("value",np.float64),("deltaTime",np.float64),
+        ("rawTime",np.float64)])
+
+class SampleQueue():
+    '''
+    Thread safe staging buffer that sensor callbacks write samples to. Samples
+    are taken out in whole blocks as numpy structured arrays rather than one at
+    a time. Used as the dataQ of every Sensor. Listeners, such as an
+    Interlock, can also be given every sample as it is added, on the thread
+    adding it.
+    '''
+
+    def __init__(self):
+        '''
+        Constructor for the sample queue.
+        '''
+        self.lock = threading.Lock()
+        self.samples = []
+        #Replaced rather than changed so put can use it without the lock
+        self.listeners = ()
+
+    def put(self,sample):
+        '''
+        Adds a single sample to the queue. Sample is a sequence of the value,
+        the time since the sensor's start time and the raw time stamp. Has the
+        same signature as queue.Queue.put so callbacks are unchanged.
+        '''
+        with self.lock:
+            self.samples.append(sample)
+        for listener in self.listeners:
+            listener((sample[0],),(sample[2],))
+
+    def putBlock(self,values,deltaTimes,rawTimes):
+        '''
+        Adds a block of samples to the queue from three equal length sequences.
+        '''
+        with self.lock:
+            self.samples.extend(zip(values,deltaTimes,rawTimes))
+        for listener in self.listeners:
+            listener(values,rawTimes)
+
+    def addListener(self,listener):
+        '''
+        Adds a function called with the values and raw time stamps of every
+        sample, as two sequences, when they are added to the queue. It is
+        called on the thread adding them, such as a phidget callback, so must
+        be quick.
+        '''
+        with self.lock:
+            self.listeners = self.listeners + (listener,)
+
+    def removeListener(self,listener):
+        '''
+        Removes a function added with addListener.
+        '''
+        with self.lock:
+            self.listeners = tuple(item for item in self.listeners if item != listener)
+
+    def drain(self):
+        '''
+        Removes every sample from the queue in one step and returns them as a
+        structured array with fields "value", "deltaTime" and "rawTime".
+        '''
+        #Swap in an empty list so the lock is only held for the swap itself
+        with self.lock:
+            samples = self.samples
+            self.samples = []
+        if len(samples) == 0:
+            return np.empty(0,dtype=sampleDtype)
+        return np.array(samples,dtype=np.float64).view(sampleDtype).reshape(-1)
+
+    def qsize(self):
+        '''
+        Returns the number of samples waiting in the queue.
+        '''
+        return len(self.samples)
+
+    def empty(self):
+        '''
+        Returns True if there are no samples waiting in the queue.
+        '''
+        return len(self.samples) == 0
@@ -1,5 +1,7 @@
 from Phidget22.PhidgetException import *
 from Phidget22.Phidget import *
+from PhidgetDataLogger.RingBuffer import RingBuffer
+from PhidgetDataLogger.SampleQueue import SampleQueue
 import numpy as np
 from time import sleep
 import time
@@ -11,6 +13,13 @@ class Sensor():
     '''
 
     noOfSensors = 0
+    #Plot buffers are sized for this many times the expected number of samples
+    #in a refresh period to absorb jitter in the sensor data intervals.
+    bufferHeadroom = 2
+    #Ways the live plot can show the refresh period. "sweep" starts again from
+    #zero each refresh period, "scroll" keeps the latest refresh period and
+    #moves along with it.
+    displayModes = ("sweep","scroll")
 
     def __init__(self,deviceSN,dataInterval,refreshPeriod,sensorName=None):
         '''
@@ -38,10 +47,21 @@ class Sensor():
         else:
             self.sensorName = sensorName
         self.attached = False
-        self.dataQ = queue.Queue()
-        self.data =  np.asarray([0.0]*round(self.refreshPeriod/self.dataInterval))
-        self.times = np.asarray([0.0]*round(self.refreshPeriod/self.dataInterval))
-        self.arrayIndex = 0
+        #Samples are queued raw and calibrated a block at a time in getData
+        self.calibration = None
+        self.useCallibration = False
+        #Whether calibrated rather than raw values are recorded
+        self.recordCalibrated = True
+        #Raw values of the samples returned by the last call to getData
+        self.rawValues = np.empty(0)
+        #Staging buffer which the phidget callbacks write samples to
+        self.dataQ = SampleQueue()
+        #Holds the times, raw values and calibrated values plotted since the
+        #last refresh, and the calibration the calibrated values were made with
+        self.plotBuffer = RingBuffer(
+                self.bufferHeadroom*round(self.refreshPeriod/self.dataInterval),3)
+        self.plotCalibration = None
+        self.displayMode = "sweep"
         self.attachSensor()
         self.activateDisconnectListener()
         self.activateDataListener()
@@ -66,28 +86,75 @@ class Sensor():
         '''
         Method called externally to access sensor data. Returns the most recent
         time and sensor data values logged since last call. Also returns all time
-        and data values since last refresh for use in plotting.
+        and data values since last refresh, or over the last refresh period if
+        the display mode is "scroll", for use in plotting. The plotting
+        arrays are views of the sensor's plot buffer and are overwritten by later
+        calls so should be copied if they need to be kept. If the sensor has a
+        calibration the values are calibrated. Only the new values are
+        calibrated and added to the plot buffer, which is only calibrated again
+        as a whole when the calibration changes. The raw values are kept in
+        rawValues.
         '''
-        newData = []
-        newTimes = []
-        newRawTimes = []
-        while not self.dataQ.empty():
-            datum = self.dataQ.get()
-            newData.append(datum[0])
-            newTimes.append(datum[1])
-            newRawTimes.append(datum[2])
+        #Take every waiting sample in one block
+        block = self.drainSamples()
+        calibration = self.calibration if self.useCallibration else None
+        if calibration != self.plotCalibration:
+            #Every plotted value has changed
+            rawPlotValues = self.plotBuffer.view(1)
+            self.plotBuffer.view(2)[:] = (rawPlotValues if calibration == None
+                    else calibration.apply(rawPlotValues))
+            self.plotCalibration = calibration
+        self.rawValues = block["value"]
+        values = self.rawValues if calibration == None else calibration.apply(self.rawValues)
         currentTime = time.time() - self.startTime
-        if len(newData) > 0:
-            for i in range(len(newData)):
-                self.data[self.arrayIndex] = newData[i]
-                self.times[self.arrayIndex] = newTimes[i]
-                self.arrayIndex = self.arrayIndex + 1
-                if currentTime > self.refreshPeriod/1000.0:
-                    self.arrayIndex = 0
-                    self.startTime = time.time()
-                else:
-                    if self.arrayIndex >= len(self.data):
-                        self.data = np.append(self.data,0)
-                        self.times = np.append(self.times,0)
-        return (np.asarray(newRawTimes), np.asarray(newData),
-                    self.times[0:self.arrayIndex], self.data[0:self.arrayIndex])
+        if len(block) > 0:
+            if self.displayMode == "scroll":
+                #Keep adding to the buffer and drop samples older than the
+                #refresh period, so nothing is cleared or moved
+                self.plotBuffer.extend(block["deltaTime"],self.rawValues,values)
+                times = self.plotBuffer.view(0)
+                self.plotBuffer.discard(np.searchsorted(times,
+                        times[-1] - self.refreshPeriod/1000.0,side="left"))
+            elif currentTime > self.refreshPeriod/1000.0:
+                #Refresh period has elapsed so start plotting again from zero
+                self.plotBuffer.clear()
+                self.startTime = time.time()
+            else:
+                self.plotBuffer.extend(block["deltaTime"],self.rawValues,values)
+        return (block["rawTime"], values, self.plotBuffer.view(0), self.plotBuffer.view(2))
+
+    def drainSamples(self):
+        '''
+        Removes every sample waiting in the data queue and returns them as a
+        structured array with fields "value", "deltaTime" and "rawTime".
+        '''
+        return self.dataQ.drain()
+
+    def setDisplayMode(self,mode):
+        '''
+        Sets how the live plot shows the refresh period, either "sweep" or
+        "scroll". Changing to sweep starts plotting again from zero.
+        '''
+        if mode not in self.displayModes:
+            raise ValueError("Unknown display mode {}, expected one of {}".format(
+                    mode,", ".join(self.displayModes)))
+        if mode == "sweep" and self.displayMode != "sweep":
+            self.plotBuffer.clear()
+            self.startTime = time.time()
+        self.displayMode = mode
+
+    def setCalibration(self,calibration,recordCalibrated=True):
+        '''
+        Sets the calibration applied to the sensor's values, such as a
+        LinearCalibration, or None to return raw values. As the raw values are
+        kept the plotted values are recalibrated straight away.
+
+        Recordings hold the calibrated values, as they always have, unless
+        recordCalibrated is False, in which case they hold the raw values
+        instead. The calibration is stored in .pdl recordings along with
+        whether it has been applied, but text recordings do not say, so raw
+        values should only be recorded to .pdl files.
+        '''
+        self.calibration = calibration
+        self.useCallibration = calibration != None
+        self.recordCalibrated = recordCalibrated
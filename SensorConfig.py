@@ -0,0 +1,58 @@
+from PhidgetDataLogger.DummySensor import DummySensor
+from PhidgetDataLogger.IRTemperatureSensor import IRTemperatureSensor
+from PhidgetDataLogger.StrainSensor import StrainSensor
+from PhidgetDataLogger.VoltageInputSensor import VoltageInputSensor
+from PhidgetDataLogger.VoltageRatioSensor import VoltageRatioSensor
+from PhidgetDataLogger.ThermoCouple import ThermoCouple
+from PhidgetDataLogger.SyntheticSensor import SyntheticSensor
+from PhidgetDataLogger.Calibration import calibrationFromDict
+import json
+
+#Sensor classes which can be named in a sensor config
+sensorTypes = {"DummySensor":DummySensor,
+        "IRTemperatureSensor":IRTemperatureSensor,
+        "StrainSensor":StrainSensor,
+        "VoltageInputSensor":VoltageInputSensor,
+        "VoltageRatioSensor":VoltageRatioSensor,
+        "ThermoCouple":ThermoCouple,
+        "SyntheticSensor":SyntheticSensor}
+
+def createSensor(config):
+    '''
+    Creates a sensor from a dictionary holding the name of its class under
+    "type" and the arguments of its constructor under their own names, eg.
+    {"type":"StrainSensor","deviceSN":12345,"channelNo":0,"dataInterval":8,
+    "refreshPeriod":10,"sensorName":"Load cell"}. Any sensor can also be given
+    a "calibration" as taken by calibrationFromDict, eg. {"type":"lookup",
+    "rawPoints":[...],"calibratedPoints":[...]}. Its calibrated values are
+    recorded unless "recordCalibrated" is false, see Sensor.setCalibration.
+    '''
+    arguments = dict(config)
+    sensorType = arguments.pop("type",None)
+    if sensorType not in sensorTypes:
+        raise ValueError("Unknown sensor type {}. Must be one of {}".format(
+                sensorType,", ".join(sensorTypes)))
+    calibration = arguments.pop("calibration",None)
+    recordCalibrated = arguments.pop("recordCalibrated",True)
+    sensor = sensorTypes[sensorType](**arguments)
+    if calibration != None:
+        sensor.setCalibration(calibrationFromDict(calibration),recordCalibrated)
+    return sensor
+
+def readSensorConfig(filePath):
+    '''
+    Returns the list of sensor configs in a JSON sensor config file. The file
+    holds either a list of sensor configs as taken by createSensor or an object
+    with the list under "sensors".
+    '''
+    with open(filePath) as fileHandle:
+        config = json.load(fileHandle)
+    if isinstance(config,dict):
+        config = config["sensors"]
+    return config
+
+def loadSensorConfig(filePath):
+    '''
+    Creates every sensor listed in a JSON sensor config file.
+    '''
+    return [createSensor(sensorConfig) for sensorConfig in readSensorConfig(filePath)]
@@ -0,0 +1,131 @@
+from PhidgetDataLogger.SampleQueue import sampleDtype
+import numpy as np
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    #Shared memory needs Python 3.8 or newer
+    shared_memory = None
+
+class SharedSampleRing():
+    '''
+    Fixed capacity ring of samples in shared memory, written by one process
+    and read by another without any locking. Used to stream blocks of samples
+    from the worker processes of a ProcessAcquisition back to the main process.
+    Has the same drain method as a SampleQueue so can be used as the dataQ of a
+    sensor.
+    '''
+
+    #The header holds 64 bit counters. The ones written by the writer and the
+    #one written by the reader are kept in separate cache lines.
+    headerSize = 128
+    writeSlot = 0
+    droppedSlot = 1
+    attachedSlot = 2
+    readSlot = 8
+
+    def __init__(self,capacity,name=None):
+        '''
+        Constructor for the shared ring.
+
+        Arguments
+        ---------
+        capacity: Number of samples the ring holds. Samples written while the
+        ring is full are dropped and counted.
+
+        name: Name of an existing ring to open, as given by its name attribute.
+        A new ring is created if None.
+        '''
+        if shared_memory == None:
+            raise RuntimeError("Shared memory rings need Python 3.8 or newer")
+        self.capacity = int(capacity)
+        size = self.headerSize + self.capacity*sampleDtype.itemsize
+        self.owner = name == None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True,size=size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+        self.header = np.ndarray(self.headerSize//8,dtype=np.uint64,buffer=self.memory.buf)
+        self.samples = np.ndarray(self.capacity,dtype=sampleDtype,buffer=self.memory.buf,
+                offset=self.headerSize)
+        if self.owner:
+            self.header[:] = 0
+
+    def write(self,block):
+        '''
+        Adds a block of samples, a structured array as returned by
+        SampleQueue.drain. Only called by the writing process. If there is not
+        room for the whole block its newest samples are dropped.
+        '''
+        written = int(self.header[self.writeSlot])
+        free = self.capacity - (written - int(self.header[self.readSlot]))
+        if len(block) > free:
+            self.header[self.droppedSlot] += len(block) - free
+            block = block[0:free]
+        n = len(block)
+        if n == 0:
+            return
+        i0 = written % self.capacity
+        first = min(n,self.capacity - i0)
+        self.samples[i0:i0+first] = block[0:first]
+        self.samples[0:n-first] = block[first:n]
+        #The count is only moved on once the samples are in place so the reader
+        #never sees a partly written block
+        self.header[self.writeSlot] = written + n
+
+    def drain(self):
+        '''
+        Removes every sample waiting in the ring and returns them as a
+        structured array with fields "value", "deltaTime" and "rawTime". Only
+        called by the reading process.
+        '''
+        read = int(self.header[self.readSlot])
+        n = int(self.header[self.writeSlot]) - read
+        i0 = read % self.capacity
+        first = min(n,self.capacity - i0)
+        block = np.concatenate((self.samples[i0:i0+first],self.samples[0:n-first]))
+        self.header[self.readSlot] = read + n
+        return block
+
+    def qsize(self):
+        '''
+        Returns the number of samples waiting in the ring.
+        '''
+        return int(self.header[self.writeSlot]) - int(self.header[self.readSlot])
+
+    def empty(self):
+        '''
+        Returns True if there are no samples waiting in the ring.
+        '''
+        return self.qsize() == 0
+
+    def droppedSamples(self):
+        '''
+        Returns the number of samples dropped because the ring was full.
+        '''
+        return int(self.header[self.droppedSlot])
+
+    def setAttached(self,attached):
+        '''
+        Records whether the writer's sensor is attached.
+        '''
+        self.header[self.attachedSlot] = 1 if attached else 0
+
+    def isAttached(self):
+        '''
+        Returns whether the writer's sensor was last recorded as attached.
+        '''
+        return self.header[self.attachedSlot] != 0
+
+    def close(self):
+        '''
+        Closes the ring in this process. The process which created it also
+        frees the shared memory.
+        '''
+        #The arrays hold references to the memory so must go before it closes
+        self.header = None
+        self.samples = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+        self.memory = None
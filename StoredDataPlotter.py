@@ -1,5 +1,9 @@
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtGui, QtCore, QtWidgets
+from PhidgetDataLogger.ColumnarRecording import ColumnarRecordWriter
+from PhidgetDataLogger.CSVRecording import CSVRecordWriter, convertToColumnar
+from PhidgetDataLogger.ChunkedChannel import nearestPoint
+from PhidgetDataLogger.RecordingCache import openRecording
 import numpy as np
 import os
 
@@ -23,7 +27,7 @@ class StoredDataPlotter(QtGui.QMainWindow):
         '''
         #Attempt to read data from file.
         try:
-            self.dataLabels,self.xDatas,self.yDatas=self.getDataFromFile()
+            self.dataLabels,self.channels=self.getDataFromFile()
         except Exception:
             #Display error dialouge if problem encountered reading data from file
             self.msg = QtGui.QMessageBox()
@@ -69,16 +73,28 @@ class StoredDataPlotter(QtGui.QMainWindow):
         self.plotLayout = QtGui.QGridLayout()
         self.bottomPlot = pg.PlotWidget()
         self.legend = self.topPlot.addLegend()
+        #Curves are drawn from the channel summaries and decimation pyramids so
+        #only around two points per pixel are drawn whatever the length of the
+        #recording
+        self.topCurves = []
+        self.bottomCurves = []
         for i in range(len(self.dataLabels)):
-            self.topPlot.plot(self.xDatas[i],self.yDatas[i],
-                    pen=(i,len(self.dataLabels)),name=self.dataLabels[i])
-            self.bottomPlot.plot(self.xDatas[i],self.yDatas[i],
-                    pen=(i,len(self.dataLabels)),name=self.dataLabels[i])
+            self.topCurves.append(self.topPlot.plot(pen=(i,len(self.dataLabels)),
+                    name=self.dataLabels[i]))
+            self.bottomCurves.append(self.bottomPlot.plot(pen=(i,len(self.dataLabels)),
+                    name=self.dataLabels[i]))
         self.bottomPlot.showGrid(x=True,y=True)
         #Set up highlighted reigon on top plot for zooming in on bottom plot
-        self.hReigon = pg.LinearRegionItem([max(max(self.xDatas))*0.25,max(max(self.xDatas))*0.75])
-        self.hReigon.setBounds([0,max(max(self.xDatas))])
+        self.xMax = max([channel.end for channel in self.channels])
+        self.hReigon = pg.LinearRegionItem([self.xMax*0.25,self.xMax*0.75])
+        self.hReigon.setBounds([0,self.xMax])
         self.hReigon.sigRegionChanged.connect(self.onHReigonMove)
+        #Redraw bottom curves at the right resolution whenever its view changes
+        self.bottomPlot.sigXRangeChanged.connect(self.updateBottomCurves)
+        self.topPlot.plotItem.vb.sigResized.connect(self.updateTopCurves)
+        self.bottomPlot.plotItem.vb.sigResized.connect(self.updateBottomCurves)
+        self.updateTopCurves()
+        self.onHReigonMove()
 
         #Add widgets for x,y values
         self.topPlot.addItem(self.hReigon)
@@ -118,6 +134,9 @@ class StoredDataPlotter(QtGui.QMainWindow):
 
         #Check box for toggling snap to points
         self.snapToPointsToggle = QtGui.QCheckBox("Snap to points?")
+        #Check box for snapping to the closest point of any shown channel
+        #rather than the first
+        self.snapToAllToggle = QtGui.QCheckBox("Snap to all channels?")
         self.saveSelectedRegionBtn = QtGui.QPushButton("Save selection")
         self.saveSelectedRegionBtn.setIcon(self.style().standardIcon(QtGui.QStyle.SP_DialogSaveButton))
         self.saveSelectedRegionBtn.setIconSize(QtCore.QSize(24,24))
@@ -138,7 +157,14 @@ class StoredDataPlotter(QtGui.QMainWindow):
         optionsLayout = QtGui.QVBoxLayout()
         optionsLayout.addWidget(self.showPointsToggle)
         optionsLayout.addWidget(self.snapToPointsToggle)
+        optionsLayout.addWidget(self.snapToAllToggle)
         optionsLayout.addWidget(self.saveSelectedRegionBtn)
+        #Text recordings can be converted to the faster binary format
+        if not self.filePath.endswith(".pdl"):
+            self.convertFileBtn = QtGui.QPushButton("Convert to binary")
+            self.convertFileBtn.setToolTip("Save a copy of this recording in the binary .pdl format which opens much faster.")
+            self.convertFileBtn.clicked.connect(self.onConvertFilePress)
+            optionsLayout.addWidget(self.convertFileBtn)
         optionsBox.setLayout(optionsLayout)
         self.UILayout.addWidget(optionsBox)
 
@@ -174,26 +200,49 @@ class StoredDataPlotter(QtGui.QMainWindow):
 
     def onCheckBoxPress(self):
         '''
-        Redraws the plots when different data channels are selected
+        Shows and hides curves when different data channels are selected
         '''
-        self.topPlot.clear()
-        self.bottomPlot.clear()
-        for i in range(len(self.dataLabels)):
-            self.legend.removeItem(self.dataLabels[i])
         for i in range(len(self.checkWidgets)):
-            if self.checkWidgets[i].isChecked():
-                self.topPlot.plot(self.xDatas[i],self.yDatas[i],
-                        pen=(i,len(self.dataLabels)),name=self.dataLabels[i])
-                if self.showPointsToggle.isChecked():
-                    self.bottomPlot.plot(self.xDatas[i],self.yDatas[i],
-                    symbols='o',symbolSize=3,pen=(i,len(self.dataLabels)),
-                    name=self.dataLabels[i])
-                else:
-                    self.bottomPlot.plot(self.xDatas[i],self.yDatas[i],
-                    pen=(i,len(self.dataLabels)),name=self.dataLabels[i])
-        self.topPlot.addItem(self.hReigon)
-        self.bottomPlot.addItem(self.vLine)
-        self.bottomPlot.addItem(self.hLine)
+            self.legend.removeItem(self.dataLabels[i])
+            visible = self.checkWidgets[i].isChecked()
+            self.topCurves[i].setVisible(visible)
+            self.bottomCurves[i].setVisible(visible)
+            if visible:
+                self.legend.addItem(self.topCurves[i],self.dataLabels[i])
+            if self.showPointsToggle.isChecked():
+                self.bottomCurves[i].setSymbol('o')
+                self.bottomCurves[i].setSymbolSize(3)
+            else:
+                self.bottomCurves[i].setSymbol(None)
+        self.updateTopCurves()
+        self.updateBottomCurves()
+
+    def plotWidth(self,plot):
+        '''
+        Returns the width in pixels of a plot's view. Used to choose how finely
+        to draw curves.
+        '''
+        return max(int(plot.plotItem.vb.width()),100)
+
+    def updateTopCurves(self):
+        '''
+        Redraws the overview curves of every visible channel.
+        '''
+        pixels = self.plotWidth(self.topPlot)
+        for i in range(len(self.topCurves)):
+            if self.topCurves[i].isVisible():
+                self.topCurves[i].setData(*self.channels[i].envelope(0,self.xMax,pixels))
+
+    def updateBottomCurves(self):
+        '''
+        Redraws the curves of every visible channel on the bottom plot for the
+        range currently in view.
+        '''
+        x1,x2 = self.bottomPlot.plotItem.vb.viewRange()[0]
+        pixels = self.plotWidth(self.bottomPlot)
+        for i in range(len(self.bottomCurves)):
+            if self.bottomCurves[i].isVisible():
+                self.bottomCurves[i].setData(*self.channels[i].envelope(x1,x2,pixels))
 
     def onHReigonMove(self):
         '''
@@ -209,11 +258,11 @@ class StoredDataPlotter(QtGui.QMainWindow):
         '''
         for i in range(len(self.checkWidgets)):
             if self.checkWidgets[i].isChecked():
-                yData = np.asarray(self.yDatas[i])
-                xData = np.asarray(self.xDatas[i])
                 minX,maxX = self.hReigon.getRegion()
-                average = np.mean(yData[np.where((xData>minX) & (xData < maxX))])
-                self.averageResult.setText("Average Value:\n {0:1.3E}".format(average))
+                stats = self.channels[i].statistics(minX,maxX)
+                self.averageResult.setText(("Average Value:\n {0:1.3E}\nStd: {1:1.3E}"
+                        "\nMin: {2:1.3E}\nMax: {3:1.3E}").format(stats["mean"],
+                        stats["std"],stats["min"],stats["max"]))
                 break
 
     def onSaveSelectedRegionPress(self):
@@ -222,16 +271,36 @@ class StoredDataPlotter(QtGui.QMainWindow):
         to a new file by itself.
         '''
         fileName, filter = QtGui.QFileDialog.getSaveFileName(parent=self,
-                caption='Select output file', filter='*.csv')
+                caption='Select output file',
+                filter="Text recording (*.csv);;Binary recording (*.pdl)")
         if fileName != "":
-            fileHandle = open(fileName,"w+")
+            extension = ".pdl" if "pdl" in filter else ".csv"
+            if not fileName.endswith(extension):
+                fileName += extension
             x1,x2 = self.hReigon.getRegion()
+            if extension == ".pdl":
+                writer = ColumnarRecordWriter(fileName)
+            else:
+                writer = CSVRecordWriter(fileName)
+            #Only the chunks of each channel's region are read, and each is
+            #sliced by binary search and written as a single block
             for k,widget in enumerate(self.checkWidgets):
                 if widget.isChecked():
-                    for i in range(len(self.xDatas[k])):
-                        if self.xDatas[k][i] >= x1 and self.xDatas[k][i] <= x2:
-                            fileHandle.write("{}\t,\t{}\t,\t{}\t\n".format(
-                            self.dataLabels[k],self.xDatas[k][i],self.yDatas[k][i]))
+                    self.channels[k].export(writer,self.dataLabels[k],x1,x2)
+            writer.close()
+
+    def onConvertFilePress(self):
+        '''
+        Writes a copy of a text recording in the binary columnar format next to
+        the original file.
+        '''
+        outputPath = convertToColumnar(self.filePath)
+        self.msg = QtGui.QMessageBox()
+        self.msg.setIcon(QtGui.QMessageBox.Information)
+        self.msg.setText("Recording converted")
+        self.msg.setInformativeText("Saved to {}".format(outputPath))
+        self.msg.setWindowTitle("Convert to binary")
+        self.msg.show()
 
     def setUpCrossHairs(self):
         '''
@@ -248,56 +317,52 @@ class StoredDataPlotter(QtGui.QMainWindow):
             Update the mouse coordinate labels when the mouse is moved. Handles snaping
             to point functionallity also.
             '''
-            index = None
             position = event[0]
             if self.bottomPlot.sceneBoundingRect().contains(position):
                 mousePoint = self.bottomPlot.plotItem.vb.mapSceneToView(position)
-
-                for i in range(len(self.checkWidgets)):
-                    if self.snapToPointsToggle.isChecked():
-                        if self.checkWidgets[i].isChecked():
-                            index = np.abs(np.asarray(self.xDatas[i])-mousePoint.x()).argmin()
-                            self.vLine.setPos(self.xDatas[i][index])
-                            self.hLine.setPos(self.yDatas[i][index])
-                            self.xValueLabel.setText("x = {0:1.4E}".format(self.xDatas[i][index]))
-                            self.yValueLabel.setText("y = {0:1.4E}".format(self.yDatas[i][index]))
-                            break
-                    if index == None:
-                        self.vLine.setPos(mousePoint.x())
-                        self.hLine.setPos(mousePoint.y())
-                        self.xValueLabel.setText("x = {0:1.4E}".format(mousePoint.x()))
-                        self.yValueLabel.setText("y = {0:1.4E}".format(mousePoint.y()))
+                snapped = None
+                if self.snapToPointsToggle.isChecked():
+                    snapped = self.snapToPoint(mousePoint.x(),mousePoint.y())
+                if snapped != None:
+                    x,y = snapped
+                    self.vLine.setPos(x)
+                    self.hLine.setPos(y)
+                    self.xValueLabel.setText("x = {0:1.4E}".format(x))
+                    self.yValueLabel.setText("y = {0:1.4E}".format(y))
+                else:
+                    self.vLine.setPos(mousePoint.x())
+                    self.hLine.setPos(mousePoint.y())
+                    self.xValueLabel.setText("x = {0:1.4E}".format(mousePoint.x()))
+                    self.yValueLabel.setText("y = {0:1.4E}".format(mousePoint.y()))
         self.proxy = pg.SignalProxy(self.bottomPlot.scene().sigMouseMoved,rateLimit=30,slot=mouseMoved)
 
-    def getDataFromFile(self):
+    def snapToPoint(self,x,y):
         '''
-        Read data from CSV file and store it in lists for plotting
+        Returns the time and value of the point the cross hairs snap to for the
+        mouse position x,y, or None if no channels are shown. Snaps to the
+        nearest time on the first shown channel, or to the nearest point on
+        screen of any shown channel if snapping to all channels, see
+        nearestPoint. Each channel is searched for its sample nearest in time,
+        reading only the chunk it falls in.
         '''
-        nameArray = []
-        timeArray = []
-        dataArray = []
-        dataFile = open(self.filePath)
-        for line in dataFile:
-            if not line.startswith("#"):
-                strippedLine = line.rstrip().split("\t,\t")
-                nameArray.append((strippedLine[0]))
-                timeArray.append(float(strippedLine[1]))
-                dataArray.append(float(strippedLine[2]))
-
-        sensorNames = list(set(nameArray))
-        xs = []
-        ys = []
-        for i in range(len(sensorNames)):
-            xs.append([])
-            ys.append([])
-            for j in range(len(timeArray)):
-                if sensorNames[i] == nameArray[j]:
-                    xs[i].append(timeArray[j])
-                    ys[i].append(dataArray[j])
-
-        for i in range(len(sensorNames)):
-            start = xs[i][0]
-            for j in range(len(xs[i])):
-                xs[i][j] = xs[i][j]-start
+        channels = [i for i,widget in enumerate(self.checkWidgets) if widget.isChecked()]
+        if len(channels) == 0:
+            return None
+        if not self.snapToAllToggle.isChecked():
+            return self.channels[channels[0]].nearestSample(x)
+        xScale,yScale = self.bottomPlot.plotItem.vb.viewPixelSize()
+        xScale = xScale or 1.0
+        yScale = yScale or 1.0
+        #Distances in x and y are compared in pixels
+        k,xNearest,yNearest = nearestPoint([self.channels[i] for i in channels],x,y,xScale,yScale)
+        return xNearest, yNearest
 
-        return sensorNames, xs,ys
+    def getDataFromFile(self):
+        '''
+        Opens the recording file and returns the names of its channels with a
+        ChunkedChannel for each, which reads only the chunks it needs as the
+        plots are drawn. The recording's cache is used and saved as described
+        in openRecording.
+        '''
+        self.reader,sensorNames,channels = openRecording(self.filePath)
+        return sensorNames, channels
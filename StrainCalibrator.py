@@ -1,5 +1,8 @@
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtGui, QtCore, QtWidgets
+from PhidgetDataLogger.Calibration import LinearCalibration, PolynomialCalibration, saveCalibration
+from PhidgetDataLogger.IncrementalPolyFit import IncrementalPolyFit
+from PhidgetDataLogger.RunningWindowStats import RunningWindowStats
 import time, datetime
 import numpy as np
 import os
@@ -16,14 +19,15 @@ class StrainCalibrator(QtGui.QMainWindow):
         an argument.
         '''
         self.iconPath = self.iconPath = os.path.join(os.path.abspath(os.path.dirname(__file__)),"UI_Icons")
-        self.ownXData = [ ]
-        self.ownYData = [ ]
         QtGui.QMainWindow.__init__(self,parent)
         self.setWindowIcon(QtGui.QIcon(os.path.join(self.iconPath,"strainLogo.png")))
         self.sensor = sensor
-        self.masses = []
-        self.voltages = []
+        #Point held in each row of the table as (voltage,mass,weight) or None
+        self.rowPoints = []
+        self.fit = IncrementalPolyFit(1)
         self.currentMean = 0
+        #Set when the signal has moved since a point was last captured
+        self.captureArmed = True
         self.gradient = 0
         self.intercept = 0
         self.generateDataPlotterUI()
@@ -70,6 +74,13 @@ class StrainCalibrator(QtGui.QMainWindow):
         self.hReigon = pg.LinearRegionItem([5,10],movable=False)
         self.topPlot.addItem(self.hReigon)
 
+        #Samples plotted on the top graph with running statistics of those in
+        #the highlighted reigon
+        capacity = 2*round(self.sensor.refreshPeriod/self.sensor.dataInterval) + 100
+        self.windowStats = RunningWindowStats(capacity,5)
+        self.setStatsWindow()
+        self.hReigon.sigRegionChanged.connect(self.setStatsWindow)
+
         #Set up live ploting on top graph
         self.livePlotTimer = QtCore.QTimer()
         self.livePlotTimer.timeout.connect(self.onUpdate)
@@ -105,18 +116,40 @@ class StrainCalibrator(QtGui.QMainWindow):
         self.removePointButton.setIconSize(QtCore.QSize(24,24))
         self.averageLabel = QtGui.QLabel("Current average:")
         self.averageLabel.setToolTip("Average of data in highlighted reigon on top left plot.")
-
-        #Add table to store data points
+        self.driftLabel = QtGui.QLabel("Drift:")
+        self.driftLabel.setToolTip("Change across highlighted reigon of a straight line fitted to it.")
+
+        #Points can be added automatically each time the signal settles
+        self.autoCaptureToggle = QtGui.QCheckBox("Capture settled points")
+        self.autoCaptureToggle.setToolTip("Adds a point at the entered mass each time the signal "
+                "settles after changing. Set the mass before changing the load.")
+        self.settleLabel = QtGui.QLabel("Settle tolerance (V/V)")
+        self.settleSpinBox = QtGui.QDoubleSpinBox()
+        self.settleSpinBox.setDecimals(8)
+        self.settleSpinBox.setSingleStep(1e-6)
+        self.settleSpinBox.setValue(1e-5)
+        self.settleSpinBox.setToolTip("Largest drift across highlighted reigon of a settled signal.")
+
+        #Add table to store data points. Weights set how much each point counts
+        #towards the fit and residuals are filled in from the fit.
         self.dataTable = QtGui.QTableWidget()
         self.dataTable.setRowCount(10)
-        self.dataTable.setColumnCount(2)
-        self.dataTable.setHorizontalHeaderLabels(["Mass (Kg)","Voltage (V/V)"])
+        self.dataTable.setColumnCount(4)
+        self.dataTable.setHorizontalHeaderLabels(["Mass (Kg)","Voltage (V/V)","Weight","Residual (Kg)"])
+        self.rowPoints = [None]*self.dataTable.rowCount()
         self.dataTable.setSizePolicy(QtGui.QSizePolicy.Fixed,QtGui.QSizePolicy.Fixed)
         self.dataTable.setSizeAdjustPolicy(QtWidgets.QAbstractScrollArea.AdjustToContents)
 
-        #Add labels for calculated gradient and intercept
+        #Order of the polynomial fitted to the points
+        self.fitOrderLabel = QtGui.QLabel("Fit order")
+        self.fitOrderSpinBox = QtGui.QSpinBox()
+        self.fitOrderSpinBox.setRange(1,5)
+        self.fitOrderSpinBox.setToolTip("1 fits a straight line. Higher orders need more points.")
+
+        #Add labels for calculated fit coefficients and fit quality
         self.gradientLabel = QtGui.QLabel("Gradient: ")
         self.interceptLabel = QtGui.QLabel("Intercept: ")
+        self.fitQualityLabel = QtGui.QLabel("R squared: ")
 
         #Save callibration
         self.saveCalBtn = QtGui.QPushButton("Save Callibration")
@@ -126,8 +159,10 @@ class StrainCalibrator(QtGui.QMainWindow):
         #connect widgets
         self.addPointButton.clicked.connect(self.onAddPointPress)
         self.removePointButton.clicked.connect(self.onRemovePointPress)
+        self.autoCaptureToggle.stateChanged.connect(self.onAutoCaptureToggle)
         self.saveCalBtn.clicked.connect(self.onSaveCalPress)
         self.dataTable.cellChanged.connect(self.onTableEdit)
+        self.fitOrderSpinBox.valueChanged.connect(self.onFitOrderChange)
 
         #Add widgets to layout
 
@@ -139,6 +174,10 @@ class StrainCalibrator(QtGui.QMainWindow):
         dataEntryLayout.addWidget(self.addPointButton)
         dataEntryLayout.addWidget(self.removePointButton)
         dataEntryLayout.addWidget(self.averageLabel)
+        dataEntryLayout.addWidget(self.driftLabel)
+        dataEntryLayout.addWidget(self.autoCaptureToggle)
+        dataEntryLayout.addWidget(self.settleLabel)
+        dataEntryLayout.addWidget(self.settleSpinBox)
         dataEntryBox.setLayout(dataEntryLayout)
         self.UILayout.addWidget(dataEntryBox)
         self.UILayout.addWidget(self.dataTable)
@@ -146,8 +185,11 @@ class StrainCalibrator(QtGui.QMainWindow):
         #Group box for displaying computed gradient and intercepy
         outputDataBox = QtGui.QGroupBox("Ouput values")
         outputDataLayout = QtGui.QVBoxLayout()
+        outputDataLayout.addWidget(self.fitOrderLabel)
+        outputDataLayout.addWidget(self.fitOrderSpinBox)
         outputDataLayout.addWidget(self.gradientLabel)
         outputDataLayout.addWidget(self.interceptLabel)
+        outputDataLayout.addWidget(self.fitQualityLabel)
         outputDataBox.setLayout(outputDataLayout)
         self.UILayout.addWidget(outputDataBox)
 
@@ -167,110 +209,220 @@ class StrainCalibrator(QtGui.QMainWindow):
         Defines the function used to update the live plot necessary for callibration
         '''
         x, y, plotX, plotY = self.sensor.getData()
-        for i in range(len(x)):
-            if len(self.ownXData) > 0:
-                if (x[i] - self.ownXData[0]) >= self.sensor.refreshPeriod/1000:
-                    self.ownXData.pop(0)
-                    self.ownYData.pop(0)
-            self.ownXData.append(x[i])
-            self.ownYData.append(y[i])
-        actualPlotXData = np.asarray(self.ownXData)-self.ownXData[0]
-        actualPlotYData = np.asarray(self.ownYData)
-        self.topCurve.setData(actualPlotXData,actualPlotYData)
+        self.windowStats.extend(x,y)
+        times,values = self.windowStats.view()
+        if len(times) == 0:
+            return
+        #Plot the samples from the last refresh period
+        i0 = np.searchsorted(times,times[-1] - self.sensor.refreshPeriod/1000.0,"right")
+        self.topCurve.setData(times[i0:] - times[i0],values[i0:])
 
         #Average area in highlighted reigon
-        minX,maxX = self.hReigon.getRegion()
-        if actualPlotXData[-1] >= minX:
-            self.currentMean = np.mean(actualPlotYData[np.where((actualPlotXData>minX) & (actualPlotXData < maxX))])
+        if self.windowStats.count() > 0:
+            self.currentMean = self.windowStats.mean()
             self.averageLabel.setText("Avrage value: {0:1.4E}".format(self.currentMean))
+            settled = self.windowStats.isSettled(self.settleSpinBox.value())
+            self.driftLabel.setText("Drift: {0:1.2E}{1}".format(self.windowStats.drift(),
+                    " (settled)" if settled else ""))
+            if not settled:
+                self.captureArmed = True
+            elif self.captureArmed and self.autoCaptureToggle.isChecked():
+                self.captureArmed = False
+                self.onAddPointPress()
+
+    def setStatsWindow(self):
+        '''
+        Matches the running statistics to the highlighted reigon. The reigon is
+        positioned from the start of the plotted period so ends this long before
+        the newest sample.
+        '''
+        minX,maxX = self.hReigon.getRegion()
+        delay = max(self.sensor.refreshPeriod/1000.0 - maxX,0.0)
+        self.windowStats.setWindow(maxX - minX,delay)
+
+    def onAutoCaptureToggle(self):
+        '''
+        Waits for the signal to change before capturing a point if it is
+        already settled when automatic capture is turned on, so the point
+        for the current load is not added twice.
+        '''
+        self.captureArmed = self.lastPointRow() < 0
 
     def onAddPointPress(self):
         '''
         Adds data point to the table. Data ponts are made from user set x value
         and y value obtained from average of highlighted reigon on live plot.
         '''
-        self.dataTable.disconnect()
-        mass = self.massSpinBox.value()
-        voltage = self.currentMean
-        self.masses.append(mass)
-        self.voltages.append(voltage)
-        self.writeToTable()
+        row = self.lastPointRow() + 1
+        if row + 1 >= self.dataTable.rowCount():
+            self.dataTable.setRowCount(row + 10)
+            self.rowPoints += [None]*(self.dataTable.rowCount() - len(self.rowPoints))
+        self.setRowPoint(row,(self.currentMean,self.massSpinBox.value(),1.0))
+        self.writeToTable(row)
         self.replotCallCurve()
-        self.dataTable.cellChanged.connect(self.onTableEdit)
 
     def onRemovePointPress(self):
         '''
         Removes the latest point from the table
         '''
-        if len(self.masses)>0:
-            self.dataTable.disconnect()
-            self.dataTable.clearContents()
-            self.masses.pop()
-            self.voltages.pop()
-            self.writeToTable()
-            self.replotCallCurve()
-            self.dataTable.cellChanged.connect(self.onTableEdit)
-
-    def onTableEdit(self):
-        '''
-        Resets the callibration curve and table if user edits table entries
-        '''
-        self.masses = []
-        self.voltages = []
-        nRows = self.dataTable.rowCount()
-        for row in range(nRows):
-                mass = self.dataTable.item(row,0)
-                volts = self.dataTable.item(row,1)
-                if mass != None and volts != None:
-                    self.masses.append(float(mass.text()))
-                    self.voltages.append(float(volts.text()))
-        if len(self.masses) >1:
+        row = self.lastPointRow()
+        if row >= 0:
+            self.setRowPoint(row,None)
+            self.dataTable.blockSignals(True)
+            for column in range(self.dataTable.columnCount()):
+                self.dataTable.setItem(row,column,None)
+            self.dataTable.blockSignals(False)
             self.replotCallCurve()
 
-    def writeToTable(self):
+    def onTableEdit(self,row,column):
         '''
-        Writes stored values to table
+        Updates the fit with the edited row of the table. Rows without both a
+        mass and a voltage are left out of the fit.
         '''
-        for i in range(len(self.masses)):
-            self.dataTable.setItem(i,0, QtGui.QTableWidgetItem(str(self.masses[i])))
-            self.dataTable.setItem(i,1, QtGui.QTableWidgetItem(str(self.voltages[i])))
+        if column > 2:
+            return
+        point = None
+        try:
+            mass = self.dataTable.item(row,0)
+            volts = self.dataTable.item(row,1)
+            weight = self.dataTable.item(row,2)
+            if mass != None and volts != None:
+                weight = float(weight.text()) if weight != None and weight.text() != "" else 1.0
+                if weight > 0:
+                    point = (float(volts.text()),float(mass.text()),weight)
+        except ValueError:
+            pass
+        self.setRowPoint(row,point)
+        self.replotCallCurve()
+
+    def onFitOrderChange(self):
+        '''
+        Starts a new fit of the chosen order from the points in the table.
+        '''
+        self.fit = IncrementalPolyFit(self.fitOrderSpinBox.value())
+        self.fit.rebuild(*self.tablePoints())
+        self.replotCallCurve()
+
+    def setRowPoint(self,row,point):
+        '''
+        Replaces the point held in a row of the table, updating the fit by
+        removing the old point and adding the new one.
+        '''
+        if self.rowPoints[row] != None:
+            self.fit.remove(*self.rowPoints[row])
+        self.rowPoints[row] = point
+        if point != None:
+            self.fit.add(*point)
+        if self.fit.stale:
+            self.fit.rebuild(*self.tablePoints())
+
+    def lastPointRow(self):
+        '''
+        Returns the last row of the table holding a point or -1 if there are none.
+        '''
+        for row in range(len(self.rowPoints)-1,-1,-1):
+            if self.rowPoints[row] != None:
+                return row
+        return -1
+
+    def tablePoints(self):
+        '''
+        Returns arrays of the voltages, masses and weights of every point.
+        '''
+        points = [point for point in self.rowPoints if point != None]
+        if len(points) == 0:
+            return np.empty(0), np.empty(0), np.empty(0)
+        voltages,masses,weights = np.array(points).T
+        return voltages, masses, weights
+
+    def writeToTable(self,row):
+        '''
+        Writes the point held in a row to the table
+        '''
+        voltage,mass,weight = self.rowPoints[row]
+        self.dataTable.blockSignals(True)
+        self.dataTable.setItem(row,0, QtGui.QTableWidgetItem(str(mass)))
+        self.dataTable.setItem(row,1, QtGui.QTableWidgetItem(str(voltage)))
+        self.dataTable.setItem(row,2, QtGui.QTableWidgetItem(str(weight)))
+        self.dataTable.blockSignals(False)
+
+    def writeResiduals(self):
+        '''
+        Writes the residual of every point from the fit to the table
+        '''
+        self.dataTable.blockSignals(True)
+        for row,point in enumerate(self.rowPoints):
+            text = ""
+            if point != None and self.fit.count >= self.fit.nCoefficients:
+                text = "{0:1.3E}".format(float(self.fit.residuals(point[0],point[1])))
+            item = QtGui.QTableWidgetItem(text)
+            item.setFlags(item.flags() & ~QtCore.Qt.ItemIsEditable)
+            self.dataTable.setItem(row,3,item)
+        self.dataTable.blockSignals(False)
 
     def replotCallCurve(self):
         '''
-        Replots the callibration curve using data from the table
+        Replots the callibration curve using data from the table along with the
+        95% confidence band of the fit
         '''
+        voltages,masses,weights = self.tablePoints()
         self.bottomPlot.clear()
-        self.bottomPlot.plot(self.voltages,self.masses,pen=None ,symbols='o',symbolSize=10)
-        #Fit best line through points
-        if len(self.masses) > 1:
+        self.bottomPlot.plot(voltages,masses,pen=None ,symbols='o',symbolSize=10)
+        self.writeResiduals()
+        #Fit curve through points
+        if self.fit.count >= self.fit.nCoefficients:
             try:
-                p = np.polyfit(self.voltages,self.masses,1)
-                self.gradient = p[0]
-                self.intercept = p[1]
-                x = np.linspace(min(self.voltages),max(self.voltages),100)
-                y = self.gradient*x + self.intercept
+                coefficients = self.fit.coefficients()
+                intervals = np.full(len(coefficients),np.nan)
+                if self.fit.count > self.fit.nCoefficients:
+                    intervals = self.fit.coefficientIntervals()
+                self.gradient = coefficients[-2]
+                self.intercept = coefficients[-1]
+                x = np.linspace(min(voltages),max(voltages),100)
+                y = np.polyval(coefficients,x)
                 self.bottomPlot.plot(x,y,pen=(90,200,255))
-                self.gradientLabel.setText("Gradient: {0:1.4E}".format(self.gradient))
-                self.interceptLabel.setText("Intercept: {0:1.4E}".format(self.intercept))
+                if self.fit.count > self.fit.nCoefficients:
+                    band = self.fit.predictionIntervals(x)
+                    bandPen = pg.mkPen((90,200,255),style=QtCore.Qt.DashLine)
+                    self.bottomPlot.plot(x,y+band,pen=bandPen)
+                    self.bottomPlot.plot(x,y-band,pen=bandPen)
+                if self.fit.order == 1:
+                    self.gradientLabel.setText("Gradient: {0:1.4E} \u00b1 {1:1.1E}".format(
+                            self.gradient,intervals[0]))
+                    self.interceptLabel.setText("Intercept: {0:1.4E} \u00b1 {1:1.1E}".format(
+                            self.intercept,intervals[1]))
+                else:
+                    self.gradientLabel.setText("Coefficients (highest power first):\n" + "\n".join(
+                            "{0:1.4E} \u00b1 {1:1.1E}".format(c,i) for c,i in zip(coefficients,intervals)))
+                    self.interceptLabel.setText("")
+                rms = np.sqrt(self.fit.residualSumOfSquares()/np.sum(weights))
+                self.fitQualityLabel.setText("R squared: {0:1.6f}\nRMS residual: {1:1.3E}".format(
+                        self.fit.rSquared(),rms))
             except Exception:
                 pass
 
     def onSaveCalPress(self):
         '''
-        Saves the calculated gradient and interept to a plain text .cal file
+        Saves the fitted callibration to a plain text .cal file
         '''
         fileName, filter = QtGui.QFileDialog.getSaveFileName(parent=self,
                 caption='Select output file', filter='*.cal')
         if fileName != "":
-            fileHandle = open(fileName,"w+")
-            fileHandle.write("#Callibration data for strain sensor\n")
-            timeStamp = time.time()
-            timeStamp = datetime.datetime.fromtimestamp(timeStamp)
-            timeStamp = timeStamp.strftime('%d/%m/%Y__%H:%M:%S')
-            fileHandle.write("#Callibration performed on {}\n".format(timeStamp))
-            fileHandle.write("#Callibration in form mass(Kg) = gradient*voltage(v/v) + intercept\n")
-            fileHandle.write("#Data listed: gradient,intercept\n")
-            fileHandle.write("{} , {}".format(self.gradient,self.intercept))
+            try:
+                if self.fit.order == 1:
+                    calibration = LinearCalibration(self.gradient,self.intercept)
+                else:
+                    voltages,masses,weights = self.tablePoints()
+                    calibration = PolynomialCalibration(self.fit.coefficients(),
+                            (voltages.min(),voltages.max()))
+                saveCalibration(calibration,fileName,"Callibration data for strain sensor")
+            except ValueError as error:
+                self.msg = QtGui.QMessageBox()
+                self.msg.setIcon(QtGui.QMessageBox.Warning)
+                self.msg.setText("Uh Oh! ")
+                self.msg.setInformativeText("Could not save callibration. {}".format(error))
+                self.msg.setWindowTitle("Error")
+                self.msg.show()
 
     def closeEvent(self,event):
         '''
@@ -2,6 +2,7 @@ from Phidget22.Devices.VoltageRatioInput import *
 from Phidget22.PhidgetException import *
 from Phidget22.Phidget import *
 from PhidgetDataLogger import Sensor
+from PhidgetDataLogger.Calibration import LinearCalibration
 import numpy as np
 from time import sleep
 import time
@@ -17,7 +18,6 @@ class StrainSensor(Sensor):
         '''
         self.channelNo = channelNo
         self.sensorUnits = "Kg"
-        self.useCallibration = False
         self.gradient = 1
         self.intercept = 0
         Sensor.__init__(self,deviceSN,dataInterval,refreshPeriod,sensorName)
@@ -43,15 +43,14 @@ class StrainSensor(Sensor):
         def onSensorValueChange(channelObject,voltageRatio):
             rawTime = time.time()
             deltaTime = rawTime- self.startTime
-            if self.useCallibration:
-                voltageRatio = voltageRatio*self.gradient + self.intercept
             self.dataQ.put([voltageRatio,deltaTime,rawTime])
         self.channel.setOnVoltageRatioChangeHandler(onSensorValueChange)
 
     def setCallibration(self,gradient,intercept):
         '''
-        Used to give the sensor callibration values.
+        Used to give the sensor callibration values. Sets a linear calibration
+        of the voltage ratio.
         '''
         self.gradient = gradient
         self.intercept = intercept
-        self.useCallibration = True
+        self.setCalibration(LinearCalibration(gradient,intercept))
@@ -0,0 +1,198 @@
+from PhidgetDataLogger import Sensor
+import threading
+import random
+import math
+import time
+
+class SyntheticSensor(Sensor):
+    '''
+    Class derived from Sensor to simulate a phidget sensor at a realistic data
+    rate. A background thread puts samples into the data queue one at a time,
+    the same way phidget callbacks do, so the whole application can be loaded
+    and measured with no phidgets attached. Timing jitter, samples delivered in
+    bursts, dropped samples and the sensor detaching and reattaching can all be
+    simulated. The raw time of each sample is when it was due, so the latency
+    of the rest of the application can be measured from it.
+    '''
+
+    #Waveforms the sensor can output
+    waveforms = ("sine","square","sawtooth","noise")
+
+    def __init__(self,dataInterval,refreshPeriod,sensorName=None,waveform="sine",
+            frequency=1.0,amplitude=1.0,offset=0.0,noise=0.0,jitter=0.0,burstSize=1,
+            dropoutRate=0.0,detachInterval=None,detachDuration=1.0,seed=None):
+        '''
+        Constructor for the synthetic sensor. Starts producing samples straight
+        away.
+
+        Arguments
+        ---------
+        dataInterval: Time in ms between samples. Unlike a phidget any interval
+        can be used.
+
+        refreshPeriod: Time in seconds data will be plotted for before the
+        graph is refreshed.
+
+        sensorName: Human readable string used to ID sensors.
+
+        waveform: One of "sine", "square", "sawtooth" or "noise".
+
+        frequency: Frequency of the waveform in Hz.
+
+        amplitude, offset: Amplitude and offset of the waveform.
+
+        noise: Standard deviation of normally distributed noise added to every
+        sample.
+
+        jitter: Standard deviation in ms of the delay of each delivery.
+
+        burstSize: Number of samples delivered together. Samples are held back
+        until a whole burst is due.
+
+        dropoutRate: Fraction of samples which are lost.
+
+        detachInterval: Mean time in seconds between the sensor detaching, or
+        None if it never detaches.
+
+        detachDuration: Time in seconds the sensor stays detached.
+
+        seed: Seed of the random numbers, so runs can be repeated.
+        '''
+        if waveform not in self.waveforms:
+            raise ValueError("waveform must be one of {}".format(self.waveforms))
+        self.sensorUnits = "N/A"
+        self.waveform = waveform
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.offset = offset
+        self.noise = noise
+        self.jitter = jitter/1000.0
+        self.burstSize = max(1,int(burstSize))
+        self.dropoutRate = dropoutRate
+        self.detachInterval = detachInterval
+        self.detachDuration = detachDuration
+        self.random = random.Random(seed)
+        self.stopEvent = threading.Event()
+        #Counters of every sample produced, delivered and dropped
+        self.producedSamples = 0
+        self.deliveredSamples = 0
+        self.droppedCount = 0
+        self.detachCount = 0
+        Sensor.__init__(self,None,dataInterval,refreshPeriod,sensorName)
+
+    def attachSensor(self):
+        '''
+        Overrides attachSensor from Sensor. There is no phidget to attach to.
+        '''
+        self.attached = True
+
+    def activateDisconnectListener(self):
+        '''
+        Overrides activateDisconnectListener from Sensor. Detaching is
+        simulated by the sample thread.
+        '''
+        pass
+
+    def activateDataListener(self):
+        '''
+        Overrides activateDataListener from Sensor. Starts the thread which
+        produces the samples.
+        '''
+        self.startTime = time.time()
+        self.thread = threading.Thread(target=self.run,name=self.sensorName,daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        '''
+        Stops producing samples and waits for the sample thread to finish.
+        '''
+        self.stopEvent.set()
+        self.thread.join()
+
+    def droppedSamples(self):
+        '''
+        Returns the number of samples lost before reaching the data queue, as
+        for a RemoteSensor, here through the simulated dropout rate.
+        '''
+        return self.droppedCount
+
+    def value(self,t):
+        '''
+        Returns the value of the waveform at time t in seconds, without noise.
+        '''
+        phase = (t*self.frequency) % 1.0
+        if self.waveform == "sine":
+            wave = math.sin(2*math.pi*phase)
+        elif self.waveform == "square":
+            wave = 1.0 if phase < 0.5 else -1.0
+        elif self.waveform == "sawtooth":
+            wave = 2*phase - 1.0
+        else:
+            wave = 0.0
+        return self.offset + self.amplitude*wave
+
+    def run(self):
+        '''
+        Sample thread loop. Sleeps until the next burst is due then puts each of
+        its samples into the data queue, catching up if it woke late.
+        '''
+        interval = self.dataInterval/1000.0
+        #Samples are scheduled on the monotonic clock and time stamped on the
+        #wall clock the raw times of real sensors use
+        monotonicStart = time.monotonic()
+        wallStart = time.time()
+        nextSample = 0
+        nextDetach = self.nextDetachTime(0.0)
+        while not self.stopEvent.is_set():
+            burstEnd = nextSample + self.burstSize
+            delay = self.random.gauss(0.0,self.jitter) if self.jitter > 0 else 0.0
+            due = (burstEnd - 1)*interval + abs(delay)
+            wait = due - (time.monotonic() - monotonicStart)
+            if wait > 0 and self.stopEvent.wait(wait):
+                break
+            elapsed = time.monotonic() - monotonicStart
+            if elapsed >= nextDetach:
+                self.detach()
+                if self.stopEvent.is_set():
+                    break
+                #Samples due while detached are never taken
+                nextSample = int(math.ceil((time.monotonic() - monotonicStart)/interval))
+                nextDetach = self.nextDetachTime(time.monotonic() - monotonicStart)
+                continue
+            #Catch up with every further whole burst which is due
+            available = int(elapsed/interval) + 1
+            if available > burstEnd:
+                burstEnd += (available - burstEnd)//self.burstSize*self.burstSize
+            for k in range(nextSample,burstEnd):
+                t = k*interval
+                self.producedSamples += 1
+                if self.dropoutRate > 0 and self.random.random() < self.dropoutRate:
+                    self.droppedCount += 1
+                    continue
+                value = self.value(t)
+                if self.noise > 0:
+                    value += self.random.gauss(0.0,self.noise)
+                rawTime = wallStart + t
+                self.dataQ.put([value,rawTime - self.startTime,rawTime])
+                self.deliveredSamples += 1
+            nextSample = burstEnd
+
+    def nextDetachTime(self,now):
+        '''
+        Returns the time the sensor next detaches, drawn from an exponential
+        distribution so detaches are random.
+        '''
+        if self.detachInterval == None:
+            return float("inf")
+        return now + self.random.expovariate(1.0/self.detachInterval)
+
+    def detach(self):
+        '''
+        Simulates the sensor detaching then reattaching after detachDuration.
+        '''
+        self.attached = False
+        self.detachCount += 1
+        print("\n***** {} detached *****".format(self.sensorName))
+        if not self.stopEvent.wait(self.detachDuration):
+            self.attached = True
+            print("\n***** {} reattached *****".format(self.sensorName))
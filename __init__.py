@@ -1,12 +1,65 @@
+from .RingBuffer import RingBuffer
+from .SampleQueue import SampleQueue
 from .Sensor import Sensor
 from .DummySensor import DummySensor
+from .SyntheticSensor import SyntheticSensor
 from .IRTemperatureSensor import IRTemperatureSensor
-from .PhidgetDisplayApp import PhidgetDisplayApp
-from .StoredDataPlotter import StoredDataPlotter
-from .StrainCalibrator import StrainCalibrator
 from .StrainSensor import StrainSensor
 from .StrainSensor import *
 from .VoltageInputSensor import VoltageInputSensor
 from .VoltageRatioSensor import VoltageRatioSensor
 from .DigitalOutputChannel import DigitalOutputChannel
+from .DummyDigitalOutputChannel import DummyDigitalOutputChannel
+from .Interlock import Interlock
 from .ThermoCouple import ThermoCouple
+from .Recorder import Recorder
+from .CSVRecording import CSVRecordWriter
+from .CSVRecording import CSVRecordReader
+from .CSVRecording import convertToColumnar
+from .ColumnarRecording import ColumnarRecordWriter
+from .ColumnarRecording import ColumnarRecordReader
+from .DecimationPyramid import DecimationPyramid
+from .RecordingCache import RecordingCache, openRecording
+from .RangeQuery import RangeQuery
+from .ChunkedChannel import ChunkedChannel, nearestPoint
+from .AcquisitionEngine import AcquisitionEngine
+from .PerformanceMetrics import PerformanceMetrics, formatSnapshot, peakMemory
+from .MetricsExporter import MetricsExporter
+from .AlarmEngine import AlarmEngine, formatEvent
+from .AlarmDispatcher import AlarmDispatcher
+from .LiveDecimator import LiveDecimator
+from .Recorder import recordWriters, openRecordWriter
+from .SensorConfig import createSensor, readSensorConfig, loadSensorConfig
+from .HeadlessRecorder import HeadlessRecorder
+from .Calibration import LinearCalibration, PolynomialCalibration, LookupTableCalibration
+from .Calibration import calibrationFromDict, loadCalibration, saveCalibration
+from .IncrementalPolyFit import IncrementalPolyFit, tQuantile
+from .RunningWindowStats import RunningWindowStats
+from .SharedSampleRing import SharedSampleRing
+from .RemoteSensor import RemoteSensor
+from .ProcessAcquisition import ProcessAcquisition
+
+#The user interface classes need PyQt5 and pyqtgraph, which are slow to import,
+#so they are only imported when first used. The rest of the package only needs
+#numpy and Phidget22.
+lazyModules = {"PhidgetDisplayApp":".PhidgetDisplayApp",
+        "StoredDataPlotter":".StoredDataPlotter",
+        "StrainCalibrator":".StrainCalibrator"}
+
+def __getattr__(name):
+    '''
+    Imports the user interface classes the first time any of them is accessed.
+    '''
+    if name in lazyModules:
+        import importlib
+        #They import each other, which binds their modules to the package in
+        #place of the classes, so every class is bound once all are imported
+        modules = {lazyName:importlib.import_module(moduleName,__name__)
+                for lazyName,moduleName in lazyModules.items()}
+        for lazyName,module in modules.items():
+            globals()[lazyName] = getattr(module,lazyName)
+        return globals()[name]
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__,name))
+
+def __dir__():
+    return sorted(list(globals()) + list(lazyModules))
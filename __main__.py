@@ -0,0 +1,69 @@
+'''
+Command line entry point for recording without the user interface, eg.
+
+    python -m PhidgetDataLogger record --config sensors.json --duration 2d --output run.pdl
+
+Only needs NumPy and Phidget22.
+'''
+from PhidgetDataLogger.SensorConfig import readSensorConfig, loadSensorConfig
+from PhidgetDataLogger.HeadlessRecorder import HeadlessRecorder
+from PhidgetDataLogger.ProcessAcquisition import ProcessAcquisition
+import argparse
+import sys
+
+#Seconds in each unit a duration can be given in
+durationUnits = {"s":1,"m":60,"h":3600,"d":86400}
+
+def parseDuration(text):
+    '''
+    Converts a duration such as "90", "30m", "12h" or "2d" to seconds. Numbers
+    without a unit are seconds.
+    '''
+    unit = text[-1:].lower()
+    try:
+        if unit in durationUnits:
+            return float(text[:-1])*durationUnits[unit]
+        return float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("Bad duration {}".format(text))
+
+def main(argv=None):
+    '''
+    Parses the command line and runs the chosen command.
+    '''
+    parser = argparse.ArgumentParser(prog="python -m PhidgetDataLogger",
+            description="Phidget data logger without the user interface.")
+    commands = parser.add_subparsers(dest="command",required=True)
+    record = commands.add_parser("record",help="Record sensors to a file.")
+    record.add_argument("--config",required=True,
+            help="JSON file listing the sensors to record.")
+    record.add_argument("--output",required=True,
+            help="File to record to, ending in .csv or .pdl.")
+    record.add_argument("--duration",type=parseDuration,default=None,
+            help="Time to record for, eg. 90, 30m, 12h or 2d. Records until stopped if not given.")
+    record.add_argument("--status-interval",type=parseDuration,default=60.0,
+            help="Time between printed status lines.")
+    record.add_argument("--metrics",default=None,
+            help="File or udp://host:port to export performance metrics to as JSON lines.")
+    record.add_argument("--metrics-interval",type=parseDuration,default=10.0,
+            help="Time between exported metrics.")
+    record.add_argument("--processes",type=int,default=0,
+            help="Number of worker processes to share the sensors between. "
+            "0 runs every sensor in this process.")
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        if args.processes > 0:
+            acquisition = ProcessAcquisition(readSensorConfig(args.config),args.processes)
+            try:
+                HeadlessRecorder(acquisition.sensors,args.output,args.duration,
+                        args.status_interval,args.metrics,args.metrics_interval).run()
+            finally:
+                acquisition.stop()
+        else:
+            sensors = loadSensorConfig(args.config)
+            HeadlessRecorder(sensors,args.output,args.duration,args.status_interval,
+                    args.metrics,args.metrics_interval).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())